@@ -0,0 +1,82 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from src.database.unencrypted_database import IngredientDatabase
+from src.entities.ingredient           import Ingredient
+from src.entities.nutritional_values   import NutritionalValues
+
+NO_INGREDIENTS = 5_000
+NO_LOOKUPS     = 50_000
+
+
+def legacy_get_ingredient(database: IngredientDatabase, name: str) -> Ingredient:
+    """Look up ingredient the way it was done before the statements were cached.
+
+    The statement text is rebuilt on each call and the name is inlined
+    into it, so every lookup is a new statement for SQLite to prepare.
+    """
+    keys = list(database.db_metadata.keys())
+
+    sql_command  =  'SELECT '
+    sql_command +=  ', '.join(keys)
+    sql_command += f' FROM {database.table_name}'
+    sql_command += f" WHERE {database.db_metadata['name'][0]} == '{name}'"
+
+    return database.from_row(database.cursor.execute(sql_command).fetchall()[0])
+
+
+def measure(label: str, lookup: Callable, names: list) -> None:
+    """Measure and print the throughput of the lookup function."""
+    start = time.perf_counter()
+    for name in names:
+        lookup(name)
+    duration = time.perf_counter() - start
+    print(f'{label:<30} {len(names) / duration:>12,.0f} lookups/s')
+
+
+def main() -> None:
+    """Benchmark ingredient lookups by name."""
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+
+        database = IngredientDatabase()
+        names    = [f'Ingredient {i}' for i in range(NO_INGREDIENTS)]
+        for name in names:
+            database.insert(Ingredient(name, NutritionalValues(kcal=1.0)))
+
+        lookups = [names[i % NO_INGREDIENTS] for i in range(0, NO_LOOKUPS * 7, 7)]
+
+        measure('Inlined, rebuilt statement', lambda n: legacy_get_ingredient(database, n), lookups)
+        measure('Parameterized, cached',      database.get_ingredient,                     lookups)
+
+        database.connection.close()
+        os.chdir('/')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import json
+import os
+import sys
+import time
+
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from src.common.enums                import DBKeys
+from src.database.log_records        import decode_partition, encode_partition
+from src.entities.meal               import Meal
+from src.entities.nutritional_values import NutritionalValues, nv_metadata
+
+NO_MEALS      = 10_000
+DAYS_PER_LOG  = 30
+MEALS_PER_DAY = 5
+
+
+def create_meal(i: int) -> Meal:
+    """Create a meal whose every nutrient has a value, as meals cooked from real ingredients do."""
+    meal_nv = NutritionalValues(**{key: (i % 97 + n) * 0.37 for n, key in enumerate(nv_metadata)})
+    return Meal(f'Chicken curry {i}', f'{i % 28 + 1:02d}/05/2023-12:30:00', 350.0, meal_nv,
+                {'Basmati rice': 150.0, 'Greek yogurt': 50.0})
+
+
+def legacy_partition(meals: list) -> bytes:
+    """Encode the meals into a monthly partition the way it was done before the binary format."""
+    meal_log = {}  # type: dict
+    for meal in meals:
+        meal_log.setdefault(meal.eat_tstamp.split('-')[0], []).append(meal.serialize())
+    return json.dumps({DBKeys.WEIGHT_LOG.value: {}, DBKeys.MEAL_LOG.value: meal_log}).encode()
+
+
+def binary_partition(meals: list) -> bytes:
+    """Encode the meals into a monthly partition in the binary format."""
+    meal_log = {}  # type: dict
+    for meal in meals:
+        meal_log.setdefault(meal.eat_tstamp.split('-')[0], {})[meal.meal_id] = meal.to_bytes()
+    return encode_partition({DBKeys.WEIGHT_LOG.value: {}, DBKeys.MEAL_LOG.value: meal_log},
+                            bytes(32), 0)
+
+
+def load_legacy_partition(partition: bytes) -> list:
+    """Parse every meal of a partition in the JSON format."""
+    meal_log = json.loads(partition)[DBKeys.MEAL_LOG.value]
+    return [Meal.from_serialized_string(s) for meals in meal_log.values() for s in meals]
+
+
+def load_binary_partition(partition: bytes) -> list:
+    """Parse every meal of a partition in the binary format."""
+    meal_log = decode_partition(partition)[0][DBKeys.MEAL_LOG.value]
+    return [Meal.from_bytes(record) for meals in meal_log.values() for record in meals.values()]
+
+
+def measure(label    : str,
+            function : Callable,
+            items    : list,
+            unit     : str = 'records'
+            ) -> None:
+    """Measure and print the throughput of the function."""
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    duration = time.perf_counter() - start
+    print(f'{label:<30} {len(items) / duration:>12,.0f} {unit}/s')
+
+
+def main() -> None:
+    """Benchmark the serialization throughput and size of the meal records."""
+    meals   = [create_meal(i) for i in range(NO_MEALS)]
+    strings = [meal.serialize() for meal in meals]
+    records = [meal.to_bytes() for meal in meals]
+
+    measure('Serialize, str(dict)',    Meal.serialize,              meals)
+    measure('Serialize, binary',       Meal.to_bytes,               meals)
+    measure('Parse, ast.literal_eval', Meal.from_serialized_string, strings)
+    measure('Parse, binary',           Meal.from_bytes,             records)
+
+    print(f'{"Meal size, str(dict)":<30} {sum(map(len, strings)) / NO_MEALS:>12,.0f} bytes')
+    print(f'{"Meal size, binary":<30} {sum(map(len, records)) / NO_MEALS:>12,.0f} bytes')
+
+    month     = meals[:DAYS_PER_LOG * MEALS_PER_DAY]
+    legacy    = [legacy_partition(month)]
+    binary    = [binary_partition(month)]
+    partition = f'Partition of {len(month)} meals'
+
+    print(f'{partition + ", JSON":<30} {len(legacy[0]):>12,} bytes')
+    print(f'{partition + ", binary":<30} {len(binary[0]):>12,} bytes')
+
+    measure('Load partition, JSON',   load_legacy_partition, legacy * 10, 'partitions')
+    measure('Load partition, binary', load_binary_partition, binary * 10, 'partitions')
+
+
+if __name__ == '__main__':
+    main()
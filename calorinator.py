@@ -16,15 +16,15 @@ details. You should have received a copy of the GNU General Public License
 along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from src.common.enums import Program
+from src.common.enums import AssetFiles, Program
 
-from src.database.default_ingredient_database import default_ingredients
-from src.database.unencrypted_database        import (IngredientDatabase,
-                                                      MealprepDatabase,
-                                                      RecipeDatabase)
-from src.ui.gui                               import GUI
-from src.ui.screens.get_yes                   import get_yes
-from src.ui.screens.main_menu                 import main_menu
+from src.database.database_executor    import DatabaseExecutor
+from src.database.unencrypted_database import (IngredientDatabase,
+                                               MealprepDatabase,
+                                               RecipeDatabase)
+from src.ui.gui                        import GUI
+from src.ui.screens.get_yes            import get_yes
+from src.ui.screens.main_menu          import main_menu
 
 
 def main() -> None:
@@ -39,18 +39,23 @@ def main() -> None:
 
     gui           = GUI()
     ingredient_db = IngredientDatabase()
-
-    if not ingredient_db.get_list_of_ingredients():
-        if get_yes(gui, 'Welcome', 'Ingredient database is empty. Add default ingredients?', 'No'):
-            default_ingredients.sort(key=lambda i: i.name)
-            for ingredient in default_ingredients:
-                ingredient.nv_per_g /= 100.0
-                ingredient_db.insert(ingredient)
-
-    recipe_db   = RecipeDatabase()
-    mealprep_db = MealprepDatabase()
-
-    main_menu(gui, ingredient_db, recipe_db, mealprep_db)
+    ingredient_db.enable_cache()
+
+    # The listings and lookups of the screens run on the executor's thread, so the window
+    # keeps drawing while they run. The screens write through the databases of this thread.
+    with DatabaseExecutor() as executor:
+        if not ingredient_db.has_ingredients():
+            if get_yes(gui, 'Welcome', 'Ingredient database is empty. Add default ingredients?',
+                       'No'):
+                gui.wait_for(executor.proxy(IngredientDatabase).copy_entries_from(
+                    AssetFiles.DEFAULT_INGREDIENTS.value))
+
+        recipe_db   = RecipeDatabase()
+        mealprep_db = MealprepDatabase()
+        recipe_db.enable_cache()
+        mealprep_db.enable_cache()
+
+        main_menu(gui, executor, ingredient_db, recipe_db, mealprep_db)
 
 
 if __name__ == '__main__':
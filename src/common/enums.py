@@ -30,8 +30,9 @@ class Program(Enum):
 @unique
 class AssetFiles(Enum):
     """Paths to assets."""
-    ICON_FILE  = 'Assets/icon.png'
-    BACKGROUND = 'Assets/background.jpg'
+    ICON_FILE           = 'Assets/icon.png'
+    BACKGROUND          = 'Assets/background.jpg'
+    DEFAULT_INGREDIENTS = 'Assets/DefaultIngredients.sqlite3'
 
 
 class CalContent(Enum):
@@ -75,9 +76,12 @@ class DatabaseFileName(Enum):
 @unique
 class DatabaseTableName(Enum):
     """Database table names."""
-    INGREDIENTS = 'Ingredients'
-    RECIPES     = 'Recipes'
-    MEALPREPS   = 'Mealpreps'
+    INGREDIENTS        = 'Ingredients'
+    RECIPES            = 'Recipes'
+    RECIPE_INGREDIENTS = 'RecipeIngredients'
+    MEALPREPS          = 'Mealpreps'
+    TABLE_VERSIONS     = 'TableVersions'
+    SUSPENDED_SYNCS    = 'SuspendedSyncs'
 
 
 class DatabaseTypes(Enum):
@@ -87,6 +91,23 @@ class DatabaseTypes(Enum):
     LIST = 'TEXT'
 
 
+class DatabaseSettings(Enum):
+    """SQLite connection settings of the shared database."""
+    BUSY_TIMEOUT_S = 5.0
+    SYNCHRONOUS    = 'NORMAL'
+    CACHE_SIZE_KIB = 16 * 1024
+    MMAP_SIZE      = 64 * 1024 * 1024
+
+    CACHE_MAX_ENTRIES    = 1024
+    MAX_QUERY_PARAMETERS = 999
+    SEARCH_LIMIT         = 20
+    PAGE_SIZE            = 20
+    SIMILAR_LIMIT        = 10
+
+    MEALPREP_MAX_AGE_DAYS = 4
+    JOURNAL_MAX_RECORDS   = 1000
+
+
 @unique
 class DietType(Enum):
     """Diet types."""
@@ -154,3 +175,13 @@ class DBKeys(Enum):
     DIET_TYPE      = 'diet_type'
     WEIGHT_LOG     = 'weight_log'
     MEAL_LOG       = 'meal_log'
+    JOURNAL        = 'journal'
+
+
+@unique
+class JournalChange(Enum):
+    """Types of the changes recorded into the user's journal."""
+    SET_WEIGHT  = 'set_weight'
+    ADD_MEAL    = 'add_meal'
+    DELETE_MEAL = 'delete_meal'
+    EDIT_MEAL   = 'edit_meal'
@@ -17,6 +17,7 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
 import os
+import struct
 
 from datetime import datetime
 
@@ -58,6 +59,24 @@ def separate_header(bytestring    : bytes,
     return bytestring[:header_length], bytestring[header_length:]
 
 
+def pack_str(string: str) -> bytes:
+    """Encode a string into a UTF-8 bytestring prefixed with its 2-byte length."""
+    encoded = string.encode()
+    return struct.pack('<H', len(encoded)) + encoded
+
+
+def unpack_str(bytestring : bytes,
+               offset     : int
+               ) -> tuple:
+    """Decode a length-prefixed string at the offset.
+
+    Returns the string and the offset of the data that follows it.
+    """
+    length = struct.unpack_from('<H', bytestring, offset)[0]
+    start  = offset + 2
+    return bytestring[start:start + length].decode(), start + length
+
+
 def get_today_str() -> str:
     """Get today's date in string format."""
     return datetime.today().strftime(Format.DATETIME_DATE.value)
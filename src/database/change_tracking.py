@@ -0,0 +1,127 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import sqlite3
+
+from contextlib import contextmanager
+from typing     import Callable, Iterator
+
+from src.database.sql_queries import SQLQueries
+
+
+class ChangeTrackingMixin:
+    """ChangeTrackingMixin tracks the version of a database table.
+
+    The version is bumped by triggers of the table, so changes made by
+    any connection are seen. The database class provides the cursor,
+    the statements and the cache that is cleared on outside changes.
+    """
+
+    table_name  : str
+    queries     : SQLQueries
+    cursor      : sqlite3.Cursor
+    clear_cache : Callable[[], None]
+
+    def __init__(self) -> None:
+        """Start tracking from the current versions of the table.
+
+        The table and its version counter must already exist, so the
+        database class calls this after it has created the table.
+        """
+        self.subscribers   = []  # type: list[Callable[[str, int], None]]
+        self.known_version = self.get_version()
+        self.data_version  = self.get_data_version()
+
+    def create_version_counter(self) -> None:
+        """Create the version counter of the table, and the triggers that bump it."""
+        self.cursor.execute(self.queries.create_suspension_table)
+        self.cursor.execute(self.queries.create_version_table)
+        self.cursor.execute(self.queries.insert_version, (self.table_name,))
+        for sql_command in self.queries.create_version_sync:
+            self.cursor.execute(sql_command)
+
+    def get_version(self) -> int:
+        """Get the version of the table.
+
+        The version is a counter in the database file that the triggers of
+        the table bump in the same transaction as each changed row, so
+        every connection, including those of other processes, sees it
+        change when the table is changed.
+        """
+        return self.cursor.execute(self.queries.select_version, (self.table_name,)).fetchone()[0]
+
+    def get_data_version(self) -> int:
+        """Get the data version that changes when another connection commits to the file."""
+        return self.cursor.execute('PRAGMA data_version').fetchone()[0]
+
+    def subscribe(self, callback: Callable[[str, int], None]) -> None:
+        """Call `callback(table name, version)` when poll_version() sees the table changed."""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, int], None]) -> None:
+        """Stop calling the callback on changes."""
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def poll_version(self) -> int:
+        """Get the version of the table, and notify the subscribers if it changed.
+
+        Changes made through this object keep the cache up to date. When
+        the table was changed by another connection, the cached entities
+        may be stale, so the cache is cleared before the subscribers are
+        notified. The check is a single indexed SELECT, so screens can
+        poll it instead of reloading their listings.
+        """
+        version      = self.get_version()
+        data_version = self.get_data_version()
+
+        if data_version != self.data_version:
+            self.data_version = data_version
+            if version != self.known_version:
+                self.clear_cache()
+
+        if version == self.known_version:
+            return version
+
+        self.known_version = version
+        for callback in list(self.subscribers):
+            callback(self.table_name, version)
+        return version
+
+    def validate_cache(self) -> None:
+        """Poll the version of the table if another connection has committed to the file.
+
+        Reading the data version does not touch any table, so the cache
+        checks it before every lookup, and the version of the table is
+        only read after a commit of another connection.
+        """
+        if self.get_data_version() != self.data_version:
+            self.poll_version()
+
+    @contextmanager
+    def suspended_version_sync(self) -> Iterator[None]:
+        """Bump the version of the table once for all rows written in the with-block.
+
+        The triggers are suspended like in suspended_search_sync(), and this
+        must likewise be used inside a transaction.
+        """
+        self.cursor.execute(self.queries.suspend_sync, ('version',))
+        yield
+        self.cursor.execute(self.queries.resume_sync, ('version',))
+        self.cursor.execute(self.queries.bump_version)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sqlite3
+
+from typing import Optional
+
+from src.common.enums      import DatabaseSettings
+from src.common.exceptions import CriticalError
+
+synchronous_modes = ['OFF', 'NORMAL', 'FULL', 'EXTRA']
+
+
+class ConnectionManager:
+    """ConnectionManager owns the SQLite connection to a database file.
+
+    The database classes that store their tables in the same file share the
+    connection of its manager. The connection is opened in autocommit mode
+    and with WAL journaling, so other processes can keep reading the database
+    while one of them writes to it. Lock contention is waited out with a busy
+    timeout instead of failing with "database is locked".
+    """
+
+    managers : dict = {}
+
+    def __init__(self,
+                 path_to_db     : str,
+                 busy_timeout_s : float = DatabaseSettings.BUSY_TIMEOUT_S.value,
+                 synchronous    : str   = DatabaseSettings.SYNCHRONOUS.value,
+                 cache_size_kib : int   = DatabaseSettings.CACHE_SIZE_KIB.value,
+                 mmap_size      : int   = DatabaseSettings.MMAP_SIZE.value
+                 ) -> None:
+        """Create new ConnectionManager object."""
+        self.path_to_db  = path_to_db
+        self.is_migrated = False
+        self.connection  = sqlite3.connect(path_to_db,
+                                           timeout=busy_timeout_s,
+                                           isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.configure(synchronous, cache_size_kib, mmap_size)
+
+    @classmethod
+    def get_manager(cls, path_to_db: str) -> 'ConnectionManager':
+        """Get the shared ConnectionManager of the database file.
+
+        The manager is created with default settings on first use.
+        """
+        path_to_db = os.path.abspath(path_to_db)
+        if path_to_db not in cls.managers:
+            cls.managers[path_to_db] = cls(path_to_db)
+        return cls.managers[path_to_db]
+
+    def configure(self,
+                  synchronous    : Optional[str] = None,
+                  cache_size_kib : Optional[int] = None,
+                  mmap_size      : Optional[int] = None
+                  ) -> None:
+        """Tune the connection's performance-related pragmas.
+
+        Settings that are left to None are not changed.
+        """
+        if synchronous is not None:
+            if synchronous.upper() not in synchronous_modes:
+                raise CriticalError(f"Invalid synchronous mode '{synchronous}'.")
+            self.connection.execute(f'PRAGMA synchronous = {synchronous.upper()}')
+
+        # Negative cache size is in KiB instead of pages
+        if cache_size_kib is not None:
+            self.connection.execute(f'PRAGMA cache_size = {-abs(int(cache_size_kib))}')
+
+        if mmap_size is not None:
+            self.connection.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+
+    def get_pragma(self, name: str) -> str:
+        """Get the current value of a pragma."""
+        return self.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection and forget the manager."""
+        self.connection.close()
+        if self.managers.get(self.path_to_db) is self:
+            del self.managers[self.path_to_db]
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import functools
+import inspect
+import os
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing             import Any, Callable, Optional
+
+from src.common.enums      import DatabaseFileName, Directories
+from src.common.exceptions import CriticalError
+from src.common.utils      import ensure_dir
+
+from src.database.connection_manager   import ConnectionManager
+from src.database.unencrypted_database import (IngredientDatabase, MealprepDatabase,
+                                               RecipeDatabase, UnencryptedDatabase)
+
+
+class DatabaseExecutor:
+    """DatabaseExecutor runs database calls on a dedicated thread.
+
+    The thread opens its own connection to the database file and creates
+    its own database objects, so the SQLite connection is only ever used
+    by the thread that owns it. The calls are queued and executed one at a
+    time in the order they were submitted, and each returns a Future, so
+    the GUI thread can keep drawing while a slow query or a bulk import
+    runs. The futures can be awaited with `asyncio.wrap_future()`.
+
+    Changes made through the executor are committed by its connection, so
+    the database objects of the GUI thread see them with poll_version().
+    """
+
+    def __init__(self,
+                 database_classes : tuple         = (IngredientDatabase,
+                                                     RecipeDatabase,
+                                                     MealprepDatabase),
+                 path_to_db       : Optional[str] = None
+                 ) -> None:
+        """Create new DatabaseExecutor object."""
+        if path_to_db is None:
+            ensure_dir(Directories.USER_DATA.value)
+            path_to_db = (f'{Directories.USER_DATA.value}/'
+                          f'{DatabaseFileName.SHARED_DATABASE.value}.sqlite3')
+
+        self.path_to_db         = os.path.abspath(path_to_db)
+        self.database_classes   = database_classes
+        self.databases          = {}    # type: dict
+        self.connection_manager = None  # type: Optional[ConnectionManager]
+        self.is_shut_down       = False
+        self.executor           = ThreadPoolExecutor(max_workers=1,
+                                                     thread_name_prefix='DatabaseExecutor',
+                                                     initializer=self.open)
+
+    def __enter__(self) -> 'DatabaseExecutor':
+        """Use the executor as a context manager that shuts it down on exit."""
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        """Shut down the executor."""
+        self.shutdown()
+
+    def open(self) -> None:
+        """Open the connection and create the database objects on the executor's thread."""
+        self.connection_manager = ConnectionManager(self.path_to_db)
+        for database_class in self.database_classes:
+            self.databases[database_class] = database_class(self.connection_manager)
+
+    def close(self) -> None:
+        """Close the connection of the executor's thread."""
+        if self.connection_manager is not None:
+            self.connection_manager.close()
+            self.connection_manager = None
+        self.databases.clear()
+
+    def submit(self,
+               database_class : type,
+               function       : Callable,
+               *args          : Any,
+               **kwargs       : Any
+               ) -> Future:
+        """Call `function(database, *args, **kwargs)` on the executor's thread.
+
+        The `database` is the executor's object of the `database_class`,
+        so the function can be a method of the class, e.g.,
+        `submit(IngredientDatabase, IngredientDatabase.get_ingredient, 'Egg')`.
+        """
+        if database_class not in self.database_classes:
+            raise CriticalError(f"The executor has no {database_class.__name__}.")
+
+        return self.executor.submit(lambda: function(self.databases[database_class],
+                                                     *args, **kwargs))
+
+    def proxy(self, database_class: type) -> 'DatabaseProxy':
+        """Get a proxy whose methods submit the calls of the database to the executor."""
+        return DatabaseProxy(self, database_class)
+
+    def shutdown(self) -> None:
+        """Run the queued calls, close the connection and stop the thread."""
+        if self.is_shut_down:
+            return
+        self.is_shut_down = True
+        self.executor.submit(self.close)
+        self.executor.shutdown(wait=True)
+
+
+class DatabaseProxy:
+    """DatabaseProxy calls the methods of a database on a DatabaseExecutor.
+
+    Each method returns a Future of the method's return value. Methods
+    that return a generator are collected into a list on the executor's
+    thread, as the rows can only be fetched by the thread that owns the
+    connection.
+    """
+
+    def __init__(self,
+                 executor       : DatabaseExecutor,
+                 database_class : type
+                 ) -> None:
+        """Create new DatabaseProxy object."""
+        self.executor       = executor
+        self.database_class = database_class
+
+    def __getattr__(self, name: str) -> Callable[..., Future]:
+        """Get a function that submits the method call to the executor."""
+        method = getattr(self.database_class, name, None)
+
+        if not callable(method) or name.startswith('_'):
+            raise AttributeError(f"{self.database_class.__name__} has no method '{name}'.")
+
+        if inspect.isgeneratorfunction(method):
+            method = self.collect(method)
+
+        return functools.partial(self.executor.submit, self.database_class, method)
+
+    @staticmethod
+    def collect(method: Callable) -> Callable[..., list]:
+        """Wrap a generator method into a function that returns the yielded values as a list."""
+        def collected(database: UnencryptedDatabase, *args: Any, **kwargs: Any) -> list:
+            return list(method(database, *args, **kwargs))
+        return collected
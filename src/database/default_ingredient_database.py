@@ -16,26 +16,66 @@ details. You should have received a copy of the GNU General Public License
 along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from src.entities.ingredient         import Ingredient
-from src.entities.nutritional_values import NutritionalValues
+import os
+
+from src.common.enums                  import AssetFiles
+from src.database.connection_manager   import ConnectionManager
+from src.database.unencrypted_database import IngredientDatabase
+from src.entities.ingredient           import Ingredient
+from src.entities.nutritional_values   import NutritionalValues
 
 # pylint: skip-file
 # Lines are left long to improve readability
 
-default_ingredients = [
-    Ingredient('Blueberry',              NutritionalValues(kcal=64.7,  carbohydrates_g=10.2, sugar_g=8.4,  protein_g=0.8,  fat_g=1.1,  satisfied_fat_g=0.0,  fiber_g=3.3,  salt_g=0.0                                                                            )),
-    Ingredient('Margarin',               NutritionalValues(kcal=515.0, carbohydrates_g=0.3,  sugar_g=0.3,  protein_g=0.2,  fat_g=57.0, satisfied_fat_g=19.0, fiber_g=0.0,  salt_g=0.98                                                                           )),
-    Ingredient('Rye Oatmeal',            NutritionalValues(kcal=369.0, carbohydrates_g=65.2, sugar_g=1.1,  protein_g=8.9,  fat_g=1.6,  satisfied_fat_g=0.2,  fiber_g=14.0, salt_g=0.01                                                                           )),
-    Ingredient('Water',                  NutritionalValues(kcal=0.0,   carbohydrates_g=0.0,  sugar_g=0.0,  protein_g=0.0,  fat_g=0.0,  satisfied_fat_g=0.0,  fiber_g=0.0,  salt_g=0.8                                                                            )),
-    Ingredient('Salt',                   NutritionalValues(kcal=400.0, carbohydrates_g=97.0, sugar_g=0.0,  protein_g=0.0,  fat_g=0.0,  satisfied_fat_g=0.0,  fiber_g=0.0,  salt_g=100.0, iodine_ug=2.5                                                           )),
-    Ingredient('Fat-free Milk',          NutritionalValues(kcal=33.8,  carbohydrates_g=4.9,  sugar_g=4.9,  protein_g=3.1,  fat_g=0.1,  satisfied_fat_g=0.1,  fiber_g=0.0,  salt_g=0.01, vitamin_b2_mg=0.2, vitamin_b12_ug=0.4, vitamin_d_ug=1.0, calcium_mg=120.0)),
-    Ingredient('Butter',                 NutritionalValues(kcal=720.0, carbohydrates_g=1.0,  sugar_g=1.0,  protein_g=1.0,  fat_g=80.0, satisfied_fat_g=54.0, fiber_g=0.0,  salt_g=1.5                                                                            )),
-    Ingredient('Celery',                 NutritionalValues(kcal=12.7,  carbohydrates_g=1.1,  sugar_g=1.1,  protein_g=1.1,  fat_g=0.2,  satisfied_fat_g=0.1,  fiber_g=1.0,  salt_g=0.3                                                                            )),
-    Ingredient('Carrot',                 NutritionalValues(kcal=32.7,  carbohydrates_g=5.6,  sugar_g=5.4,  protein_g=0.6,  fat_g=0.2,  satisfied_fat_g=0.0,  fiber_g=2.6,  salt_g=0.1                                                                            )),
-    Ingredient('Yellow onion',           NutritionalValues(kcal=29.4,  carbohydrates_g=4.8,  sugar_g=4.8,  protein_g=1.3,  fat_g=0.1,  satisfied_fat_g=0.0,  fiber_g=1.7,  salt_g=0.0                                                                            )),
-    Ingredient('Minced pork/cow (23%)',  NutritionalValues(kcal=275.0, carbohydrates_g=0.0,  sugar_g=0.0,  protein_g=17.0, fat_g=23.0, satisfied_fat_g=11.0, fiber_g=0.0,  salt_g=0.15                                                                           )),
-    Ingredient('Bacon',                  NutritionalValues(kcal=317.0, carbohydrates_g=0.0,  sugar_g=0.0,  protein_g=14.0, fat_g=29.0, satisfied_fat_g=11.0, fiber_g=0.0,  salt_g=2.2                                                                            )),
-    Ingredient('Tomato pyre' ,           NutritionalValues(kcal=145.0, carbohydrates_g=25.8, sugar_g=17.0, protein_g=5.9,  fat_g=0.7,  satisfied_fat_g=0.0,  fiber_g=0.0,  salt_g=1.0                                                                            )),
-    Ingredient('Parmesan',               NutritionalValues(kcal=402.0, carbohydrates_g=0.0,  sugar_g=0.0,  protein_g=32.0, fat_g=30.0, satisfied_fat_g=20.0, fiber_g=0.0,  salt_g=1.6                                                                            )),
-    Ingredient('Pasta (full-grain)',     NutritionalValues(kcal=348.0, carbohydrates_g=65.8, sugar_g=2.8,  protein_g=14.0, fat_g=1.9,  satisfied_fat_g=0.4,  fiber_g=6.2,  salt_g=0.01                                                                           )),
-]
+
+def build_default_ingredient_database(path_to_db: str = AssetFiles.DEFAULT_INGREDIENTS.value
+                                      ) -> None:
+    """Build the prebuilt default ingredient database file.
+
+    The ingredients are sorted by name and their nutritional values are
+    normalized per gram, so on first start the file can be copied into the
+    shared database as is with IngredientDatabase.copy_entries_from().
+    """
+    if os.path.isfile(path_to_db):
+        os.remove(path_to_db)
+
+    ingredients = sorted(get_default_ingredients(), key=lambda i: i.name)
+    for ingredient in ingredients:
+        ingredient.nv_per_g /= 100.0
+
+    manager = ConnectionManager(path_to_db)
+    IngredientDatabase(manager).insert_many(ingredients)
+
+    # The file is shipped read-only, so it must not depend on a WAL file
+    manager.connection.execute('PRAGMA journal_mode = DELETE')
+    manager.connection.execute('VACUUM')
+    manager.close()
+
+
+def get_default_ingredients() -> list:
+    """Get the default ingredients with nutritional values per 100 g.
+
+    The ingredients are only built when the default ingredient database
+    is rebuilt, so importing this module does not allocate them.
+    """
+    return [
+        Ingredient('Blueberry',              NutritionalValues(kcal=64.7,  carbohydrates_g=10.2, sugar_g=8.4,  protein_g=0.8,  fat_g=1.1,  satisfied_fat_g=0.0,  fiber_g=3.3,  salt_g=0.0                                                                            )),
+        Ingredient('Margarin',               NutritionalValues(kcal=515.0, carbohydrates_g=0.3,  sugar_g=0.3,  protein_g=0.2,  fat_g=57.0, satisfied_fat_g=19.0, fiber_g=0.0,  salt_g=0.98                                                                           )),
+        Ingredient('Rye Oatmeal',            NutritionalValues(kcal=369.0, carbohydrates_g=65.2, sugar_g=1.1,  protein_g=8.9,  fat_g=1.6,  satisfied_fat_g=0.2,  fiber_g=14.0, salt_g=0.01                                                                           )),
+        Ingredient('Water',                  NutritionalValues(kcal=0.0,   carbohydrates_g=0.0,  sugar_g=0.0,  protein_g=0.0,  fat_g=0.0,  satisfied_fat_g=0.0,  fiber_g=0.0,  salt_g=0.8                                                                            )),
+        Ingredient('Salt',                   NutritionalValues(kcal=400.0, carbohydrates_g=97.0, sugar_g=0.0,  protein_g=0.0,  fat_g=0.0,  satisfied_fat_g=0.0,  fiber_g=0.0,  salt_g=100.0, iodine_ug=2.5                                                           )),
+        Ingredient('Fat-free Milk',          NutritionalValues(kcal=33.8,  carbohydrates_g=4.9,  sugar_g=4.9,  protein_g=3.1,  fat_g=0.1,  satisfied_fat_g=0.1,  fiber_g=0.0,  salt_g=0.01, vitamin_b2_mg=0.2, vitamin_b12_ug=0.4, vitamin_d_ug=1.0, calcium_mg=120.0)),
+        Ingredient('Butter',                 NutritionalValues(kcal=720.0, carbohydrates_g=1.0,  sugar_g=1.0,  protein_g=1.0,  fat_g=80.0, satisfied_fat_g=54.0, fiber_g=0.0,  salt_g=1.5                                                                            )),
+        Ingredient('Celery',                 NutritionalValues(kcal=12.7,  carbohydrates_g=1.1,  sugar_g=1.1,  protein_g=1.1,  fat_g=0.2,  satisfied_fat_g=0.1,  fiber_g=1.0,  salt_g=0.3                                                                            )),
+        Ingredient('Carrot',                 NutritionalValues(kcal=32.7,  carbohydrates_g=5.6,  sugar_g=5.4,  protein_g=0.6,  fat_g=0.2,  satisfied_fat_g=0.0,  fiber_g=2.6,  salt_g=0.1                                                                            )),
+        Ingredient('Yellow onion',           NutritionalValues(kcal=29.4,  carbohydrates_g=4.8,  sugar_g=4.8,  protein_g=1.3,  fat_g=0.1,  satisfied_fat_g=0.0,  fiber_g=1.7,  salt_g=0.0                                                                            )),
+        Ingredient('Minced pork/cow (23%)',  NutritionalValues(kcal=275.0, carbohydrates_g=0.0,  sugar_g=0.0,  protein_g=17.0, fat_g=23.0, satisfied_fat_g=11.0, fiber_g=0.0,  salt_g=0.15                                                                           )),
+        Ingredient('Bacon',                  NutritionalValues(kcal=317.0, carbohydrates_g=0.0,  sugar_g=0.0,  protein_g=14.0, fat_g=29.0, satisfied_fat_g=11.0, fiber_g=0.0,  salt_g=2.2                                                                            )),
+        Ingredient('Tomato pyre' ,           NutritionalValues(kcal=145.0, carbohydrates_g=25.8, sugar_g=17.0, protein_g=5.9,  fat_g=0.7,  satisfied_fat_g=0.0,  fiber_g=0.0,  salt_g=1.0                                                                            )),
+        Ingredient('Parmesan',               NutritionalValues(kcal=402.0, carbohydrates_g=0.0,  sugar_g=0.0,  protein_g=32.0, fat_g=30.0, satisfied_fat_g=20.0, fiber_g=0.0,  salt_g=1.6                                                                            )),
+        Ingredient('Pasta (full-grain)',     NutritionalValues(kcal=348.0, carbohydrates_g=65.8, sugar_g=2.8,  protein_g=14.0, fat_g=1.9,  satisfied_fat_g=0.4,  fiber_g=6.2,  salt_g=0.01                                                                           )),
+    ]
+
+
+if __name__ == '__main__':
+    build_default_ingredient_database()
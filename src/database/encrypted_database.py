@@ -16,32 +16,175 @@ details. You should have received a copy of the GNU General Public License
 along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import hashlib
+import os
 import typing
 
-from src.common.enums import DatabaseFileName, Directories
-from src.common.utils import write_bytes
+from typing import Optional
+
+from src.common.enums      import DatabaseFileName, Directories
+from src.common.exceptions import CriticalError
+from src.common.utils      import write_bytes
 
 if typing.TYPE_CHECKING:
     from src.entities.user_credentials import UserCredentials
 
+JOURNAL_HEADER_LENGTH = 32
+RECORD_LENGTH_BYTES   = 4
+
 
 class EncryptedDatabase:
-    """EncryptedDatabase contains JSON-format data, that is transparently encrypted."""
+    """EncryptedDatabase contains JSON-format data, that is transparently encrypted.
+
+    The data is stored as an encrypted snapshot, and the changes made after
+    it as records appended to a journal next to it, so recording a change
+    costs the same regardless of the size of the snapshot. Each record is
+    encrypted separately, and bound to the snapshot and to its position in
+    the journal as associated data, so records cannot be reordered, or
+    moved between journals. Storing a new snapshot starts a new journal.
+
+    Data that is not needed with the snapshot can be stored into named
+    partitions next to it. Each partition is encrypted separately, and
+    bound to its name, so it can be loaded without the other partitions.
+    """
 
     def __init__(self, credentials: 'UserCredentials') -> None:
         """Create new EncryptedDatabase object."""
-        self.credentials = credentials
-        self.path_to_db  = (f'{Directories.USER_DATA.value}'
-                            f'/{self.credentials.get_username()}'
-                            f'/{DatabaseFileName.USER_DATABASE.value}.db')
+        self.credentials     = credentials
+        self.path_to_db      = (f'{Directories.USER_DATA.value}'
+                                f'/{self.credentials.get_username()}'
+                                f'/{DatabaseFileName.USER_DATABASE.value}.db')
+        self.path_to_journal = f'{self.path_to_db[:-len(".db")]}.journal'
+
+        self.journal_header  = b''  # Digest of the snapshot the journal applies to
+        self.journal_records = 0
+        self.journal_length  = 0
 
     def store_db(self, data: bytes) -> None:
-        """Store the data into encrypted database."""
+        """Store the data into encrypted database, and start a new journal.
+
+        The snapshot is written into a temporary file that then replaces the
+        old snapshot, so a crash leaves either the old or the new snapshot.
+        A journal that was left behind by a crash belongs to the old
+        snapshot, so it is discarded when the database is loaded.
+        """
         ciphertext = self.credentials.encrypt(data)
-        write_bytes(self.path_to_db, ciphertext)
+        self.replace_file(self.path_to_db, ciphertext)
+        self.start_journal(ciphertext)
+
+    @staticmethod
+    def replace_file(path_to_file: str, data: bytes) -> None:
+        """Write the data into a temporary file that then replaces the file."""
+        write_bytes(f'{path_to_file}.tmp', data)
+        os.replace(f'{path_to_file}.tmp', path_to_file)
 
     def load_db(self) -> bytes:
         """Authenticate, decrypt and return database plaintext bytes."""
         with open(self.path_to_db, 'rb') as f_ptr:
             database_ct = f_ptr.read()
-        return self.credentials.decrypt(database_ct)
+
+        plaintext           = self.credentials.decrypt(database_ct)
+        self.journal_header = self.get_digest(database_ct)
+        return plaintext
+
+    def get_partition_path(self, name: str) -> str:
+        """Get the path to the file of the partition."""
+        return f'{self.path_to_db[:-len(".db")]}.{name}.db'
+
+    def store_partition(self, name: str, data: bytes) -> None:
+        """Store the data into the encrypted partition."""
+        self.replace_file(self.get_partition_path(name),
+                          self.credentials.encrypt(data, name.encode()))
+
+    def load_partition(self, name: str) -> Optional[bytes]:
+        """Authenticate, decrypt and return the partition, or None if it does not exist."""
+        path_to_partition = self.get_partition_path(name)
+        if not os.path.isfile(path_to_partition):
+            return None
+
+        with open(path_to_partition, 'rb') as f_ptr:
+            partition_ct = f_ptr.read()
+        return self.credentials.decrypt(partition_ct, name.encode())
+
+    def list_partitions(self) -> list:
+        """Get the sorted list of the names of the stored partitions."""
+        directory, file_name = os.path.split(self.path_to_db)
+        prefix = f'{file_name[:-len(".db")]}.'
+
+        if not os.path.isdir(directory):
+            return []
+
+        return sorted(f[len(prefix):-len('.db')] for f in os.listdir(directory)
+                      if f.startswith(prefix) and f.endswith('.db') and f != file_name)
+
+    @staticmethod
+    def get_digest(ciphertext: bytes) -> bytes:
+        """Get the digest that identifies the snapshot."""
+        return hashlib.blake2b(ciphertext, digest_size=JOURNAL_HEADER_LENGTH).digest()
+
+    def start_journal(self, ciphertext: bytes) -> None:
+        """Start an empty journal for the snapshot."""
+        self.journal_header  = self.get_digest(ciphertext)
+        self.journal_records = 0
+        self.journal_length  = JOURNAL_HEADER_LENGTH
+        write_bytes(self.path_to_journal, self.journal_header)
+
+    def get_associated_data(self, record_number: int) -> bytes:
+        """Get the associated data that binds the record to the snapshot and its position."""
+        return self.journal_header + record_number.to_bytes(8, 'big')
+
+    def append(self, record: bytes) -> None:
+        """Encrypt the record and append it to the journal."""
+        if not self.journal_length:
+            raise CriticalError("The journal must be started or loaded before appending to it.")
+
+        ciphertext = self.credentials.encrypt(record,
+                                              self.get_associated_data(self.journal_records))
+        entry      = len(ciphertext).to_bytes(RECORD_LENGTH_BYTES, 'big') + ciphertext
+
+        # Truncating removes the rest of a record that was only partially written
+        with open(self.path_to_journal, 'r+b') as f_ptr:
+            f_ptr.seek(self.journal_length)
+            f_ptr.write(entry)
+            f_ptr.truncate()
+            f_ptr.flush()
+            os.fsync(f_ptr)
+
+        self.journal_records += 1
+        self.journal_length  += len(entry)
+
+    def load_journal(self) -> list:
+        """Authenticate, decrypt and return the records of the loaded snapshot's journal.
+
+        A journal that belongs to another snapshot is replaced with a new
+        one. A record that was only partially written when the program
+        was interrupted is ignored, and overwritten by the next record.
+        """
+        if not self.journal_header:
+            raise CriticalError("The database must be loaded before its journal.")
+
+        journal = b''
+        if os.path.isfile(self.path_to_journal):
+            with open(self.path_to_journal, 'rb') as f_ptr:
+                journal = f_ptr.read()
+
+        if journal[:JOURNAL_HEADER_LENGTH] != self.journal_header:
+            write_bytes(self.path_to_journal, self.journal_header)
+            journal = self.journal_header
+
+        records = []  # type: list
+        offset  = JOURNAL_HEADER_LENGTH
+
+        while offset + RECORD_LENGTH_BYTES <= len(journal):
+            length = int.from_bytes(journal[offset:offset + RECORD_LENGTH_BYTES], 'big')
+            start  = offset + RECORD_LENGTH_BYTES
+            if start + length > len(journal):
+                break
+
+            records.append(self.credentials.decrypt(journal[start:start + length],
+                                                    self.get_associated_data(len(records))))
+            offset = start + length
+
+        self.journal_records = len(records)
+        self.journal_length  = offset
+        return records
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections import OrderedDict
+from typing      import Any, Callable, Optional
+
+from src.common.enums import DatabaseSettings
+
+
+class EntityCache:
+    """EntityCache holds built entities of a database table by their key.
+
+    The cache is bounded: when it is full, the least recently used entity
+    is evicted. The hit and miss counters tell how many lookups the cache
+    served without a query to the database.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        """Create new EntityCache object."""
+        self.max_entries = max_entries
+        self.entities    = OrderedDict()  # type: OrderedDict
+        self.hits        = 0
+        self.misses      = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached entities."""
+        return len(self.entities)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """Get cached entity by its key, or None if it is not cached."""
+        try:
+            entity = self.entities[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.entities.move_to_end(key)
+        self.hits += 1
+        return entity
+
+    def put(self, key: tuple, entity: Any) -> None:
+        """Add or update entity in the cache."""
+        self.entities[key] = entity
+        self.entities.move_to_end(key)
+
+        while len(self.entities) > self.max_entries:
+            self.entities.popitem(last=False)
+
+    def invalidate(self, key: tuple) -> None:
+        """Remove entity from the cache."""
+        self.entities.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entities from the cache."""
+        self.entities.clear()
+
+
+class EntityCacheMixin:
+    """EntityCacheMixin adds the optional entity cache to a database table.
+
+    The database class provides the key columns of the table and the
+    conversions between entities and rows.
+    """
+
+    key_columns    : tuple
+    to_row         : Callable[[Any], tuple]
+    from_row       : Callable[[tuple], Any]
+    validate_cache : Callable[[], None]
+    cache          : Optional[EntityCache] = None
+
+    def enable_cache(self, max_entries: int = DatabaseSettings.CACHE_MAX_ENTRIES.value) -> None:
+        """Keep up to `max_entries` most recently used entities in memory.
+
+        The cache is write-through: inserts and replacements store the new
+        entity in the cache, and removals drop it, so repeated lookups of
+        the same entity cost no SQL. The entities are rebuilt from their
+        row before they are cached, so they never alias the caller's object.
+        """
+        self.cache = EntityCache(max_entries)
+
+    def get_cached(self, key_values: tuple) -> Optional[Any]:
+        """Get entity from the cache, or None if it is not cached.
+
+        The cache is validated first, so entities changed by another
+        connection, e.g., that of the DatabaseExecutor, are not served.
+        """
+        if self.cache is None:
+            return None
+        self.validate_cache()
+        return self.cache.get(key_values)
+
+    def cache_entity(self, entity: Any, key_values: Optional[tuple] = None) -> None:
+        """Store entity built from the database in the cache."""
+        if self.cache is None:
+            return
+        if key_values is None:
+            key_values = tuple(getattr(entity, column) for column in self.key_columns)
+        self.cache.put(key_values, entity)
+
+    def cache_written(self, obj: Any) -> None:
+        """Store the database version of a written object in the cache."""
+        if self.cache is not None:
+            self.cache_entity(self.from_row(self.to_row(obj)))
+
+    def uncache_entity(self, key_values: tuple) -> None:
+        """Remove entity from the cache."""
+        if self.cache is not None:
+            self.cache.invalidate(key_values)
+
+    def clear_cache(self) -> None:
+        """Remove all entities from the cache."""
+        if self.cache is not None:
+            self.cache.clear()
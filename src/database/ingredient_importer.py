@@ -0,0 +1,290 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import csv
+import json
+import math
+import re
+
+from typing import Callable, Iterable, Iterator, Optional
+
+from src.common.conversion             import str_to_float
+from src.common.exceptions             import ConversionError, CriticalError, ValidationError
+from src.common.validation             import validate_str
+from src.database.unencrypted_database import IngredientDatabase
+from src.entities.ingredient           import Ingredient
+from src.entities.nutritional_values   import NutritionalValues, nv_metadata
+
+# Source unit     multiplier_to_grams (kcal per kcal for energy units)
+mass_units   = {'g': 1, 'mg': 1_000, 'ug': 1_000_000}
+energy_units = {'kcal': 1, 'kJ': 4.184}
+
+JSON_CHUNK_SIZE      = 64 * 1024
+JSON_MAX_RECORD_SIZE = 16 * 1024 * 1024
+
+# The separators between the objects of the array, and the characters that end a JSON token
+json_separators = re.compile(r'[ \t\r\n,]*')
+json_delimiters = re.compile(r'[ \t\r\n,:\[\]{}"]')
+
+
+class IngredientImporter:
+    """IngredientImporter imports ingredients from food composition tables.
+
+    The source file is streamed one record at a time, and each record is
+    mapped into an Ingredient with the column map. The column map is a
+    dictionary {source column: (nv_metadata key, source unit)}, where the
+    source unit is one of the mass units, or for the 'kcal' key, one of
+    the energy units. The values of the source are per `per_grams` grams
+    of the food, and they are converted into the per-gram values stored
+    in the IngredientDatabase.
+    """
+
+    def __init__(self,
+                 name_column   : str,
+                 column_map    : dict,
+                 per_grams     : float = 100.0,
+                 decimal_comma : bool  = False
+                 ) -> None:
+        """Create new IngredientImporter object."""
+        self.name_column   = name_column
+        self.decimal_comma = decimal_comma
+        self.skipped       = 0
+        self.factors       = {}  # type: dict
+
+        if per_grams <= 0.0:
+            raise CriticalError(f"Invalid per grams value {per_grams}.")
+
+        for column, (key, unit) in column_map.items():
+            if key not in nv_metadata:
+                raise CriticalError(f"Unknown nutritional value '{key}' for column '{column}'.")
+
+            units = energy_units if key == 'kcal' else mass_units
+            if unit not in units:
+                raise CriticalError(f"Invalid unit '{unit}' for nutritional value '{key}'.")
+
+            self.factors[column] = (key, nv_metadata[key][3] / (units[unit] * per_grams))
+
+    @staticmethod
+    def read_csv(path_to_file: str, delimiter: str = ',') -> Iterator[dict]:
+        """Stream records of a CSV file with a header row."""
+        with open(path_to_file, newline='', encoding='utf-8-sig') as f:
+            yield from csv.DictReader(f, delimiter=delimiter)
+
+    @staticmethod
+    def read_json(path_to_file: str) -> Iterator[dict]:
+        """Stream records of a JSON file that contains an array of objects.
+
+        The file is read in chunks and each object is decoded as soon as
+        it is complete, so the whole array is never held in memory. An
+        object larger than JSON_MAX_RECORD_SIZE characters is rejected.
+        """
+        decoder = json.JSONDecoder()
+        buffer  = ''
+        offset  = 0
+        started = False
+
+        with open(path_to_file, encoding='utf-8-sig') as f:
+            while chunk := f.read(JSON_CHUNK_SIZE):
+                buffer = buffer[offset:] + chunk
+                offset = 0
+
+                if not started:
+                    offset  = IngredientImporter.find_array_start(buffer)
+                    started = offset > 0
+                    if not started:
+                        continue
+
+                records = []  # type: list
+                offset  = IngredientImporter.decode_records(decoder, buffer, offset, records)
+                yield from records
+
+                if len(buffer) - offset > JSON_MAX_RECORD_SIZE:
+                    raise ConversionError(f"A record of the JSON file is longer than "
+                                          f"{JSON_MAX_RECORD_SIZE} characters.")
+
+        if buffer[offset:].strip(' \t\r\n,') not in ('', ']'):
+            raise ConversionError("The JSON file ended in the middle of an object.")
+
+    @staticmethod
+    def find_array_start(buffer: str) -> int:
+        """Return the offset after the '[' that opens the array.
+
+        Returns 0 if the buffer only contains whitespace, in which case the
+        array starts in a later chunk.
+        """
+        content = buffer.lstrip()
+        if not content:
+            return 0
+        if not content.startswith('['):
+            raise ConversionError("Expected the JSON file to contain an array.")
+        return len(buffer) - len(content) + 1
+
+    @staticmethod
+    def decode_records(decoder : json.JSONDecoder,
+                       buffer  : str,
+                       offset  : int,
+                       records : list
+                       ) -> int:
+        """Decode the complete objects of the buffer, starting at offset, into records.
+
+        The buffer is not sliced between the objects, so decoding a chunk
+        is linear in its length. Returns the offset of the first object
+        that continues in the next chunk, or of the end of the array.
+        """
+        while True:
+            offset = json_separators.match(buffer, offset).end()  # type: ignore
+            if offset == len(buffer) or buffer[offset] == ']':
+                return offset
+
+            decoded = IngredientImporter.decode_record(decoder, buffer, offset)
+            if decoded is None:
+                return offset
+
+            record, offset = decoded
+            records.append(record)
+
+    @staticmethod
+    def decode_record(decoder: json.JSONDecoder, buffer: str, offset: int) -> Optional[tuple]:
+        """Decode the JSON object that starts at offset of the buffer.
+
+        Returns the object and the offset after it, or None if the object
+        is truncated by the end of the buffer. An error before the last
+        token of the buffer can not be fixed by the next chunk, so it
+        raises ConversionError instead of waiting for the rest of the file.
+        """
+        try:
+            return decoder.raw_decode(buffer, offset)
+        except json.JSONDecodeError as error:
+            if (error.msg.startswith('Unterminated string')
+                    or json_delimiters.search(buffer, error.pos) is None):
+                return None
+            raise ConversionError(f"Invalid JSON object: {error.msg}.") from error
+
+    def read_file(self, path_to_file: str, delimiter: str = ',') -> Iterator[dict]:
+        """Stream records of a CSV or JSON file based on the file extension."""
+        if path_to_file.lower().endswith('.json'):
+            return self.read_json(path_to_file)
+        return self.read_csv(path_to_file, delimiter)
+
+    def to_value(self, column: str, value: object) -> float:
+        """Convert a source value into a float.
+
+        Missing and empty values are interpreted as zero.
+        """
+        if self.decimal_comma and isinstance(value, str):
+            value = value.replace(',', '.')
+
+        # The validation helpers are only called for rejected values, as
+        # calling them for every value of a large file triples the import time.
+        try:
+            conversion = float(value)  # type: ignore
+        except (TypeError, ValueError):
+            if value is None or str(value).strip() == '':
+                return 0.0
+            conversion = -1.0
+
+        if conversion >= 0.0 and math.isfinite(conversion):
+            return conversion
+
+        str_to_float(column, str(value).strip())
+        raise ConversionError(f"'{value}' is not a valid positive decimal number.")
+
+    def to_ingredient(self, record: dict) -> Ingredient:
+        """Map a source record into an Ingredient."""
+        name = record.get(self.name_column) or ''
+        validate_str(self.name_column, name, empty_allowed=False)
+
+        nv_dict = {key: self.to_value(column, record.get(column)) * factor
+                   for column, (key, factor) in self.factors.items()}
+
+        return Ingredient(name.strip(), NutritionalValues(**nv_dict))
+
+    def ingredients(self,
+                    records : Iterable[dict],
+                    on_skip : Optional[Callable[[int, str], None]] = None
+                    ) -> Iterator[Ingredient]:
+        """Map records into Ingredients, skipping the invalid ones.
+
+        For each skipped record, `on_skip` is called with the record's
+        number and the reason it was skipped.
+        """
+        for number, record in enumerate(records, start=1):
+            try:
+                yield self.to_ingredient(record)
+            except (ConversionError, ValidationError) as error:
+                self.skipped += 1
+                if on_skip is not None:
+                    on_skip(number, str(error))
+
+    def import_file(self,
+                    path_to_file  : str,
+                    ingredient_db : IngredientDatabase,
+                    delimiter     : str = ',',
+                    batch_size    : int = 1000,
+                    progress      : Optional[Callable[[int], None]] = None,
+                    on_skip       : Optional[Callable[[int, str], None]] = None
+                    ) -> int:
+        """Import the ingredients of the file into the IngredientDatabase.
+
+        Ingredients that already exist in the database are replaced.
+        Returns the number of imported ingredients.
+        """
+        records = self.read_file(path_to_file, delimiter)
+        return ingredient_db.insert_many(self.ingredients(records, on_skip),
+                                         batch_size=batch_size,
+                                         progress=progress,
+                                         replace=True)
+
+
+def main() -> None:
+    """Import ingredients from the command line.
+
+    Usage: python3 -m src.database.ingredient_importer <source> <mapping>
+
+    The mapping file is a JSON object with the keys
+        name_column:   The column that contains the name of the food
+        columns:       {source column: [nv_metadata key, source unit]}
+        per_grams:     The amount of food the values are for (optional)
+        decimal_comma: True if the values use decimal commas (optional)
+    """
+    parser = argparse.ArgumentParser(description='Import ingredients from a CSV or JSON file.')
+    parser.add_argument('source',  help='CSV or JSON file to import')
+    parser.add_argument('mapping', help='JSON file that maps the columns to nutritional values')
+    parser.add_argument('--delimiter', default=',', help='CSV delimiter (default: ,)')
+    args = parser.parse_args()
+
+    with open(args.mapping, encoding='utf-8') as f:
+        mapping = json.load(f)
+
+    importer = IngredientImporter(mapping['name_column'],
+                                  {column: tuple(value) for column, value
+                                   in mapping['columns'].items()},
+                                  mapping.get('per_grams', 100.0),
+                                  mapping.get('decimal_comma', False))
+
+    imported = importer.import_file(args.source,
+                                    IngredientDatabase(),
+                                    delimiter=args.delimiter,
+                                    on_skip=lambda n, e: print(f'Skipped record {n}: {e}'))
+
+    print(f'Imported {imported} ingredients, skipped {importer.skipped} records.')
+
+
+if __name__ == '__main__':
+    main()
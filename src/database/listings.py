@@ -0,0 +1,132 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import sqlite3
+
+from contextlib import contextmanager
+from typing     import Any, Callable, ContextManager, Iterator, Optional
+
+from src.common.enums      import DatabaseSettings
+from src.common.exceptions import CriticalError
+
+from src.database.sql_queries import SQLQueries
+
+
+class ListingMixin:
+    """ListingMixin lists the entries of a database table a page or a search at a time.
+
+    The database class provides the cursor, the statements, the key
+    columns that order the pages, and the conversion of rows to entities.
+    """
+
+    table_name  : str
+    key_columns : tuple
+    queries     : SQLQueries
+    cursor      : sqlite3.Cursor
+    from_row    : Callable[[tuple], Any]
+    transaction : Callable[[], ContextManager[None]]
+
+    def create_search_index(self) -> None:
+        """Create the full-text search index and the triggers that keep it in sync.
+
+        The index of a table that existed before the index was introduced
+        is built by the build_search_indexes migration.
+        """
+        with self.transaction():
+            self.cursor.execute(self.queries.create_suspension_table)
+            self.cursor.execute(self.queries.create_search_table)
+            for sql_command in self.queries.create_search_sync:
+                self.cursor.execute(sql_command)
+
+    def search(self,
+               prefix : str,
+               limit  : int = DatabaseSettings.SEARCH_LIMIT.value
+               ) -> list:
+        """Get list of at most `limit` entries that best match the search prefix.
+
+        Each word of the prefix matches the beginning of a word in the
+        searched column, e.g., 'min po' matches 'Minced pork/cow (23%)'.
+        An empty prefix returns the first `limit` entries.
+        """
+        words = prefix.split()
+        if not words:
+            rows = self.cursor.execute(self.queries.select_first, (limit,))
+        else:
+            match = ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+            rows  = self.cursor.execute(self.queries.search, (match, limit))
+
+        return [self.from_row(row) for row in rows]
+
+    @contextmanager
+    def suspended_search_sync(self) -> Iterator[None]:
+        """Index the rows inserted in the with-block into the search table at once.
+
+        Indexing the rows one at a time with the trigger is several times
+        slower than indexing them all with one statement. The trigger is
+        suspended with a row of the SuspendedSyncs table instead of being
+        dropped, so the schema, and the prepared statements of the
+        connections, stay valid. Must be used inside a transaction, so
+        other connections never see the trigger suspended.
+        """
+        if not self.queries.search_table:
+            yield
+            return
+
+        max_rowid = self.cursor.execute(self.queries.max_rowid).fetchone()[0]
+        self.cursor.execute(self.queries.suspend_sync, ('search',))
+        yield
+        self.cursor.execute(self.queries.index_new_rows, (max_rowid,))
+        self.cursor.execute(self.queries.resume_sync, ('search',))
+
+    def page(self,
+             after_key : Optional[tuple] = None,
+             limit     : int             = DatabaseSettings.PAGE_SIZE.value,
+             order_by  : tuple           = (),
+             where     : Optional[dict]  = None
+             ) -> tuple:
+        """Get a page of entries in keyset order.
+
+        The entries are ordered by the `order_by` columns, followed by the
+        key columns that make the order unique. The `after_key` is the
+        next key returned with the previous page, or None for the first
+        page. The `where` dictionary limits the entries to those whose
+        columns equal the values.
+
+        Returns the entries of the page, and the key to pass as the
+        `after_key` of the next page, which is None on the last page.
+        """
+        where    = {} if where is None else where
+        order_by = tuple(order_by) + tuple(c for c in self.key_columns if c not in order_by)
+
+        if not order_by:
+            raise CriticalError(f"Table {self.table_name} has no key columns to order pages by.")
+
+        for column in (*order_by, *where):
+            if column not in self.queries.columns:
+                raise CriticalError(f"Unknown column '{column}' in table {self.table_name}.")
+
+        sql_command = self.queries.select_page(order_by, tuple(where), after_key is None)
+        parameters  = (*where.values(), *(after_key or ()), limit + 1)
+        rows        = self.cursor.execute(sql_command, parameters).fetchall()
+
+        next_key = None
+        if len(rows) > limit:
+            rows     = rows[:limit]
+            next_key = tuple(rows[-1][self.queries.columns.index(c)] for c in order_by)
+
+        return [self.from_row(row) for row in rows], next_key
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import hashlib
+import json
+import struct
+
+from typing import Iterable
+
+from src.common.enums      import DBKeys, JournalChange
+from src.common.exceptions import CriticalError
+from src.common.utils      import pack_str, unpack_str
+from src.entities.meal     import Meal, MEAL_FORMAT_VERSION, MEAL_ID_LENGTH
+
+# The version of the binary format of the monthly partitions and journal
+# records. The journal records of version 1 delete meals by their record
+# instead of their ID.
+RECORD_FORMAT_VERSION = 2
+
+change_codes = {JournalChange.SET_WEIGHT.value:  1,
+                JournalChange.ADD_MEAL.value:    2,
+                JournalChange.DELETE_MEAL.value: 3,
+                JournalChange.EDIT_MEAL.value:   4}
+change_types = {code: change_type for change_type, code in change_codes.items()}
+
+
+def is_legacy_record(bytestring: bytes) -> bool:
+    """Return True if the partition or journal record is in the JSON format of older versions."""
+    return bytestring[:1] in (b'{', b'[')
+
+
+def check_version(bytestring: bytes) -> None:
+    """Raise CriticalError if the record is not in a supported format version."""
+    if bytestring[0] not in (1, RECORD_FORMAT_VERSION):
+        raise CriticalError(f"Unknown log record version {bytestring[0]}.")
+
+
+def to_meal_record(serialized_string: str) -> bytes:
+    """Convert a meal serialized in the string format of older versions into a binary record.
+
+    The meal has no ID yet, so it is converted into a record of version 1.
+    """
+    return Meal.from_serialized_string(serialized_string).to_bytes(version=1)
+
+
+def get_legacy_meal_id(record: bytes, occurrence: int) -> str:
+    """Derive the ID of a meal record of an older version from its content.
+
+    The IDs are the same each time the older records are converted, so the
+    journaled changes that refer to the ID are replayed on the same meal.
+    Identical meals of a day get the IDs of their successive occurrences.
+    """
+    return hashlib.blake2b(record + struct.pack('<I', occurrence),
+                           digest_size=MEAL_ID_LENGTH).hexdigest()
+
+
+def upgrade_meal_record(record: bytes, meals: dict) -> bytes:
+    """Give a meal record of an older version the first free ID of the day's {ID: record} meals."""
+    if record[0] == MEAL_FORMAT_VERSION:
+        return record
+
+    meal       = Meal.from_bytes(record)
+    occurrence = 0
+    while (meal_id := get_legacy_meal_id(record, occurrence)) in meals:
+        occurrence += 1
+
+    meal.meal_id = meal_id
+    return meal.to_bytes()
+
+
+def find_legacy_meal_id(record: bytes, meals: dict) -> str:
+    """Find the ID of the first meal of the day's {ID: record} meals with the same content.
+
+    Only the changes journaled by older versions refer to meals by their
+    content, so only they need to scan the meals of the day.
+    """
+    for meal_id, meal_record in meals.items():
+        if Meal.from_bytes(meal_record).to_bytes(version=record[0]) == record:
+            return meal_id
+    raise CriticalError("The deleted meal was not found in the meal log.")
+
+
+def encode_change(change: list) -> bytes:
+    """Encode a [change type, date, value] journal change into a binary record.
+
+    The weight is stored as a float, the deleted meals as their IDs, and
+    the added and edited meals as their binary records.
+    """
+    change_type, date, value = change
+
+    record = struct.pack('<BB', RECORD_FORMAT_VERSION, change_codes[change_type]) + pack_str(date)
+    if change_type == JournalChange.SET_WEIGHT.value:
+        return record + struct.pack('<d', value)
+    if change_type == JournalChange.DELETE_MEAL.value:
+        return record + bytes.fromhex(value)
+    return record + value
+
+
+def decode_change(record: bytes) -> list:
+    """Decode a journal change, and convert the changes of older versions.
+
+    The meals of the changes of older versions are meal records of version
+    1, which get their IDs when the change is applied to the meal log.
+    """
+    if is_legacy_record(record):
+        change_type, date, value = json.loads(record)
+        if change_type != JournalChange.SET_WEIGHT.value:
+            value = to_meal_record(value)
+        return [change_type, date, value]
+
+    check_version(record)
+    if record[1] not in change_types:
+        raise CriticalError(f"Unknown journal change code {record[1]}.")
+
+    change_type  = change_types[record[1]]
+    date, offset = unpack_str(record, 2)
+
+    if change_type == JournalChange.SET_WEIGHT.value:
+        return [change_type, date, struct.unpack_from('<d', record, offset)[0]]
+    if change_type == JournalChange.DELETE_MEAL.value and record[0] > 1:
+        return [change_type, date, record[offset:].hex()]
+    return [change_type, date, record[offset:]]
+
+
+def index_meals(records: Iterable[bytes]) -> dict:
+    """Index the meal records of a day by their meal IDs."""
+    meals = {}  # type: dict
+    for record in records:
+        record = upgrade_meal_record(record, meals)
+        meals[Meal.get_id(record)] = record
+    return meals
+
+
+def encode_partition(partition      : dict,
+                     journal_header : bytes,
+                     included       : int
+                     ) -> bytes:
+    """Encode the weight and meal logs of a month into a binary record.
+
+    The record starts with the header of the journal and the number of
+    its records that the partition includes, followed by the (date, kg)
+    weight entries, and the meal records of each date. The meal log is a
+    dictionary {date: {meal ID: meal record}}.
+    """
+    weight_log = partition[DBKeys.WEIGHT_LOG.value]
+    meal_log   = partition[DBKeys.MEAL_LOG.value]
+
+    fields = [struct.pack('<BB', RECORD_FORMAT_VERSION, len(journal_header)),
+              journal_header,
+              struct.pack('<IH', included, len(weight_log))]
+
+    for date, weight_kg in weight_log.items():
+        fields.append(pack_str(date) + struct.pack('<d', weight_kg))
+
+    fields.append(struct.pack('<H', len(meal_log)))
+    for date, meals in meal_log.items():
+        fields.append(pack_str(date) + struct.pack('<H', len(meals)))
+        for meal in meals.values():
+            fields.append(struct.pack('<I', len(meal)) + meal)
+
+    return b''.join(fields)
+
+
+def decode_legacy_partition(bytestring: bytes) -> tuple:
+    """Decode a monthly partition stored in the JSON format of older versions."""
+    partition         = json.loads(bytestring)
+    journal, included = partition.pop(DBKeys.JOURNAL.value, ['', 0])
+    legacy_log        = partition[DBKeys.MEAL_LOG.value]
+
+    for date, meals in legacy_log.items():
+        legacy_log[date] = index_meals(to_meal_record(meal) for meal in meals)
+
+    return partition, bytes.fromhex(journal), included
+
+
+def decode_weight_log(bytestring: bytes, offset: int) -> tuple:
+    """Decode the weight log at the offset.
+
+    Returns the weight log and the offset of the data that follows it.
+    """
+    no_weights = struct.unpack_from('<H', bytestring, offset)[0]
+    offset    += 2
+
+    weight_log = {}
+    for _ in range(no_weights):
+        date, offset     = unpack_str(bytestring, offset)
+        weight_log[date] = struct.unpack_from('<d', bytestring, offset)[0]
+        offset += 8
+
+    return weight_log, offset
+
+
+def decode_meal_log(bytestring: bytes, offset: int) -> tuple:
+    """Decode the meal log at the offset.
+
+    Returns the meal log and the offset of the data that follows it.
+    """
+    no_dates = struct.unpack_from('<H', bytestring, offset)[0]
+    offset  += 2
+
+    meal_log = {}
+    for _ in range(no_dates):
+        date, offset = unpack_str(bytestring, offset)
+        no_meals     = struct.unpack_from('<H', bytestring, offset)[0]
+        offset      += 2
+
+        records = []
+        for _ in range(no_meals):
+            length = struct.unpack_from('<I', bytestring, offset)[0]
+            records.append(bytestring[offset + 4:offset + 4 + length])
+            offset += 4 + length
+        meal_log[date] = index_meals(records)
+
+    return meal_log, offset
+
+
+def decode_partition(bytestring: bytes) -> tuple:
+    """Decode a monthly partition, and convert the partitions of older versions.
+
+    Returns the partition, the header of the journal, and the number of
+    the journal's records the partition includes.
+    """
+    if is_legacy_record(bytestring):
+        return decode_legacy_partition(bytestring)
+
+    check_version(bytestring)
+    header_length  = bytestring[1]
+    journal_header = bytestring[2:2 + header_length]
+    offset         = 2 + header_length
+
+    included           = struct.unpack_from('<I', bytestring, offset)[0]
+    weight_log, offset = decode_weight_log(bytestring, offset + 4)
+    meal_log, _        = decode_meal_log(bytestring, offset)
+
+    return ({DBKeys.WEIGHT_LOG.value: weight_log, DBKeys.MEAL_LOG.value: meal_log},
+            journal_header, included)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import sqlite3
+
+from collections import ChainMap
+from typing      import Callable, Optional
+
+from src.common.enums      import DatabaseTableName
+from src.common.exceptions import CriticalError
+
+from src.database.connection_manager import ConnectionManager
+from src.database.recipe_links       import RecipeLinksMixin
+from src.database.sql_queries        import SQLQueries, column_type_dict
+
+from src.entities.ingredient         import in_metadata
+from src.entities.mealprep           import mealprep_metadata
+from src.entities.nutritional_values import nv_metadata
+from src.entities.recipe             import recipe_metadata
+
+
+def table_exists(cursor: sqlite3.Cursor, table_name: str) -> bool:
+    """Return True if the table exists in the database."""
+    return bool(cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE type == 'table' AND name == ?)",
+        (table_name,)).fetchone()[0])
+
+
+def add_missing_columns(cursor      : sqlite3.Cursor,
+                        table_name  : str,
+                        db_metadata : dict
+                        ) -> None:
+    """Add the columns of the metadata that are missing from an existing table.
+
+    Adding a column only changes the table's schema, so the rows are not
+    rewritten. Existing rows get zero, or an empty string as the value.
+    """
+    if not table_exists(cursor, table_name):
+        return
+
+    existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table_name})')}
+
+    for column, metadata in db_metadata.items():
+        if column not in existing:
+            data_type = metadata[1]
+            default   = '0.0' if data_type == float else "''"
+            cursor.execute(f'ALTER TABLE {table_name} ADD COLUMN '
+                           f'{column} {column_type_dict[data_type]} DEFAULT {default}')
+
+
+def add_nutrient_columns(cursor: sqlite3.Cursor) -> None:
+    """Add the nutrients missing from Ingredients tables of older versions."""
+    add_missing_columns(cursor,
+                        DatabaseTableName.INGREDIENTS.value,
+                        dict(ChainMap(nv_metadata, in_metadata)))
+
+
+def drop_recipe_mealprep_index(cursor: sqlite3.Cursor) -> None:
+    """Drop the index replaced by the (is_mealprep, name, author) index."""
+    cursor.execute(f'DROP INDEX IF EXISTS {DatabaseTableName.RECIPES.value}_is_mealprep')
+
+
+def add_mealprep_remaining_grams(cursor: sqlite3.Cursor) -> None:
+    """Add the remaining grams to Mealpreps tables of older versions.
+
+    The portions eaten before the column existed are unknown, so the
+    whole batch of each existing mealprep is assumed to remain.
+    """
+    table_name = DatabaseTableName.MEALPREPS.value
+    if not table_exists(cursor, table_name):
+        return
+
+    add_missing_columns(cursor, table_name,
+                        {'remaining_grams': mealprep_metadata['remaining_grams']})
+    cursor.execute(f'UPDATE {table_name} SET remaining_grams = total_grams')
+
+
+def gate_search_insert_triggers(cursor: sqlite3.Cursor) -> None:
+    """Drop the search index insert triggers that can not be suspended.
+
+    The database classes recreate the triggers gated on the search sync,
+    so bulk inserts suspend them without changing the schema.
+    """
+    for table_name in (DatabaseTableName.INGREDIENTS.value, DatabaseTableName.RECIPES.value):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {table_name}Search_insert')
+
+
+def gate_version_triggers(cursor: sqlite3.Cursor) -> None:
+    """Drop the version counter triggers that can not be suspended.
+
+    The database classes recreate the triggers gated on the version sync,
+    so bulk writes suspend them without changing the schema.
+    """
+    for table_name in (DatabaseTableName.INGREDIENTS.value,
+                       DatabaseTableName.RECIPES.value,
+                       DatabaseTableName.MEALPREPS.value):
+        for event in ('insert', 'update', 'delete'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {table_name}_version_{event}')
+
+
+def dedupe_entry_keys(cursor: sqlite3.Cursor) -> None:
+    """Remove the duplicate keys of tables created before the unique key indexes.
+
+    Only the most recently inserted entry of each key is kept, and the
+    unique index of the key is created.
+    """
+    for table_name, db_metadata, key_columns in [
+            (DatabaseTableName.INGREDIENTS.value, dict(ChainMap(nv_metadata, in_metadata)),
+             ('name',)),
+            (DatabaseTableName.RECIPES.value,     recipe_metadata,   ('name', 'author')),
+            (DatabaseTableName.MEALPREPS.value,   mealprep_metadata, ('recipe_name',))]:
+        if table_exists(cursor, table_name):
+            queries = SQLQueries(table_name, db_metadata, key_columns)
+            cursor.execute(queries.dedupe_keys)
+            cursor.execute(queries.create_key_index)
+
+
+def add_recipe_ingredient_links(cursor: sqlite3.Cursor) -> None:
+    """Create the RecipeIngredients table, and link the existing recipes to their ingredients."""
+    table_name = DatabaseTableName.RECIPES.value
+    if not table_exists(cursor, table_name):
+        return
+
+    for sql_command in RecipeLinksMixin.create_links_table:
+        cursor.execute(sql_command)
+
+    recipes = cursor.execute(f'SELECT name, author, ingredient_names, accompaniment_names'
+                             f' FROM {table_name}').fetchall()
+    links   = []  # type: list
+
+    for name, author, in_names, ac_names in recipes:
+        for names, is_accompaniment in [(in_names, False), (ac_names, True)]:
+            if names != 'None':
+                links.extend((name, author, ingredient_name, str(is_accompaniment))
+                             for ingredient_name in names.split('\x1f'))
+
+    cursor.executemany(RecipeLinksMixin.link_queries.insert_new, links)
+
+
+def build_search_indexes(cursor: sqlite3.Cursor) -> None:
+    """Create the full-text search indexes, and build them from the existing entries."""
+    for table_name, db_metadata in [
+            (DatabaseTableName.INGREDIENTS.value, dict(ChainMap(nv_metadata, in_metadata))),
+            (DatabaseTableName.RECIPES.value,     recipe_metadata)]:
+        if table_exists(cursor, table_name):
+            queries = SQLQueries(table_name, db_metadata, search_column='name')
+            cursor.execute(queries.create_suspension_table)
+            cursor.execute(queries.create_search_table)
+            for sql_command in queries.create_search_sync:
+                cursor.execute(sql_command)
+            cursor.execute(queries.rebuild_search_index)
+
+
+# The migrations of the shared database in the order they are applied. The
+# version of the database is the number of migrations that have been applied
+# to it, so new migrations must only ever be appended to the list.
+shared_database_migrations = [
+    add_nutrient_columns,
+    drop_recipe_mealprep_index,
+    add_mealprep_remaining_grams,
+    gate_search_insert_triggers,
+    gate_version_triggers,
+    dedupe_entry_keys,
+    add_recipe_ingredient_links,
+    build_search_indexes,
+]  # type: list[Callable[[sqlite3.Cursor], None]]
+
+
+def apply_migration(cursor    : sqlite3.Cursor,
+                    migration : Callable[[sqlite3.Cursor], None],
+                    version   : int
+                    ) -> int:
+    """Apply the migration from `version` in its own transaction.
+
+    Returns 1 if the migration was applied, and 0 if another process
+    applied it while this one waited for the write lock.
+    """
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        if cursor.execute('PRAGMA user_version').fetchone()[0] != version:
+            cursor.execute('ROLLBACK')
+            return 0
+        migration(cursor)
+        cursor.execute(f'PRAGMA user_version = {version + 1}')
+    except BaseException:
+        cursor.execute('ROLLBACK')
+        raise
+    cursor.execute('COMMIT')
+    return 1
+
+
+def migrate(connection_manager : ConnectionManager,
+            migrations         : Optional[list] = None
+            ) -> int:
+    """Apply the pending migrations to the database.
+
+    Each migration is applied in its own transaction together with the
+    version update, so an interrupted migration is rolled back and it is
+    applied again on the next start. A new database is created with the
+    current layout, so it is only stamped with the latest version. When
+    the database is already current, only its version is read. The
+    `migrations` default to the migrations of the shared database.
+
+    Returns the number of applied migrations.
+    """
+    if connection_manager.is_migrated:
+        return 0
+
+    if migrations is None:
+        migrations = shared_database_migrations
+
+    cursor  = connection_manager.connection.cursor()
+    latest  = len(migrations)
+    applied = 0
+
+    if not cursor.execute('SELECT EXISTS (SELECT 1 FROM sqlite_master)').fetchone()[0]:
+        cursor.execute(f'PRAGMA user_version = {latest}')
+
+    while (version := cursor.execute('PRAGMA user_version').fetchone()[0]) < latest:
+        applied += apply_migration(cursor, migrations[version], version)
+
+    if version > latest:
+        raise CriticalError(f"Database version {version} is newer than the supported {latest}.")
+
+    connection_manager.is_migrated = True
+    return applied
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+class NutrientIndex:
+    """NutrientIndex finds the ingredients with the most similar nutritional values.
+
+    Each ingredient is a vector of its per-gram nutritional values. As the
+    nutrients are measured in different units, the distance is computed
+    over values standardized by the standard deviation of each nutrient
+    in the catalogue.
+
+    The search is a vectorized brute-force scan. Space-partitioning trees
+    such as KD-trees degrade to scanning most of the points with 32
+    dimensions, so they would not be faster. The vectors are kept in a
+    single matrix that grows by doubling, so adding, replacing and removing
+    an ingredient only touches one row.
+    """
+
+    def __init__(self, dimensions: int, capacity: int = 1024) -> None:
+        """Create new NutrientIndex object."""
+        self.vectors   = np.zeros((max(capacity, 1), dimensions))
+        self.names     = []  # type: list
+        self.positions = {}  # type: dict
+
+        # Standardized vectors and their squared norms, built on the first search after a change
+        self.scale  = None  # type: Optional[np.ndarray]
+        self.scaled = None  # type: Optional[np.ndarray]
+        self.norms  = None  # type: Optional[np.ndarray]
+
+    def __len__(self) -> int:
+        """Return the number of indexed ingredients."""
+        return len(self.names)
+
+    @classmethod
+    def from_rows(cls, rows: list, dimensions: int) -> 'NutrientIndex':
+        """Build the index from (name, *values) rows."""
+        index = cls(dimensions, capacity=len(rows))
+        if rows:
+            index.vectors[:len(rows)] = np.array([row[1:] for row in rows], dtype=float)
+            index.names               = [row[0] for row in rows]
+            index.positions           = {name: i for i, name in enumerate(index.names)}
+        return index
+
+    def add(self, name: str, vector: Iterable[float]) -> None:
+        """Add the ingredient to the index, or replace its vector."""
+        position = self.positions.get(name)
+
+        if position is None:
+            position = len(self.names)
+            if position == len(self.vectors):
+                self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+            self.names.append(name)
+            self.positions[name] = position
+
+        self.vectors[position] = list(vector)
+        self.scaled            = None
+
+    def remove(self, name: str) -> None:
+        """Remove the ingredient from the index.
+
+        The last vector is moved into the freed row, so the matrix stays dense.
+        """
+        position = self.positions.pop(name, None)
+        if position is None:
+            return
+
+        last_name = self.names.pop()
+        if last_name != name:
+            self.vectors[position]    = self.vectors[len(self.names)]
+            self.names[position]      = last_name
+            self.positions[last_name] = position
+
+        self.scaled = None
+
+    def standardize(self) -> None:
+        """Standardize the vectors by the standard deviation of each nutrient.
+
+        Nutrients with no variation are left unscaled, they add no distance.
+        """
+        vectors    = self.vectors[:len(self.names)]
+        self.scale = vectors.std(axis=0)
+        self.scale[self.scale == 0.0] = 1.0
+
+        self.scaled = (vectors / self.scale).astype(np.float32)
+        self.norms  = np.einsum('ij,ij->i', self.scaled, self.scaled)
+
+    def nearest(self,
+                vector  : Iterable[float],
+                k       : int,
+                exclude : Iterable[str] = ()
+                ) -> list:
+        """Get the names of the k ingredients nearest to the vector, nearest first."""
+        if not self.names or k <= 0:
+            return []
+
+        if self.scaled is None:
+            self.standardize()
+
+        # |v - q|^2 = |v|^2 - 2 v.q + |q|^2, where |q|^2 is the same for every v
+        exclude   = set(exclude)
+        query     = (np.asarray(list(vector), dtype=float) / self.scale).astype(np.float32)
+        distances = self.norms - 2 * (self.scaled @ query)
+
+        candidates = min(k + len(exclude), len(distances))
+        nearest    = np.argpartition(distances, candidates - 1)[:candidates]
+        nearest    = nearest[np.argsort(distances[nearest])]
+
+        return [name for name in (self.names[i] for i in nearest) if name not in exclude][:k]
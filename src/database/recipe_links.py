@@ -0,0 +1,82 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import sqlite3
+
+from typing import Any, Callable
+
+from src.common.enums      import DatabaseTableName
+from src.common.exceptions import CriticalError
+
+from src.database.sql_queries import SQLQueries
+
+from src.entities.ingredient import Ingredient
+from src.entities.recipe     import Recipe, recipe_ingredient_metadata
+
+
+class RecipeLinksMixin:
+    """RecipeLinksMixin links the recipes to the names of their ingredients.
+
+    The links are kept in the RecipeIngredients table, which is indexed by
+    ingredient name, so the recipes that use an ingredient can be found
+    without loading every recipe. The database class keeps the links in
+    sync with the recipes it writes.
+    """
+
+    links_table  = DatabaseTableName.RECIPE_INGREDIENTS.value
+    link_queries = SQLQueries(links_table,
+                              recipe_ingredient_metadata,
+                              key_columns=tuple(recipe_ingredient_metadata.keys()))
+    delete_links = f'DELETE FROM {links_table} WHERE recipe_name == ? AND author == ?'
+    uses_link    = (f'(name, author) IN (SELECT recipe_name, author FROM {links_table}'
+                    f' WHERE ingredient_name == ?)')
+
+    # The statements that create the table, and the index of ingredient names
+    create_links_table = [link_queries.create_table,
+                          link_queries.create_key_index,
+                          f'CREATE INDEX IF NOT EXISTS {links_table}_ingredient'
+                          f' ON {links_table} (ingredient_name)']
+
+    queries      : SQLQueries
+    cursor       : sqlite3.Cursor
+    from_row     : Callable[[tuple], Any]
+    select_using : str
+
+    @staticmethod
+    def to_link_rows(recipe: Recipe) -> list:
+        """Convert Recipe into rows of the RecipeIngredients table."""
+        rows = []
+        for names, is_accompaniment in [(recipe.ingredient_names,    False),
+                                        (recipe.accompaniment_names, True)]:
+            for name in names:
+                name = name if isinstance(name, str) else name.name
+                rows.append((recipe.name, recipe.author, name, str(is_accompaniment)))
+        return rows
+
+    def insert_links(self, recipes: list) -> None:
+        """Insert the ingredient links of the recipes without committing."""
+        for recipe in recipes:
+            self.cursor.executemany(self.link_queries.insert_new, self.to_link_rows(recipe))
+
+    def get_recipes_using(self, ingredient: Ingredient) -> list:
+        """Get list of recipes that use the ingredient as an ingredient or accompaniment."""
+        if not isinstance(ingredient, Ingredient):
+            raise CriticalError(f"Provided parameter was not an Ingredient but {type(ingredient)} ")
+
+        return [self.from_row(row)
+                for row in self.cursor.execute(self.select_using, (ingredient.name,))]
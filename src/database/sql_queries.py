@@ -0,0 +1,279 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from src.common.enums import DatabaseTableName, DatabaseTypes
+
+
+comparison_operators : dict = {
+    'lt':  '<',
+    'lte': '<=',
+    'gt':  '>',
+    'gte': '>=',
+    'eq':  '==',
+    'ne':  '!=',
+}
+
+column_type_dict : dict = {
+    str   : DatabaseTypes.TEXT.value,
+    float : DatabaseTypes.REAL.value,
+    bool  : DatabaseTypes.TEXT.value,
+    list  : DatabaseTypes.TEXT.value
+}
+
+
+class SQLQueries:  # pylint: disable=too-many-instance-attributes
+    """SQLQueries contains the SQL statements of a database table.
+
+    The statements are built once from the table's metadata. All values are
+    bound as parameters, so each statement text stays constant for the
+    lifetime of the object, and SQLite can reuse the prepared statement from
+    the connection's statement cache.
+    """
+
+    def __init__(self,
+                 table_name  : str,
+                 db_metadata : dict,
+                 key_columns   : tuple = (),
+                 indexes       : tuple = (),
+                 search_column : str   = ''
+                 ) -> None:
+        """Create new SQLQueries object.
+
+        The `indexes` is a tuple of column tuples, for each of which a
+        secondary index is created. If `search_column` is set, the values
+        of that column are indexed into an FTS5 full-text search table.
+        """
+        self.columns = list(db_metadata.keys())
+        self.built   = {}  # type: dict
+
+        self.build_table_queries(table_name, db_metadata, indexes)
+        self.build_suspension_queries(table_name)
+        self.build_version_queries(table_name)
+        self.build_key_queries(table_name, key_columns)
+        self.build_search_queries(table_name, self.columns, search_column)
+
+    def build_table_queries(self,
+                            table_name  : str,
+                            db_metadata : dict,
+                            indexes     : tuple
+                            ) -> None:
+        """Build the statements that create, fill and read the table."""
+        csv    = ', '.join(self.columns)
+        qmarks = ', '.join(len(self.columns) * ['?'])
+        types  = ', '.join(f'{key} {column_type_dict[value[1]]}'
+                           for key, value in db_metadata.items())
+
+        self.create_table = f'CREATE TABLE IF NOT EXISTS {table_name} ({types})'
+        self.insert       = f'INSERT INTO {table_name} ({csv}) VALUES ({qmarks})'
+        self.insert_new   = f'INSERT OR IGNORE INTO {table_name} ({csv}) VALUES ({qmarks})'
+        self.select_all   = f'SELECT {csv} FROM {table_name}'
+        self.select_first = f'{self.select_all} LIMIT ?'
+        self.select_names = f'SELECT {self.columns[0]} FROM {table_name} ORDER BY rowid'
+        self.has_rows     = f'SELECT EXISTS (SELECT 1 FROM {table_name})'
+        self.max_rowid    = f'SELECT COALESCE(MAX(rowid), 0) FROM {table_name}'
+
+        self.attach_source = 'ATTACH DATABASE ? AS source'
+        self.detach_source = 'DETACH DATABASE source'
+        self.copy_source   = (f'INSERT OR IGNORE INTO main.{table_name} ({csv})'
+                              f' SELECT {csv} FROM source.{table_name}')
+
+        self.create_indexes = [f'CREATE INDEX IF NOT EXISTS {table_name}_{"_".join(index)}'
+                               f' ON {table_name} ({", ".join(index)})' for index in indexes]
+
+    def build_suspension_queries(self, table_name: str) -> None:
+        """Build the statements that suspend and resume the syncs of the table.
+
+        A trigger gated on a sync is skipped while the SuspendedSyncs table
+        has a row for the table and the sync.
+        """
+        suspensions = DatabaseTableName.SUSPENDED_SYNCS.value
+
+        self.create_suspension_table = (f'CREATE TABLE IF NOT EXISTS {suspensions}'
+                                        f' (table_name TEXT, sync_name TEXT,'
+                                        f' PRIMARY KEY (table_name, sync_name)) WITHOUT ROWID')
+        self.suspend_sync            = (f'INSERT OR IGNORE INTO {suspensions}'
+                                        f" VALUES ('{table_name}', ?)")
+        self.resume_sync             = (f'DELETE FROM {suspensions}'
+                                        f" WHERE table_name == '{table_name}' AND sync_name == ?")
+
+    @staticmethod
+    def is_synced(table_name: str, sync_name: str) -> str:
+        """Build the condition that the sync of the table is not suspended."""
+        return (f'NOT EXISTS (SELECT 1 FROM {DatabaseTableName.SUSPENDED_SYNCS.value}'
+                f" WHERE table_name == '{table_name}' AND sync_name == '{sync_name}')")
+
+    def build_version_queries(self, table_name: str) -> None:
+        """Build the statements of the table's version counter.
+
+        Every change to the rows bumps the version of the table in the same transaction.
+        """
+        versions = DatabaseTableName.TABLE_VERSIONS.value
+        bump     = (f'UPDATE {versions} SET version = version + 1'
+                    f" WHERE table_name == '{table_name}';")
+
+        self.create_version_table = (f'CREATE TABLE IF NOT EXISTS {versions}'
+                                     f' (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+        self.insert_version       = f'INSERT OR IGNORE INTO {versions} VALUES (?, 0)'
+        self.select_version       = f'SELECT version FROM {versions} WHERE table_name == ?'
+        self.create_version_sync  = [f'CREATE TRIGGER IF NOT EXISTS {table_name}_version_{event}'
+                                     f' AFTER {event.upper()} ON {table_name}'
+                                     f" WHEN {self.is_synced(table_name, 'version')}"
+                                     f' BEGIN {bump} END'
+                                     for event in ('insert', 'update', 'delete')]
+        self.bump_version         = bump.rstrip(';')
+
+    def build_key_queries(self, table_name: str, key_columns: tuple) -> None:
+        """Build the statements that find, delete and upsert rows by their key columns.
+
+        The statements are empty for a table without key columns.
+        """
+        self.create_key_index = ''
+        self.dedupe_keys      = ''
+        self.select_by_key    = ''
+        self.exists           = ''
+        self.delete           = ''
+        self.upsert           = ''
+
+        if not key_columns:
+            return
+
+        key_csv   = ', '.join(key_columns)
+        condition = ' AND '.join(f'{column} == ?' for column in key_columns)
+        updates   = ', '.join(f'{column} = excluded.{column}'
+                              for column in self.columns if column not in key_columns)
+
+        self.create_key_index = (f'CREATE UNIQUE INDEX IF NOT EXISTS {table_name}_key'
+                                 f' ON {table_name} ({key_csv})')
+        self.dedupe_keys      = (f'DELETE FROM {table_name} WHERE rowid NOT IN '
+                                 f'(SELECT MAX(rowid) FROM {table_name} GROUP BY {key_csv})')
+        self.select_by_key    = f'{self.select_all} WHERE {condition}'
+        self.exists           = f'SELECT EXISTS (SELECT 1 FROM {table_name} WHERE {condition})'
+        self.delete           = f'DELETE FROM {table_name} WHERE {condition}'
+        self.upsert           = f'{self.insert} ON CONFLICT ({key_csv}) DO UPDATE SET {updates}'
+
+    def build_search_queries(self,
+                             table_name    : str,
+                             columns       : list,
+                             search_column : str
+                             ) -> None:
+        """Build the statements of the full-text search table.
+
+        The search table is an external-content FTS5 table, i.e., it only
+        stores the index, and it is kept in sync by triggers, so every
+        insert, update and delete on the table updates the index as well.
+        The statements are empty for a table without a search column.
+        """
+        self.search_table         = f'{table_name}Search' if search_column else ''
+        self.create_search_table  = ''
+        self.create_search_sync   = []  # type: list
+        self.rebuild_search_index = ''
+        self.index_new_rows       = ''
+        self.search               = ''
+
+        if not search_column:
+            return
+
+        fts = self.search_table
+        col = search_column
+
+        self.create_search_table = (f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5"
+                                    f"({col}, content='{table_name}', content_rowid='rowid',"
+                                    f" prefix='1 2 3')")
+
+        delete_old = (f"INSERT INTO {fts} ({fts}, rowid, {col})"
+                      f" VALUES ('delete', old.rowid, old.{col});")
+        insert_new = f"INSERT INTO {fts} (rowid, {col}) VALUES (new.rowid, new.{col});"
+
+        self.create_search_sync = [
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table_name}'
+            f" WHEN {self.is_synced(table_name, 'search')} BEGIN {insert_new} END",
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table_name}'
+            f' BEGIN {delete_old} END',
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {col} ON {table_name}'
+            f' BEGIN {delete_old} {insert_new} END',
+        ]
+
+        self.rebuild_search_index = f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"
+
+        # Bulk inserts suspend the insert trigger, and index the new rows with one statement
+        self.index_new_rows = (f'INSERT INTO {fts} (rowid, {col})'
+                               f' SELECT rowid, {col} FROM {table_name} WHERE rowid > ?')
+
+        qualified   = ', '.join(f'{table_name}.{column}' for column in columns)
+        self.search = (f'SELECT {qualified} FROM {fts}'
+                       f' JOIN {table_name} ON {table_name}.rowid == {fts}.rowid'
+                       f' WHERE {fts} MATCH ? ORDER BY {fts}.rank LIMIT ?')
+
+    def select_page(self,
+                    order_by      : tuple,
+                    where_columns : tuple = (),
+                    is_first_page : bool  = False
+                    ) -> str:
+        """Build the statement that selects a page of rows in keyset order.
+
+        The rows that come after the previous page are selected with a row
+        value comparison on the order columns, so with an index on them,
+        the statement seeks directly to the page instead of skipping over
+        the rows of the previous pages as OFFSET would do.
+        """
+        key = ('page', order_by, where_columns, is_first_page)
+        if key not in self.built:
+            conditions = [f'{column} == ?' for column in where_columns]
+            order_csv  = ', '.join(order_by)
+
+            if not is_first_page:
+                conditions.append(f"({order_csv}) > ({', '.join(len(order_by) * ['?'])})")
+
+            where           = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+            self.built[key] = f'{self.select_all}{where} ORDER BY {order_csv} LIMIT ?'
+
+        return self.built[key]
+
+    def select_matching(self,
+                        conditions       : tuple,
+                        order_expression : str,
+                        descending       : bool = False
+                        ) -> str:
+        """Build the statement that selects the rows matching the conditions.
+
+        The `conditions` is a tuple of (column, operator name) pairs, each
+        of which compares the column to a parameter. The rows are ordered
+        by the expression, and then by the first column, in the same
+        direction, so an index on (expression, first column) serves the
+        whole order. Rows for which the expression is NULL, e.g., a ratio
+        whose divisor is zero, are excluded.
+        """
+        key = ('matching', conditions, order_expression, descending)
+        if key not in self.built:
+            where = [f'{column} {comparison_operators[operator]} ?'
+                     for column, operator in conditions]
+            where.append(f'{order_expression} IS NOT NULL')
+
+            direction       = 'DESC' if descending else 'ASC'
+            self.built[key] = (f"{self.select_all} WHERE {' AND '.join(where)}"
+                               f' ORDER BY {order_expression} {direction},'
+                               f' {self.columns[0]} {direction} LIMIT ?')
+
+        return self.built[key]
+
+    def select_in(self, column: str, count: int) -> str:
+        """Build the statement that selects the rows whose column equals one of `count` values."""
+        key = ('in', column, count)
+        if key not in self.built:
+            self.built[key] = f"{self.select_all} WHERE {column} IN ({', '.join(count * ['?'])})"
+        return self.built[key]
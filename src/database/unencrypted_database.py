@@ -17,83 +17,217 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
 import ast
-import sqlite3
+import datetime
+import itertools
 
 from collections import ChainMap
-from typing      import Any
+from contextlib  import contextmanager
+from typing      import Any, Callable, Iterable, Iterator, Optional, TYPE_CHECKING
 
 from src.common.exceptions import CriticalError, IngredientNotFound, RecipeNotFound
-from src.common.enums      import DatabaseFileName, Directories, DatabaseTableName, DatabaseTypes
+from src.common.enums      import (DatabaseFileName, DatabaseSettings, Directories,
+                                   DatabaseTableName)
 from src.common.utils      import ensure_dir
 
+from src.database.change_tracking    import ChangeTrackingMixin
+from src.database.connection_manager import ConnectionManager
+from src.database.entity_cache       import EntityCacheMixin
+from src.database.listings           import ListingMixin
+from src.database.migrations         import migrate
+from src.database.recipe_links       import RecipeLinksMixin
+from src.database.sql_queries        import SQLQueries, comparison_operators
+
 from src.entities.ingredient         import Ingredient, in_metadata
 from src.entities.mealprep           import Mealprep, mealprep_metadata
 from src.entities.nutritional_values import nv_metadata, NutritionalValues
 from src.entities.recipe             import Recipe, recipe_metadata
 
-column_type_dict : dict = {
-    str   : DatabaseTypes.TEXT.value,
-    float : DatabaseTypes.REAL.value,
-    bool  : DatabaseTypes.TEXT.value,
-    list  : DatabaseTypes.TEXT.value
-}
+if TYPE_CHECKING:
+    from src.database.nutrient_index import NutrientIndex
 
 
-class UnencryptedDatabase:
+class UnencryptedDatabase(EntityCacheMixin, ChangeTrackingMixin, ListingMixin):
     """UnencryptedDatabase is an SQLite3 database for storing non-sensitive data.
 
     The database is intended to be public and shareable, thus it is not encrypted.
+    The cache, the change tracking, and the listings of the table are added by
+    the mixins.
     """
 
     def __init__(self,
-                 table_name  : DatabaseTableName,
-                 db_metadata : dict
+                 table_name         : DatabaseTableName,
+                 db_metadata        : dict,
+                 key_columns        : tuple = (),
+                 connection_manager : Optional[ConnectionManager] = None,
+                 indexes            : tuple = (),
+                 search_column      : str   = ''
                  ) -> None:
-        """Create new UnencryptedDatabase object."""
+        """Create new UnencryptedDatabase object.
+
+        The `key_columns` uniquely identify an entry. They are backed by a
+        unique index, which makes membership checks, lookups and removals
+        indexed operations instead of full table scans. The `indexes` add
+        secondary indexes for the columns listings are filtered by. The
+        `search_column` is indexed for prefix searches with search().
+
+        Unless a `connection_manager` is provided, the database uses the
+        connection shared by all tables of the shared database file. The
+        pending migrations of the database are applied before the table
+        is created.
+        """
         ensure_dir(Directories.USER_DATA.value)
-        self.table_name  = table_name.value
-        self.db_metadata = db_metadata
-        self.connection  = sqlite3.connect(f'{Directories.USER_DATA.value}'
-                                           f'/{DatabaseFileName.SHARED_DATABASE.value}.sqlite3')
-        self.cursor      = self.connection.cursor()
-        self.connection.isolation_level = None
+
+        if connection_manager is None:
+            connection_manager = ConnectionManager.get_manager(
+                f'{Directories.USER_DATA.value}/{DatabaseFileName.SHARED_DATABASE.value}.sqlite3')
+
+        self.table_name         = table_name.value
+        self.db_metadata        = db_metadata
+        self.key_columns        = key_columns
+        self.queries            = SQLQueries(self.table_name, db_metadata,
+                                             key_columns, indexes, search_column)
+        self.connection_manager = connection_manager
+        self.connection         = connection_manager.connection
+        self.cursor             = self.connection.cursor()
+
+        migrate(connection_manager)
         self.create_table()
 
+        # Start tracking the changes of the created table
+        super().__init__()
+
     def create_table(self) -> None:
         """Create the database table procedurally."""
-        sql_command = f'CREATE TABLE IF NOT EXISTS {self.table_name} ('
+        self.cursor.execute(self.queries.create_table)
+
+        if self.key_columns:
+            self.cursor.execute(self.queries.create_key_index)
+
+        for sql_command in self.queries.create_indexes:
+            self.cursor.execute(sql_command)
+
+        if self.queries.search_table:
+            self.create_search_index()
+
+        self.create_version_counter()
+
+    def has_entry(self, *key_values: Any) -> bool:
+        """Return True if an entry with the key values exists in the database."""
+        return bool(self.cursor.execute(self.queries.exists, key_values).fetchone()[0])
+
+    def has_entries(self) -> bool:
+        """Return True if the database table contains at least one entry."""
+        return bool(self.cursor.execute(self.queries.has_rows).fetchone()[0])
+
+    def delete_entry(self, *key_values: Any) -> bool:
+        """Delete entry by its key values. Return True if an entry was deleted."""
+        self.uncache_entity(key_values)
+        return self.cursor.execute(self.queries.delete, key_values).rowcount > 0
+
+    def to_row(self, obj: Any) -> tuple:
+        """Convert object into a row of column values."""
+        return tuple(getattr(obj, key) for key in self.db_metadata)
 
-        for key, value in self.db_metadata.items():
-            column_name  = key
-            data_type    = value[1]
-            sql_command += f"{column_name} {column_type_dict[data_type]}, "
+    @staticmethod
+    def from_row(row: tuple) -> Any:
+        """Build object from a full row of the table."""
+        return row
 
-        sql_command  = sql_command[:-2]  # Remove trailing comma and space
-        sql_command += ')'
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Execute the statements of the with-block in a single transaction.
 
-        self.cursor.execute(sql_command)
+        The write lock is taken when the transaction begins. A deferred
+        transaction that reads before it writes fails at once without
+        waiting for the busy timeout, if another connection commits in
+        between. The transaction is rolled back if the block raises an
+        exception.
+        """
+        self.cursor.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.cursor.execute('ROLLBACK')
+            self.clear_cache()
+            raise
+        self.cursor.execute('COMMIT')
 
     def insert(self, obj: Any) -> None:
         """Insert object into the database."""
-        keys   = list(self.db_metadata.keys())
-        values = [getattr(obj, key) for key in keys]
+        self.cursor.execute(self.queries.insert, self.to_row(obj))
+        self.cursor.connection.commit()
+        self.cache_written(obj)
+
+    def upsert(self, obj: Any) -> None:
+        """Insert object into the database, or update the entry with the same key.
+
+        The replacement is a single indexed statement, so the entry is
+        never missing from the database, even momentarily.
+        """
+        self.cursor.execute(self.queries.upsert, self.to_row(obj))
+        self.cache_written(obj)
+
+    def insert_many(self,
+                    objects    : Iterable,
+                    batch_size : int  = 1000,
+                    progress   : Optional[Callable[[int], None]] = None,
+                    replace    : bool = False
+                    ) -> int:
+        """Insert objects into the database in a single transaction.
+
+        The objects can be any iterable, including a generator. They are
+        converted and inserted `batch_size` at a time, so only one batch is
+        held in memory. After each batch, `progress` is called with the
+        number of objects inserted so far. If `replace` is True, objects
+        that already exist are updated, otherwise if any insert fails,
+        none of the objects are stored.
+
+        Returns the number of inserted objects.
+        """
+        objects  = iter(objects)
+        inserted = 0
+
+        with self.transaction(), self.suspended_search_sync(), self.suspended_version_sync():
+            while batch := list(itertools.islice(objects, batch_size)):
+                self.insert_batch(batch, replace)
+                inserted += len(batch)
+                if progress is not None:
+                    progress(inserted)
+
+        return inserted
+
+    def copy_entries_from(self, path_to_db: str) -> int:
+        """Copy the entries of the same table in another database file.
+
+        The database file is attached to the connection and the entries
+        are copied with a single statement. Entries whose key already
+        exists are not overwritten.
+
+        Returns the number of copied entries.
+        """
+        self.cursor.execute(self.queries.attach_source, (path_to_db,))
+        try:
+            with self.transaction(), self.suspended_search_sync(), self.suspended_version_sync():
+                copied = self.cursor.execute(self.queries.copy_source).rowcount
+        finally:
+            self.cursor.execute(self.queries.detach_source)
 
-        sql_command  = f'INSERT INTO {self.table_name} ('
-        sql_command += ', '.join(keys)
-        sql_command += ') VALUES ('
-        sql_command += ', '.join(len(keys) * ['?'])
-        sql_command += ')'
+        self.clear_cache()
+        return copied
 
-        self.cursor.execute(sql_command, values)
-        self.cursor.connection.commit()
+    def insert_batch(self, batch: list, replace: bool = False) -> None:
+        """Insert a batch of objects into the database without committing."""
+        statement = self.queries.upsert if replace else self.queries.insert
+        self.cursor.executemany(statement, map(self.to_row, batch))
+        for obj in batch:
+            self.cache_written(obj)
 
     def get_list_of_entries(self) -> list:
         """Get list of entries in the database."""
-        sql_command  =  'SELECT '
-        sql_command +=  ', '.join(list(self.db_metadata.keys()))
-        sql_command += f' FROM {self.table_name}'
+        return self.cursor.execute(self.queries.select_all).fetchall()
 
-        return self.cursor.execute(sql_command).fetchall()
+# Nutrient expressions that get an index for IngredientDatabase.query()
+indexed_nutrient_expressions = ['protein_g/kcal']
 
 
 class IngredientDatabase(UnencryptedDatabase):
@@ -102,78 +236,214 @@ class IngredientDatabase(UnencryptedDatabase):
     and nutritional values of each ingredient.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, connection_manager: Optional[ConnectionManager] = None) -> None:
         """Create new IngredientDatabase."""
         super().__init__(table_name=DatabaseTableName.INGREDIENTS,
-                         db_metadata=dict(ChainMap(nv_metadata, in_metadata)))
-
-    def insert(self, obj: Ingredient) -> None:
-        """Insert Ingredient into the database."""
-        in_keys   = list(in_metadata.keys())
-        nv_keys   = list(nv_metadata.keys())
-        in_values = [getattr(obj, key)          for key in in_keys]
-        nv_values = [getattr(obj.nv_per_g, key) for key in nv_keys]
-        no_values = len(in_keys + nv_keys)
-
-        sql_command  = f'INSERT INTO {self.table_name} ('
-        sql_command += ', '.join(in_keys + nv_keys)
-        sql_command += ') VALUES ('
-        sql_command += ', '.join(no_values * ['?'])
-        sql_command += ')'
-
-        self.cursor.execute(sql_command, in_values + nv_values)
-        self.cursor.connection.commit()
+                         db_metadata=dict(ChainMap(nv_metadata, in_metadata)),
+                         key_columns=('name',),
+                         connection_manager=connection_manager,
+                         search_column='name')
+
+        self.nutrient_index = None  # type: Optional['NutrientIndex']
+        self.select_vectors = f"SELECT name, {', '.join(nv_metadata)} FROM {self.table_name}"
+
+    def create_table(self) -> None:
+        """Create the Ingredients table and the indexes of the common nutrient expressions."""
+        super().create_table()
+        for expression in indexed_nutrient_expressions:
+            self.create_expression_index(expression)
+
+    def cache_written(self, obj: Ingredient) -> None:
+        """Store the written Ingredient in the cache and in the nutrient index."""
+        super().cache_written(obj)
+        if self.nutrient_index is not None:
+            self.nutrient_index.add(obj.name, (getattr(obj.nv_per_g, k) for k in nv_metadata))
+
+    def uncache_entity(self, key_values: tuple) -> None:
+        """Remove the Ingredient from the cache and from the nutrient index."""
+        super().uncache_entity(key_values)
+        if self.nutrient_index is not None:
+            self.nutrient_index.remove(key_values[0])
+
+    def clear_cache(self) -> None:
+        """Remove all entities from the cache, and drop the nutrient index."""
+        super().clear_cache()
+        self.nutrient_index = None
+
+    def get_nutrient_index(self) -> 'NutrientIndex':
+        """Get the nutrient index, and build it with one SELECT on first use.
+
+        NumPy is only imported when the index is first built, so the other
+        lookups of the database do not pay for its import. The index is
+        rebuilt when another connection has changed the table.
+        """
+        self.validate_cache()
+        if self.nutrient_index is None:
+            # pylint: disable=import-outside-toplevel
+            from src.database.nutrient_index import NutrientIndex
+            self.nutrient_index = NutrientIndex.from_rows(
+                self.cursor.execute(self.select_vectors).fetchall(), len(nv_metadata))
+        return self.nutrient_index
+
+    def similar(self,
+                ingredient : Ingredient,
+                k          : int = DatabaseSettings.SIMILAR_LIMIT.value
+                ) -> list:
+        """Get the k ingredients whose nutritional values are the most similar.
+
+        The ingredient itself is not included. The index is built on the
+        first call, kept up to date by the writes of this object, and
+        rebuilt after the writes of other connections.
+        """
+        vector = (getattr(ingredient.nv_per_g, key) for key in nv_metadata)
+        names  = self.get_nutrient_index().nearest(vector, k, exclude=[ingredient.name])
+        return self.get_ingredients(names)
+
+    def to_expression(self, expression: str) -> str:
+        """Convert a nutrient expression into SQL.
+
+        The expression is either a column, e.g., 'kcal', or a ratio of two
+        columns, e.g., 'protein_g/kcal'. Only the numeric columns of the
+        table are accepted, as the expression is written into the statement.
+        """
+        columns = expression.split('/')
+
+        if len(columns) > 2 or any(self.db_metadata.get(c, ('', str))[1] != float
+                                   for c in columns):
+            raise CriticalError(f"Invalid nutrient expression '{expression}'.")
+
+        return columns[0] if len(columns) == 1 else f'({columns[0]} / {columns[1]})'
+
+    def create_expression_index(self, expression: str) -> None:
+        """Create an index that serves queries ordered by the nutrient expression."""
+        index_name = f"{self.table_name}_{expression.replace('/', '_per_')}"
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {self.table_name}'
+                            f' ({self.to_expression(expression)}, name)')
+
+    def query(self,
+              order_by : str = 'name',
+              limit    : int = DatabaseSettings.PAGE_SIZE.value,
+              **conditions : float
+              ) -> list:
+        """Get the ingredients whose nutritional values match the conditions.
+
+        The conditions are given as `<column>__<operator>=<value>`, where the
+        operator is one of lt, lte, gt, gte, eq and ne, for example
+        `query(protein_g__gte=0.2, sugar_g__lte=0.05)`. The ingredients are
+        ordered by the name, or by a nutrient expression such as
+        'protein_g/kcal', in descending order if it is prefixed with '-'.
+
+        The query runs as a single SELECT, so only the matching page of
+        ingredients is loaded.
+        """
+        descending = order_by.startswith('-')
+        order_by   = order_by.lstrip('-')
+        expression = 'name' if order_by == 'name' else self.to_expression(order_by)
+
+        compiled = []
+        for condition in conditions:
+            column, _, operator = condition.rpartition('__')
+            if operator not in comparison_operators:
+                raise CriticalError(f"Invalid condition '{condition}'.")
+            compiled.append((self.to_expression(column), operator))
+
+        sql_command = self.queries.select_matching(tuple(compiled), expression, descending)
+        rows        = self.cursor.execute(sql_command, (*conditions.values(), limit))
+        return [self.from_row(row) for row in rows]
+
+    def to_row(self, obj: Ingredient) -> tuple:
+        """Convert Ingredient into a row of column values."""
+        in_values = [getattr(obj, key)          for key in in_metadata]
+        nv_values = [getattr(obj.nv_per_g, key) for key in nv_metadata]
+        return tuple(in_values + nv_values)
+
+    @staticmethod
+    def from_row(row: tuple) -> Ingredient:
+        """Build Ingredient from a full row of the Ingredients table."""
+        name, grams_per_unit, fixed_portion_g, *nv_values = row
+        return Ingredient(name, NutritionalValues(*nv_values),
+                          grams_per_unit=grams_per_unit,
+                          fixed_portion_g=fixed_portion_g)
 
     def get_list_of_ingredient_names(self) -> list:
         """Get list of ingredient names."""
-        sql_command = f'SELECT Name FROM {self.table_name}'
-        results     = [r[0] for r in self.cursor.execute(sql_command).fetchall()]
-        return results
+        return [r[0] for r in self.cursor.execute(self.queries.select_names).fetchall()]
 
     def get_list_of_ingredients(self) -> list:
         """Get list of ingredients in the database."""
-        return [self.get_ingredient(name) for name in self.get_list_of_ingredient_names()]
+        return list(self.iter_ingredients())
+
+    def iter_ingredients(self) -> Iterator[Ingredient]:
+        """Yield every Ingredient in the database from a single streamed SELECT.
+
+        The rows are fetched lazily from a dedicated cursor, so the caller
+        can iterate over large catalogues without holding them in memory.
+        """
+        for row in self.connection.execute(self.queries.select_all):
+            yield self.from_row(row)
 
     def get_ingredient(self, name: str) -> Ingredient:
         """Get Ingredient from database by name."""
-        keys = list(self.db_metadata.keys())[1:]
+        ingredient = self.get_cached((name,))
+        if ingredient is not None:
+            return ingredient
 
-        sql_command  =  'SELECT '
-        sql_command +=  ', '.join(keys)
-        sql_command += f' FROM {self.table_name}'
-        sql_command += f" WHERE {self.db_metadata['name'][0]} == '{name}'"
+        result = self.cursor.execute(self.queries.select_by_key, (name,)).fetchone()
 
-        try:
-            result = self.cursor.execute(sql_command).fetchall()[0]
-        except IndexError:
-            raise IngredientNotFound(f"Could not find ingredient '{name}'.") from IndexError
-
-        ingredient = Ingredient(name, NutritionalValues(*result[2:]),
-                                grams_per_unit=result[0],
-                                fixed_portion_g=result[1])
+        if result is None:
+            raise IngredientNotFound(f"Could not find ingredient '{name}'.")
 
+        ingredient = self.from_row(result)
+        self.cache_entity(ingredient)
         return ingredient
 
+    def get_ingredients(self, names: list) -> list:
+        """Get Ingredients from database by their names.
+
+        Ingredients that are not cached are loaded with one `IN` query (per
+        MAX_QUERY_PARAMETERS names). The ingredients are returned in the
+        order of `names`. If any of the names are not found, all of them
+        are reported in a single IngredientNotFound exception.
+        """
+        found    = {}
+        to_query = []
+        for name in dict.fromkeys(names):
+            ingredient = self.get_cached((name,))
+            if ingredient is None:
+                to_query.append(name)
+            else:
+                found[name] = ingredient
+
+        chunk_size = DatabaseSettings.MAX_QUERY_PARAMETERS.value
+        for offset in range(0, len(to_query), chunk_size):
+            chunk = to_query[offset:offset + chunk_size]
+
+            for row in self.cursor.execute(self.queries.select_in('name', len(chunk)), chunk):
+                ingredient = self.from_row(row)
+                self.cache_entity(ingredient)
+                found[ingredient.name] = ingredient
+
+        missing = [f"'{name}'" for name in to_query if name not in found]
+        if missing:
+            raise IngredientNotFound(f"Could not find ingredients {', '.join(missing)}.")
+
+        return [found[name] for name in names]
+
     def remove_ingredient(self, ingredient: Ingredient) -> None:
         """Remove ingredient from database."""
         if not isinstance(ingredient, Ingredient):
             raise CriticalError(f"Provided parameter was not an Ingredient but {type(ingredient)} ")
 
-        if not self.has_ingredient(ingredient):
+        if not self.delete_entry(ingredient.name):
             raise IngredientNotFound(f"No ingredient {ingredient.name} in database.")
 
-        sql_command  = f'DELETE FROM {self.table_name}'
-        sql_command += f" WHERE name == '{ingredient.name}'"
-        self.cursor.execute(sql_command)
-
     def replace_ingredient(self, ingredient: Ingredient) -> None:
         """Replace ingredient in database."""
         if not isinstance(ingredient, Ingredient):
             raise CriticalError(f"Provided parameter was not an Ingredient but"
                                 f" {type(ingredient)} ")
 
-        self.remove_ingredient(ingredient)
-        self.insert(ingredient)
+        self.upsert(ingredient)
 
     def has_ingredient(self, purp_ingredient: Ingredient) -> bool:
         """Returns True if the ingredient exists in the database."""
@@ -181,121 +451,197 @@ class IngredientDatabase(UnencryptedDatabase):
             raise CriticalError(f"Provided parameter was not an Ingredient but "
                                 f"{type(purp_ingredient)} ")
 
-        for ingredient in self.get_list_of_ingredients():
-            if purp_ingredient == ingredient:
-                return True
-        return False
+        return self.has_entry(purp_ingredient.name)
 
     def has_ingredients(self) -> bool:
         """Return True if database contains at least one ingredient."""
-        return any(self.get_list_of_ingredient_names())
+        return self.has_entries()
 
 
-class RecipeDatabase(UnencryptedDatabase):
+class RecipeDatabase(RecipeLinksMixin, UnencryptedDatabase):
     """Recipe database contains a repository of shared recipes.
 
     The database is intended to be public and shareable, thus it is not encrypted.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, connection_manager: Optional[ConnectionManager] = None) -> None:
         """Create new RecipeDatabase."""
-        super().__init__(table_name=DatabaseTableName.RECIPES, db_metadata=recipe_metadata)
+        super().__init__(table_name=DatabaseTableName.RECIPES,
+                         db_metadata=recipe_metadata,
+                         key_columns=('name', 'author'),
+                         connection_manager=connection_manager,
+                         indexes=(('is_mealprep', 'name', 'author'),),
+                         search_column='name')
+
+        self.select_by_name     = f'{self.queries.select_all} WHERE name == ?'
+        self.select_by_mealprep = f'{self.queries.select_all} WHERE is_mealprep == ?'
+        self.select_using       = f'{self.queries.select_all} WHERE {self.uses_link}'
+
+    def create_table(self) -> None:
+        """Create the Recipes table, and the RecipeIngredients table that links
+        the recipes to the names of their ingredients and accompaniments.
+        """
+        super().create_table()
+
+        with self.transaction():
+            for sql_command in self.create_links_table:
+                self.cursor.execute(sql_command)
+
+    def cache_entity(self, entity: Any, key_values: Optional[tuple] = None) -> None:
+        """Store Recipe built from the database in the cache.
+
+        Lookups by name only are cached under the name, which may refer
+        to another author's recipe, so a written recipe drops that entry.
+        """
+        if self.cache is not None and key_values is None:
+            self.cache.invalidate((entity.name,))
+        super().cache_entity(entity, key_values)
+
+    def uncache_entity(self, key_values: tuple) -> None:
+        """Remove Recipe from the cache, including its lookup by name."""
+        super().uncache_entity(key_values)
+        super().uncache_entity(key_values[:1])
+
+    def insert(self, obj: Recipe) -> None:
+        """Insert Recipe and its ingredient links into the database."""
+        with self.transaction():
+            self.insert_batch([obj])
+
+    def insert_batch(self, batch: list, replace: bool = False) -> None:
+        """Insert a batch of Recipes and their ingredient links without committing."""
+        if replace:
+            self.cursor.executemany(self.delete_links, [(r.name, r.author) for r in batch])
+        super().insert_batch(batch, replace)
+        self.insert_links(batch)
+
+    def upsert(self, obj: Recipe) -> None:
+        """Insert or update Recipe, and replace its ingredient links."""
+        with self.transaction():
+            super().upsert(obj)
+            self.cursor.execute(self.delete_links, (obj.name, obj.author))
+            self.insert_links([obj])
+
+    def delete_entry(self, *key_values: Any) -> bool:
+        """Delete Recipe and its ingredient links by the recipe's name and author."""
+        with self.transaction():
+            self.cursor.execute(self.delete_links, key_values)
+            return super().delete_entry(*key_values)
+
+    def to_row(self, obj: Recipe) -> tuple:
+        """Convert Recipe into a row of column values."""
+        values = []
+        for key, metadata in self.db_metadata.items():
+            value = getattr(obj, key)
+
+            if metadata[1] == list:
+                if not value:
+                    value = 'None'
+                else:
+                    value = '\x1f'.join([v if isinstance(v, str) else v.name for v in value])
+
+            if metadata[1] == bool:
+                value = str(value)
+
+            values.append(value)
+        return tuple(values)
+
+    @staticmethod
+    def from_row(row: tuple) -> Recipe:
+        """Build Recipe from a full row of the Recipes table."""
+        name, author, in_names, ac_names, is_mealprep = row
+
+        in_names = [] if in_names == 'None' else in_names.split('\x1f')
+        ac_names = [] if ac_names == 'None' else ac_names.split('\x1f')
+
+        return Recipe(name, author, in_names, ac_names, ast.literal_eval(is_mealprep))
 
     def get_list_of_recipe_names(self) -> list:
         """Get list of recipe names."""
-        return [name for name, *_ in self.get_list_of_entries()]
+        return [r[0] for r in self.cursor.execute(self.queries.select_names).fetchall()]
 
     def get_list_of_recipes(self) -> list:
         """Get list of recipes."""
-        return [self.get_recipe(name) for name in self.get_list_of_recipe_names()]
+        return [self.from_row(row) for row in self.get_list_of_entries()]
+
+    def page(self,
+             after_key   : Optional[tuple] = None,
+             limit       : int             = DatabaseSettings.PAGE_SIZE.value,
+             order_by    : tuple           = (),
+             where       : Optional[dict]  = None,
+             is_mealprep : Optional[bool]  = None
+             ) -> tuple:
+        """Get a page of recipes, optionally only mealprep or single recipes."""
+        where = {} if where is None else dict(where)
+        if is_mealprep is not None:
+            where['is_mealprep'] = str(is_mealprep)
+        return super().page(after_key, limit, order_by, where)
 
     def get_list_of_mealprep_recipes(self) -> list:
-        """Get list of mealprep recipes."""
-        recipes = [self.get_recipe(name) for name in self.get_list_of_recipe_names()]
-        return [recipe for recipe in recipes if recipe.is_mealprep]
+        """Get list of mealprep recipes with one indexed query."""
+        return [self.from_row(row)
+                for row in self.cursor.execute(self.select_by_mealprep, (str(True),))]
 
     def get_list_of_single_recipes(self) -> list:
-        """Get list of single recipes."""
-        recipes = [self.get_recipe(name) for name in self.get_list_of_recipe_names()]
-        return [recipe for recipe in recipes if not recipe.is_mealprep]
+        """Get list of single recipes with one indexed query."""
+        return [self.from_row(row)
+                for row in self.cursor.execute(self.select_by_mealprep, (str(False),))]
 
     def get_recipe(self,
                    name   : str,
                    author : str = ''
                    ) -> Recipe:
         """Get Recipe from database by name (and author)."""
-        keys = ', '.join(list(self.db_metadata.keys())[1:])
-        sql_command  = f"SELECT {keys} FROM {self.table_name} WHERE name == '{name}'"
-
-        if author:
-            sql_command += f" AND author == '{author}'"
+        key_values = (name, author) if author else (name,)
 
-        results = self.cursor.execute(sql_command).fetchall()
+        recipe = self.get_cached(key_values)
+        if recipe is not None:
+            return recipe
 
-        if results:
-            for result in results:
-                author, in_names, ac_names, is_mealprep = result
-
-                in_names = ([] if in_names == 'None' else
-                            in_names.split('\x1f') if '\x1f' in in_names else [in_names])
-                ac_names = ([] if ac_names == 'None' else
-                            ac_names.split('\x1f') if '\x1f' in ac_names else [ac_names])
+        if author:
+            result = self.cursor.execute(self.queries.select_by_key, key_values).fetchone()
+        else:
+            result = self.cursor.execute(self.select_by_name, key_values).fetchone()
 
-                return Recipe(name, author, in_names, ac_names, ast.literal_eval(is_mealprep))
+        if result is None:
+            author_info = f" by '{author}'" if author else ''
+            raise RecipeNotFound(f"Could not find recipe '{name}'{author_info}.")
 
-        author_info = f" by '{author}'" if author else ''
-        raise RecipeNotFound(f"Could not find recipe '{name}'{author_info}.")
+        recipe = self.from_row(result)
+        self.cache_entity(recipe, key_values)
+        return recipe
 
     def insert_recipe(self, recipe: Recipe) -> None:
         """Insert Recipe into the database."""
         if not isinstance(recipe, Recipe):
             raise CriticalError(f"Provided parameter was not an Recipe but {type(recipe)} ")
 
-        keys   = list(self.db_metadata.keys())
-        values = []
-        for key, metadata in self.db_metadata.items():
-            value = getattr(recipe, key)
-
-            if metadata[1] == list:
-                if not value:
-                    value = 'None'
-                elif not isinstance(value[0], str):
-                    value = '\x1f'.join([v.name for v in value])
-
-            if metadata[1] == bool:
-                value = str(value)
-
-            values.append(value)
-
-        csv            = ', '.join(keys)
-        question_marks = ', '.join(['?' for _ in range(len(keys))])
-        sql_command    = f'INSERT INTO {self.table_name} ({csv}) VALUES ({question_marks})'
-
-        self.cursor.execute(sql_command, values)
-        self.cursor.connection.commit()
+        self.insert(recipe)
 
     def has_recipe(self, recipe: Recipe) -> bool:
         """Returns True if recipe exists in the database."""
         if not isinstance(recipe, Recipe):
             raise CriticalError(f"Provided parameter was not an Recipe but {type(recipe)} ")
 
-        return any(name == recipe.name for name in self.get_list_of_recipe_names())
+        return self.has_entry(recipe.name, recipe.author)
+
+    def has_recipes(self) -> bool:
+        """Return True if database contains at least one recipe."""
+        return self.has_entries()
 
     def remove_recipe(self, recipe: Recipe) -> None:
         """Remove recipe from database."""
         if not isinstance(recipe, Recipe):
             raise CriticalError(f"Provided parameter was not an Recipe but {type(recipe)} ")
 
-        if not self.has_recipe(recipe):
+        if not self.delete_entry(recipe.name, recipe.author):
             raise RecipeNotFound(f"No recipe {recipe.name} in database.")
 
-        sql_command = f"DELETE FROM {self.table_name} WHERE name == '{recipe.name}'"
-        self.cursor.execute(sql_command)
-
     def replace_recipe(self, recipe: Recipe) -> None:
         """Replace recipe in database."""
-        self.remove_recipe(recipe)
-        self.insert_recipe(recipe)
+        if not isinstance(recipe, Recipe):
+            raise CriticalError(f"Provided parameter was not an Recipe but {type(recipe)} ")
+
+        self.upsert(recipe)
 
 
 class MealprepDatabase(UnencryptedDatabase):
@@ -309,78 +655,175 @@ class MealprepDatabase(UnencryptedDatabase):
     benefits everyone in the household.
     """
 
-    def __init__(self) -> None:
+    # Converts the 'dd/mm/yyyy' cook dates into 'yyyymmdd', which sorts in date order
+    cook_day_expression = ('substr(cook_date, 7, 4) || substr(cook_date, 4, 2)'
+                           ' || substr(cook_date, 1, 2)')
+
+    def __init__(self, connection_manager: Optional[ConnectionManager] = None) -> None:
         """Create new MealprepDatabase."""
-        super().__init__(table_name=DatabaseTableName.MEALPREPS, db_metadata=mealprep_metadata)
+        super().__init__(table_name=DatabaseTableName.MEALPREPS,
+                         db_metadata=mealprep_metadata,
+                         key_columns=('recipe_name',),
+                         connection_manager=connection_manager,
+                         indexes=(('remaining_grams',),))
+
+        # The portion is deducted by the UPDATE itself, so concurrent writers cannot lose updates
+        self.consume_grams    = (f'UPDATE {self.table_name}'
+                                 f' SET remaining_grams = MAX(remaining_grams - ?, 0.0)'
+                                 f' WHERE recipe_name == ?')
+        self.select_remaining = (f'SELECT remaining_grams FROM {self.table_name}'
+                                 f' WHERE recipe_name == ?')
+
+        # The grams already eaten are deducted from the new total weight by the UPDATE itself
+        updates               = ', '.join(f'{column} = ?' for column in self.queries.columns[1:-1])
+        self.update_edited    = (f'UPDATE {self.table_name} SET {updates},'
+                                 f' remaining_grams = MAX(? - (total_grams - remaining_grams), 0.0)'
+                                 f' WHERE recipe_name == ?')
+
+        expired               = f'{self.cook_day_expression} < ? OR remaining_grams <= 0.0'
+        self.select_expired   = f'{self.queries.select_all} WHERE {expired}'
+        self.delete_expired   = f'DELETE FROM {self.table_name} WHERE {expired}'
+
+    def create_table(self) -> None:
+        """Create the Mealpreps table, and the index of the cook dates in date order."""
+        super().create_table()
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {self.table_name}_cook_day'
+                            f' ON {self.table_name} ({self.cook_day_expression})')
+
+    def to_row(self, obj: Mealprep) -> tuple:
+        """Convert Mealprep into a row of column values."""
+        values = []
+        for key in self.db_metadata:
+            value = getattr(obj, key)
+            if isinstance(value, dict):
+                value = str(value)
+            elif isinstance(value, NutritionalValues):
+                value = value.serialize()
+            values.append(value)
+        return tuple(values)
+
+    @staticmethod
+    def from_row(row: tuple) -> Mealprep:
+        """Build Mealprep from a full row of the Mealpreps table."""
+        name, total_grams, cook_date, ingredient_grams, mealprep_nv, remaining_grams = row
+
+        # The stored NV is per gram, Mealprep expects the NV of the whole batch
+        return Mealprep(name, total_grams, cook_date,
+                        ast.literal_eval(ingredient_grams),
+                        NutritionalValues.from_serialized(mealprep_nv) * total_grams,
+                        remaining_grams)
 
     def get_list_of_mealprep_names(self) -> list:
         """Get list of mealprep names."""
-        return [name for name, *_ in self.get_list_of_entries()]
+        return [r[0] for r in self.cursor.execute(self.queries.select_names).fetchall()]
 
     def get_list_of_mealpreps(self) -> list:
         """Get list of mealpreps."""
-        return [self.get_mealprep(name) for name in self.get_list_of_mealprep_names()]
+        return [self.from_row(row) for row in self.get_list_of_entries()]
 
     def get_mealprep(self, name: str) -> Mealprep:
         """Get Recipe from database by name."""
-        keys        = ', '.join(list(self.db_metadata.keys())[1:])
-        sql_command = f"SELECT {keys} FROM {self.table_name} WHERE recipe_name == '{name}'"
+        mealprep = self.get_cached((name,))
+        if mealprep is not None:
+            return mealprep
 
-        try:
-            result = self.cursor.execute(sql_command).fetchall()[0]
-        except IndexError:
-            raise RecipeNotFound(f"Could not find recipe '{name}'.") from IndexError
+        result = self.cursor.execute(self.queries.select_by_key, (name,)).fetchone()
+
+        if result is None:
+            raise RecipeNotFound(f"Could not find recipe '{name}'.")
 
-        total_grams      = result[0]
-        cook_date        = result[1]
-        ingredient_grams = ast.literal_eval(result[2])
-        mealprep_nv      = NutritionalValues.from_serialized(result[3])
-        return Mealprep(name, total_grams, cook_date, ingredient_grams, mealprep_nv)
+        mealprep = self.from_row(result)
+        self.cache_entity(mealprep)
+        return mealprep
 
     def insert_mealprep(self, mealprep: Mealprep) -> None:
         """Insert Mealprep into the database."""
         if not isinstance(mealprep, Mealprep):
             raise CriticalError(f"Provided parameter was not an Mealprep but {type(mealprep)} ")
 
-        keys = list(self.db_metadata.keys())
-
-        values = []
-        for key in self.db_metadata:
-            value = getattr(mealprep, key)
-            if isinstance(value, dict):
-                value = str(value)
-            elif isinstance(value, NutritionalValues):
-                value = value.serialize()
-            values.append(value)
-
-        csv            = ', '.join(keys)
-        question_marks = ', '.join(['?' for _ in range(len(keys))])
+        self.insert(mealprep)
 
-        sql_command = f'INSERT INTO {self.table_name} ({csv}) VALUES ({question_marks})'
-
-        self.cursor.execute(sql_command, values)
-        self.cursor.connection.commit()
+    def has_mealpreps(self) -> bool:
+        """Return True if database contains at least one mealprep."""
+        return self.has_entries()
 
     def has_mealprep(self, mealprep: Mealprep) -> bool:
         """Returns True if the mealprep exists in the database."""
         if not isinstance(mealprep, Mealprep):
             raise CriticalError(f"Provided parameter was not an Mealprep but {type(mealprep)} ")
 
-        return any(name == mealprep.recipe_name for name in self.get_list_of_mealprep_names())
+        return self.has_entry(mealprep.recipe_name)
 
     def remove_mealprep(self, mealprep: Mealprep) -> None:
         """Remove mealprep from the database."""
         if not isinstance(mealprep, Mealprep):
             raise CriticalError(f"Provided parameter was not an Mealprep but {type(mealprep)} ")
 
-        if not self.has_mealprep(mealprep):
+        if not self.delete_entry(mealprep.recipe_name):
             raise RecipeNotFound(f"No mealprep {mealprep.recipe_name} in database.")
 
-        sql_command  = f'DELETE FROM {self.table_name}'
-        sql_command += f" WHERE recipe_name == '{mealprep.recipe_name}'"
-        self.cursor.execute(sql_command)
-
     def replace_mealprep(self, mealprep: Mealprep) -> None:
         """Replace mealprep in the database."""
-        self.remove_mealprep(mealprep)
-        self.insert_mealprep(mealprep)
+        if not isinstance(mealprep, Mealprep):
+            raise CriticalError(f"Provided parameter was not an Mealprep but {type(mealprep)} ")
+
+        self.upsert(mealprep)
+
+    def update_mealprep(self, mealprep: Mealprep) -> None:
+        """Update the edited mealprep in the database.
+
+        The grams eaten from the batch are kept, and they are deducted from
+        the new total weight in SQL, so the portions consumed by others
+        while the mealprep was being edited are not lost.
+        """
+        if not isinstance(mealprep, Mealprep):
+            raise CriticalError(f"Provided parameter was not an Mealprep but {type(mealprep)} ")
+
+        values = self.to_row(mealprep)[1:-1] + (mealprep.total_grams, mealprep.recipe_name)
+        if self.cursor.execute(self.update_edited, values).rowcount == 0:
+            raise RecipeNotFound(f"No mealprep {mealprep.recipe_name} in database.")
+
+        self.uncache_entity((mealprep.recipe_name,))
+
+    def consume(self, recipe_name: str, grams: float) -> float:
+        """Deduct an eaten portion from the mealprep, and return the remaining grams.
+
+        The remaining grams never go below zero.
+        """
+        if grams < 0.0:
+            raise CriticalError(f"Invalid portion size {grams}.")
+
+        with self.transaction():
+            if self.cursor.execute(self.consume_grams, (grams, recipe_name)).rowcount == 0:
+                raise RecipeNotFound(f"No mealprep {recipe_name} in database.")
+            remaining = self.cursor.execute(self.select_remaining, (recipe_name,)).fetchone()[0]
+
+        self.uncache_entity((recipe_name,))
+        return remaining
+
+    @staticmethod
+    def to_cook_day_cutoff(max_age_days: int, today: Optional[datetime.date]) -> str:
+        """Get the cook day before which the mealpreps are older than `max_age_days`."""
+        today = datetime.date.today() if today is None else today
+        return (today - datetime.timedelta(days=max_age_days)).strftime('%Y%m%d')
+
+    def get_expired_mealpreps(self,
+                              max_age_days : int = DatabaseSettings.MEALPREP_MAX_AGE_DAYS.value,
+                              today        : Optional[datetime.date] = None
+                              ) -> list:
+        """Get list of mealpreps that are older than `max_age_days`, or eaten."""
+        cutoff = self.to_cook_day_cutoff(max_age_days, today)
+        return [self.from_row(row) for row in self.cursor.execute(self.select_expired, (cutoff,))]
+
+    def prune_mealpreps(self,
+                        max_age_days : int = DatabaseSettings.MEALPREP_MAX_AGE_DAYS.value,
+                        today        : Optional[datetime.date] = None
+                        ) -> int:
+        """Remove the mealpreps that are older than `max_age_days`, or eaten.
+
+        Returns the number of removed mealpreps.
+        """
+        cutoff  = self.to_cook_day_cutoff(max_age_days, today)
+        removed = self.cursor.execute(self.delete_expired, (cutoff,)).rowcount
+        self.clear_cache()
+        return removed
@@ -17,10 +17,23 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
 import ast
+import copy
+import os
+import struct
 
-from typing import Any
+from typing import Any, Dict, Optional, Tuple
 
-from src.entities.nutritional_values import NutritionalValues
+from src.common.exceptions           import CriticalError
+from src.common.utils                import pack_str, unpack_str
+from src.entities.nutritional_values import NutritionalValues, nv_metadata
+
+# The version of the binary record format. The nutrients are stored in the
+# order of nv_metadata, so new nutrients must only be appended to it. The
+# records of version 1 have no meal ID.
+MEAL_FORMAT_VERSION = 2
+MEAL_ID_LENGTH      = 8
+
+nutrient_keys = list(nv_metadata.keys())
 
 
 class Meal:
@@ -34,14 +47,19 @@ class Meal:
                  eat_tstamp          : str,
                  main_grams          : float,
                  meal_nv             : NutritionalValues,
-                 accompaniment_grams : dict
+                 accompaniment_grams : dict,
+                 meal_id             : Optional[str] = None
                  ) -> None:
-        """Create new Meal object."""
+        """Create new Meal object.
+
+        A new meal gets a random ID, which identifies it in the meal log.
+        """
         self.name                = name
         self.eat_tstamp          = eat_tstamp
         self.main_grams          = main_grams
         self.meal_nv             = meal_nv
         self.accompaniment_grams = accompaniment_grams
+        self.meal_id             = meal_id if meal_id is not None else self.new_id()
 
     def __repr__(self) -> str:
         """Format Meal attributes."""
@@ -85,6 +103,15 @@ class Meal:
             total_weight += sum(self.accompaniment_grams.values())
         return total_weight
 
+    def copy(self) -> 'Meal':
+        """Return a copy of the meal that can be modified without changing the original."""
+        return Meal(self.name,
+                    self.eat_tstamp,
+                    self.main_grams,
+                    copy.copy(self.meal_nv),
+                    dict(self.accompaniment_grams),
+                    self.meal_id)
+
     def serialize(self) -> str:
         """Return the serialized version of the object."""
         return str({'name':                self.name,
@@ -104,3 +131,80 @@ class Meal:
                     main_grams=ast_dict['main_grams'],
                     accompaniment_grams=ast.literal_eval(ast_dict['accompaniment_grams']),
                     meal_nv=NutritionalValues.from_serialized(ast_dict['meal_nv']))
+
+    @staticmethod
+    def new_id() -> str:
+        """Generate a new random meal ID."""
+        return os.urandom(MEAL_ID_LENGTH).hex()
+
+    @staticmethod
+    def get_id(bytestring: bytes) -> str:
+        """Get the meal ID of a binary record of the current version."""
+        return bytestring[1:1 + MEAL_ID_LENGTH].hex()
+
+    def to_bytes(self, version: int = MEAL_FORMAT_VERSION) -> bytes:
+        """Return the object as a compact binary record.
+
+        The record consists of the format version, the meal ID, the name and
+        timestamp, the grams of the main recipe and the accompaniments, and
+        a bitmask of the nutrients that are not zero, followed by their
+        values in the order of nv_metadata. Most meals only have a few of
+        the nutrients, so the zero values are not stored. The records of
+        the older versions are only created for converting older data.
+        """
+        nutrients = [(i, value) for i, value
+                     in enumerate(getattr(self.meal_nv, key) for key in nutrient_keys) if value]
+        mask      = sum(1 << i for i, _ in nutrients)
+
+        fields = [struct.pack('<B', version),
+                  bytes.fromhex(self.meal_id) if version > 1 else b'',
+                  pack_str(self.name),
+                  pack_str(self.eat_tstamp),
+                  struct.pack('<dH', self.main_grams, len(self.accompaniment_grams))]
+        for ac_name, ac_grams in self.accompaniment_grams.items():
+            fields.append(pack_str(ac_name) + struct.pack('<d', ac_grams))
+        fields.append(struct.pack(f'<Q{len(nutrients)}d', mask, *(v for _, v in nutrients)))
+
+        return b''.join(fields)
+
+    @classmethod
+    def from_bytes(cls, bytestring: bytes) -> 'Meal':
+        """Instantiate the object from a binary record."""
+        version = bytestring[0]
+        if version not in (1, MEAL_FORMAT_VERSION):
+            raise CriticalError(f"Unknown meal record version {version}.")
+
+        meal_id            = Meal.get_id(bytestring) if version > 1 else ''
+        name,       offset = unpack_str(bytestring, 1 + len(meal_id) // 2)
+        eat_tstamp, offset = unpack_str(bytestring, offset)
+
+        main_grams, no_accompaniments = struct.unpack_from('<dH', bytestring, offset)
+        accompaniment_grams, offset   = Meal.unpack_accompaniments(bytestring, offset + 10,
+                                                                   no_accompaniments)
+        meal_nv                       = Meal.unpack_nutrients(bytestring, offset)
+
+        return Meal(name, eat_tstamp, main_grams, meal_nv, accompaniment_grams, meal_id)
+
+    @staticmethod
+    def unpack_accompaniments(bytestring : bytes,
+                              offset     : int,
+                              count      : int
+                              ) -> Tuple[Dict[str, float], int]:
+        """Unpack the accompaniment names and grams starting at offset."""
+        accompaniment_grams = {}
+        for _ in range(count):
+            ac_name, offset = unpack_str(bytestring, offset)
+            accompaniment_grams[ac_name] = struct.unpack_from('<d', bytestring, offset)[0]
+            offset += 8
+        return accompaniment_grams, offset
+
+    @staticmethod
+    def unpack_nutrients(bytestring: bytes, offset: int) -> NutritionalValues:
+        """Unpack the bitmask and the non-zero nutrient values starting at offset."""
+        mask   = struct.unpack_from('<Q', bytestring, offset)[0]
+        values = struct.unpack_from(f'<{bin(mask).count("1")}d', bytestring, offset + 8)
+
+        meal_nv = NutritionalValues()
+        for key, value in zip((k for i, k in enumerate(nutrient_keys) if mask >> i & 1), values):
+            setattr(meal_nv, key, value)
+        return meal_nv
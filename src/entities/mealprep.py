@@ -16,7 +16,7 @@ details. You should have received a copy of the GNU General Public License
 along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import Any
+from typing import Any, Optional
 
 from src.entities.nutritional_values import NutritionalValues
 
@@ -27,6 +27,7 @@ mealprep_metadata = {
     'cook_date':        ('CookDate',        str  ),
     'ingredient_grams': ('IngredientGrams', list ),
     'mealprep_nv':      ('MealprepNV',      str  ),
+    'remaining_grams':  ('RemainingGrams',  float),
 }
 
 
@@ -39,7 +40,8 @@ class Mealprep:
     The total grams is not tied to the amount of ingredient grams, because the amount of
     water will vary depending on how much is added, and how much evaporates during the
     cooking process. Weighing the final mealprep will ensure correct estimation of
-    nutrient density.
+    nutrient density. The remaining grams is the amount left after the logged portions,
+    which is the whole batch unless stated otherwise.
     """
 
     def __init__(self,
@@ -47,7 +49,8 @@ class Mealprep:
                  total_grams      : float,
                  cook_date        : str,
                  ingredient_grams : dict,
-                 mealprep_nv      : NutritionalValues
+                 mealprep_nv      : NutritionalValues,
+                 remaining_grams  : Optional[float] = None
                  ) -> None:
         """Create new Mealprep object."""
         self.recipe_name      = recipe_name
@@ -55,6 +58,7 @@ class Mealprep:
         self.cook_date        = cook_date
         self.ingredient_grams = ingredient_grams
         self.mealprep_nv      = mealprep_nv / self.total_grams
+        self.remaining_grams  = total_grams if remaining_grams is None else remaining_grams
 
     def __eq__(self, other: Any) -> bool:
         """Returns True if the two Mealpreps are the same"""
@@ -27,6 +27,13 @@ recipe_metadata = {
     'is_mealprep':         ('IsMealPrep',         bool),
 }
 
+recipe_ingredient_metadata = {
+    'recipe_name':      ('RecipeName',      str),
+    'author':           ('Author',          str),
+    'ingredient_name':  ('IngredientName',  str),
+    'is_accompaniment': ('IsAccompaniment', bool),
+}
+
 
 class Recipe:
     """Recipe contains metadata about a recipe and its ingredients."""
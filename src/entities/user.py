@@ -19,17 +19,28 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 import json
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, Dict
 
-from src.common.enums import Conversion, DBKeys, DietType, Format, Gender, PhysicalActivityLevel
-from src.common.utils import get_today_str
+from src.common.enums      import (Conversion, DatabaseSettings, DBKeys, DietType, Format,
+                                   Gender, JournalChange, PhysicalActivityLevel)
+from src.common.exceptions import CriticalError
+from src.common.utils      import get_today_str
 
 from src.database.encrypted_database import EncryptedDatabase
+from src.database.log_records        import (decode_change, decode_partition, encode_change,
+                                             encode_partition, find_legacy_meal_id,
+                                             is_legacy_record, to_meal_record,
+                                             upgrade_meal_record)
 from src.entities.user_credentials   import UserCredentials
 
 from src.entities.meal import Meal
 
 
+def to_month(date: str) -> str:
+    """Get the 'yyyy-mm' month of a 'dd/mm/yyyy' date."""
+    return f'{date[6:10]}-{date[3:5]}'
+
+
 class User:  # pylint: disable=too-many-instance-attributes, too-many-public-methods, too-many-arguments
     """UserCredentials object manages all information about the user.
 
@@ -59,8 +70,14 @@ class User:  # pylint: disable=too-many-instance-attributes, too-many-public-met
         self.diet_type = diet_type
         self.bmr       = 0.0
 
-        self.weight_log : dict = {}
-        self.meal_log   : dict = {}
+        # The weight and meal logs are partitioned by month, and loaded on first access
+        # {month: {'weight_log': {date: kg}, 'meal_log': {date: {meal ID: binary meal record}}}}
+        self.partitions : dict = {}
+        self.pending    : dict = {}  # {month: [(record number, change)]} for unloaded months
+        self.dirty      : set  = set()
+
+        # The Meal objects of the meal log, parsed on first access to the date
+        self.parsed_meals : dict = {}  # {date: {meal ID: Meal}}
 
         self.database = EncryptedDatabase(self.credentials)
 
@@ -89,7 +106,10 @@ class User:  # pylint: disable=too-many-instance-attributes, too-many-public-met
 
     # Databases
     def serialize(self) -> bytes:
-        """Serialize user's attributes into a bytestring."""
+        """Serialize user's attributes into a bytestring.
+
+        The weight and meal logs are stored into the monthly partitions.
+        """
         return json.dumps({DBKeys.NAME.value:           self.name,
                            DBKeys.BIRTHDAY.value:       self.birthday,
                            DBKeys.GENDER.value:         self.gender.value,
@@ -97,21 +117,147 @@ class User:  # pylint: disable=too-many-instance-attributes, too-many-public-met
                            DBKeys.INIT_WEIGHT_KG.value: self.init_weight_kg,
                            DBKeys.PAL.value:            self.pal.value,
                            DBKeys.DIET_TYPE.value:      self.diet_type.value,
-                           DBKeys.WEIGHT_LOG.value:     json.dumps(self.weight_log),
-                           DBKeys.MEAL_LOG.value:       json.dumps(self.meal_log),
                            }).encode()
 
     def store_db(self) -> None:
-        """Store the user's data into the database."""
+        """Store the changed monthly partitions and the user's data into the database.
+
+        Storing the user's data empties the journal, so the journaled changes
+        of the partitions that have not been loaded are applied first. Each
+        partition records the part of the journal it includes, so if the
+        program is interrupted before the user's data is stored, the journal
+        is not applied to the stored partitions twice.
+        """
+        for month in list(self.pending):
+            self.get_partition(month)
+
+        for month in sorted(self.dirty):
+            self.database.store_partition(month, encode_partition(self.partitions[month],
+                                                                  self.database.journal_header,
+                                                                  self.database.journal_records))
+        self.dirty.clear()
+
         self.database.store_db(self.serialize())
 
+    def get_partition(self, month: str) -> dict:
+        """Get the weight and meal logs of the month, and load them on first access.
+
+        The journaled changes of the month are applied when the partition is
+        loaded, except those that the stored partition already includes.
+        Partitions stored in the format of older versions are converted, and
+        stored in the current format with the next store.
+        """
+        if month in self.partitions:
+            return self.partitions[month]
+
+        data = self.database.load_partition(month)
+        if data is None:
+            partition : dict = {DBKeys.WEIGHT_LOG.value: {}, DBKeys.MEAL_LOG.value: {}}
+            journal, included = b'', 0
+        else:
+            partition, journal, included = decode_partition(data)
+            if is_legacy_record(data):
+                self.dirty.add(month)
+
+        self.partitions[month] = partition
+        for record_number, change in self.pending.pop(month, []):
+            if journal != self.database.journal_header or record_number >= included:
+                self.apply_change(change)
+
+        return partition
+
+    def get_day_partition(self, date: str) -> dict:
+        """Get the weight and meal logs of the month of the date."""
+        return self.get_partition(to_month(date))
+
+    def record_change(self,
+                      change_type : JournalChange,
+                      date        : str,
+                      value       : Any
+                      ) -> None:
+        """Apply the change to the user's data, and append it to the journal.
+
+        The database is stored instead, if it has not been stored yet, or if
+        the journal has grown to JOURNAL_MAX_RECORDS records. Storing folds
+        the journal into the changed partitions.
+        """
+        change = [change_type.value, date, value]
+        self.apply_change(change)
+
+        if (not self.database.journal_length
+                or self.database.journal_records >= DatabaseSettings.JOURNAL_MAX_RECORDS.value):
+            self.store_db()
+        else:
+            self.database.append(encode_change(change))
+
+    def apply_change(self, change: list) -> None:
+        """Apply a journaled [change type, date, value] change to the user's data."""
+        change_type, date, value = change
+
+        handlers : Dict[str, Callable[[dict, str, Any], None]]
+        handlers = {JournalChange.SET_WEIGHT.value:  self.apply_set_weight,
+                    JournalChange.ADD_MEAL.value:    self.apply_add_meal,
+                    JournalChange.EDIT_MEAL.value:   self.apply_edit_meal,
+                    JournalChange.DELETE_MEAL.value: self.apply_delete_meal}
+        if change_type not in handlers:
+            raise CriticalError(f"Unknown journal change '{change_type}'.")
+
+        handlers[change_type](self.get_day_partition(date), date, value)
+        self.dirty.add(to_month(date))
+
+    @staticmethod
+    def apply_set_weight(partition: dict, date: str, weight_kg: float) -> None:
+        """Set the morning weight of the date in its partition."""
+        partition[DBKeys.WEIGHT_LOG.value][date] = weight_kg
+
+    def apply_add_meal(self, partition: dict, date: str, record: bytes) -> None:
+        """Add the meal record to the date's meal log in its partition."""
+        meals  = partition[DBKeys.MEAL_LOG.value].setdefault(date, {})
+        record = upgrade_meal_record(record, meals)
+        meals[Meal.get_id(record)] = record
+        if date in self.parsed_meals:
+            self.parsed_meals[date][Meal.get_id(record)] = Meal.from_bytes(record)
+
+    def apply_edit_meal(self, partition: dict, date: str, record: bytes) -> None:
+        """Replace the meal that has the same ID as the record in the date's meal log."""
+        meals   = partition[DBKeys.MEAL_LOG.value][date]
+        meal_id = Meal.get_id(record)
+        if meal_id not in meals:
+            raise CriticalError("The edited meal was not found in the meal log.")
+        meals[meal_id] = record
+        if date in self.parsed_meals:
+            self.parsed_meals[date][meal_id] = Meal.from_bytes(record)
+
+    def apply_delete_meal(self, partition: dict, date: str, meal_ref: Any) -> None:
+        """Delete the meal from the date's meal log.
+
+        Legacy journals refer to the deleted meal with its record instead of its ID.
+        """
+        meals   = partition[DBKeys.MEAL_LOG.value][date]
+        meal_id = meal_ref if isinstance(meal_ref, str) else find_legacy_meal_id(meal_ref, meals)
+        del meals[meal_id]
+        if date in self.parsed_meals:
+            del self.parsed_meals[date][meal_id]
+
+    def replay_change(self, record_number: int, change: list) -> None:
+        """Apply the journaled change, or defer it until its partition is loaded."""
+        month = to_month(change[1])
+        if month in self.partitions:
+            self.apply_change(change)
+        else:
+            self.pending.setdefault(month, []).append((record_number, change))
+
     @classmethod
     def from_database(cls, credentials: UserCredentials) -> 'User':
-        """Load user's private data from their encrypted database."""
-        serialized_data = EncryptedDatabase(credentials).load_db()
+        """Load user's private data from their encrypted database, and replay its journal.
+
+        Only the user's data is decrypted, the monthly partitions are loaded
+        when they are first accessed.
+        """
+        database        = EncryptedDatabase(credentials)
+        serialized_data = database.load_db()
         json_db         = json.loads(serialized_data)
 
-        name        = json_db[DBKeys.NAME.value]
         dob         = json_db[DBKeys.BIRTHDAY.value]
         height      = json_db[DBKeys.HEIGHT_CM.value]
         init_weight = json_db[DBKeys.INIT_WEIGHT_KG.value]
@@ -119,52 +265,98 @@ class User:  # pylint: disable=too-many-instance-attributes, too-many-public-met
         gender     = Gender(json_db[DBKeys.GENDER.value])
         pal        = PhysicalActivityLevel(json_db[DBKeys.PAL.value])
         diet_type  = DietType(json_db[DBKeys.DIET_TYPE.value])
-        weight_log = json.loads(json_db[DBKeys.WEIGHT_LOG.value])
-        meal_log   = json.loads(json_db[DBKeys.MEAL_LOG.value])
 
         user = User(credentials, dob, gender, init_weight, height, pal, diet_type)
 
-        user.name       = name
-        user.weight_log = weight_log
-        user.meal_log   = meal_log
+        user.name     = json_db[DBKeys.NAME.value]
+        user.database = database
+
+        # Databases stored before the partitioning contain the whole logs
+        is_unpartitioned = DBKeys.MEAL_LOG.value in json_db
+        if is_unpartitioned:
+            user.import_unpartitioned_logs(json_db)
+
+        for record_number, record in enumerate(database.load_journal()):
+            user.replay_change(record_number, decode_change(record))
+
+        if is_unpartitioned:
+            user.store_db()
 
         return user
 
+    def import_unpartitioned_logs(self, json_db: dict) -> None:
+        """Import the weight and meal logs of a database stored before the partitioning."""
+        for date, weight_kg in json.loads(json_db[DBKeys.WEIGHT_LOG.value]).items():
+            self.apply_change([JournalChange.SET_WEIGHT.value, date, weight_kg])
+        for date, meals in json.loads(json_db[DBKeys.MEAL_LOG.value]).items():
+            for meal in meals:
+                self.apply_change([JournalChange.ADD_MEAL.value, date, to_meal_record(meal)])
+
     # Setters
     # -------
 
     def set_morning_weight(self, weight_kg: float) -> None:
         """Set the morning weight for the day."""
-        self.weight_log[get_today_str()] = weight_kg
-        self.store_db()
+        self.record_change(JournalChange.SET_WEIGHT, get_today_str(), weight_kg)
 
     def add_meal(self, meal: 'Meal') -> None:
-        """Add meal to the meal log."""
-        if not get_today_str() in self.meal_log.keys():
-            self.meal_log[get_today_str()] = []
-        self.meal_log[get_today_str()].append(meal.serialize())
-        self.store_db()
+        """Add meal to the meal log.
+
+        A meal that is already in the day's meal log is logged again with a new ID.
+        """
+        if meal.meal_id in self.get_day_meal_log(get_today_str()):
+            meal.meal_id = Meal.new_id()
+        self.record_change(JournalChange.ADD_MEAL, get_today_str(), meal.to_bytes())
+
+    def edit_meal(self, meal: 'Meal') -> None:
+        """Replace the meal in the meal log with the meal that has the same ID."""
+        if meal.meal_id not in self.get_day_meal_log(get_today_str()):
+            return
+        self.record_change(JournalChange.EDIT_MEAL, get_today_str(), meal.to_bytes())
 
     def delete_meal(self, meal_to_delete: 'Meal') -> None:
         """Delete meal from the meal log."""
-        if not get_today_str() in self.meal_log.keys():
+        if meal_to_delete.meal_id not in self.get_day_meal_log(get_today_str()):
             return
-        self.meal_log[get_today_str()].remove(meal_to_delete.serialize())
-        self.store_db()
+        self.record_change(JournalChange.DELETE_MEAL, get_today_str(), meal_to_delete.meal_id)
 
     # Getters
     # -------
 
+    def get_day_meal_log(self, date: str) -> dict:
+        """Get the {meal ID: meal record} meal log of the date."""
+        return self.get_day_partition(date)[DBKeys.MEAL_LOG.value].get(date, {})
+
+    def get_parsed_meals(self, date: str) -> dict:
+        """Get the parsed {meal ID: Meal} meals of the date.
+
+        The meal records of the date are parsed on first access, after
+        which the parsed meals are kept in sync with the meal log.
+        """
+        if date not in self.parsed_meals:
+            self.parsed_meals[date] = {meal_id: Meal.from_bytes(record) for meal_id, record
+                                       in self.get_day_meal_log(date).items()}
+        return self.parsed_meals[date]
+
+    def get_meals(self, date: str) -> dict:
+        """Get the {meal ID: Meal} meals of the date.
+
+        The meals are copies of the parsed meals, so the caller can modify
+        them without changing the meal log. Changes are saved with edit_meal().
+        """
+        return {meal_id: meal.copy() for meal_id, meal in self.get_parsed_meals(date).items()}
+
+    def get_meal(self, date: str, meal_id: str) -> 'Meal':
+        """Get a copy of the meal of the date by its ID."""
+        return self.get_parsed_meals(date)[meal_id].copy()
+
     def get_todays_meals(self) -> list:
         """Return the list of meals for the day."""
-        try:
-            return [Meal.from_serialized_string(s) for s in self.meal_log[get_today_str()]]
-        except KeyError:
-            return []
+        return list(self.get_meals(get_today_str()).values())
 
     def get_todays_weight(self) -> float:
         """Get today's weight."""
-        return self.weight_log[get_today_str()]
+        return self.get_day_partition(get_today_str())[DBKeys.WEIGHT_LOG.value][get_today_str()]
 
     def get_age(self) -> float:
         """Return the current age of the user in years."""
@@ -173,11 +365,15 @@ class User:  # pylint: disable=too-many-instance-attributes, too-many-public-met
         return age_in_years
 
     def get_weight_log(self) -> dict:
-        """Get the user's weight log."""
-        return self.weight_log
+        """Get the user's weight log, which loads every monthly partition."""
+        months     = set(self.database.list_partitions()) | set(self.partitions) | set(self.pending)
+        weight_log = {}  # type: dict
+        for month in sorted(months):
+            weight_log.update(self.get_partition(month)[DBKeys.WEIGHT_LOG.value])
+        return weight_log
 
     # Has'ers
     # -------
     def has_weight_entry_for_the_day(self) -> bool:
         """Return True if the daily weight entry has been recorded."""
-        return get_today_str() in self.weight_log.keys()
+        return get_today_str() in self.get_day_partition(get_today_str())[DBKeys.WEIGHT_LOG.value]
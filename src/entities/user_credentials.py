@@ -85,10 +85,11 @@ class UserCredentials:
 
         raise IncorrectPassword("Incorrect password")
 
-    def encrypt(self, plaintext: bytes) -> bytes:
+    def encrypt(self, plaintext: bytes, associated_data: bytes = b'') -> bytes:
         """Encrypt the user data using XChaCha20-Poly1305 AEAD."""
-        return encrypt_and_sign(plaintext, self.__database_key)
+        return encrypt_and_sign(plaintext, self.__database_key, associated_data)
 
-    def decrypt(self, ciphertext: bytes) -> bytes:
+    def decrypt(self, ciphertext: bytes, associated_data: bytes = b'') -> bytes:
         """Authenticate the Poly1305 tag and return decrypted data."""
-        return auth_and_decrypt(ciphertext, self.__database_key)
+        return auth_and_decrypt(ciphertext, self.__database_key,
+                                associated_data=associated_data)
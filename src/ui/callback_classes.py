@@ -18,9 +18,10 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import typing
 
-from typing import Any
+from typing import Any, Callable
 
 if typing.TYPE_CHECKING:
+    from src.database.unencrypted_database import UnencryptedDatabase
     from src.ui.gui_menu import GUIMenu
 
 
@@ -52,6 +53,58 @@ class StringInput:
         self.value = value
 
 
+class PageSelector:
+    """Page navigation callback-object for keyset paginated listings."""
+
+    def __init__(self) -> None:
+        """Create new PageSelector object."""
+        self.after_keys = [None]  # type: list
+        self.next_key   = None    # type: Any
+
+    @property
+    def after_key(self) -> Any:
+        """Get the key the current page starts after."""
+        return self.after_keys[-1]
+
+    @property
+    def has_previous(self) -> bool:
+        """Return True if the current page is not the first page."""
+        return len(self.after_keys) > 1
+
+    def next_page(self) -> None:
+        """Move to the next page."""
+        if self.next_key is not None:
+            self.after_keys.append(self.next_key)
+
+    def previous_page(self) -> None:
+        """Move to the previous page."""
+        if self.has_previous:
+            self.after_keys.pop()
+
+
+class ListingCache:
+    """Keeps the entries listed by a screen until the listing changes.
+
+    The entries are reloaded only when the version of one of the databases,
+    or the state of the screen, e.g., the page or the search value, changed
+    since they were loaded.
+    """
+
+    def __init__(self, *databases: 'UnencryptedDatabase') -> None:
+        """Create new ListingCache object."""
+        self.databases = databases
+        self.key       = None  # type: Any
+        self.entries   = None  # type: Any
+
+    def get(self, state: tuple, load: Callable[[], Any]) -> Any:
+        """Get the entries, and reload them with `load()` if they are outdated."""
+        key = (*(database.poll_version() for database in self.databases), *state)
+        if key != self.key:
+            self.entries = load()
+            self.key     = key
+        return self.entries
+
+
 class DropSelection:
     """DropSelection input callback-object."""
 
@@ -18,9 +18,12 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import sys
 
+from concurrent.futures import Future
+from typing             import Any
+
 import pygame
 
-from src.common.exceptions import EscPressed
+from src.common.exceptions import EscPressed, ignored
 from src.common.enums      import Program, ColorScheme, AssetFiles, Color
 
 
@@ -51,6 +54,18 @@ class GUI:
         """Advance the clock by one tick."""
         self.clock.tick(Program.FPS.value)
 
+    def wait_for(self, future: Future) -> Any:
+        """Keep the window responsive until the future is done, and return its result.
+
+        The call the future is for cannot be cancelled, so pressing Esc is ignored.
+        """
+        while not future.done():
+            with ignored(EscPressed):
+                self.check_events()
+            self.draw_screen()
+            self.tick()
+        return future.result()
+
     def clear_screen(self) -> None:
         """Clear the screen."""
         self.display.fill(self.color.BACKGROUND.value)
@@ -25,11 +25,13 @@ from src.ui.screens.ingredient_menu.add_ingredient            import add_ingredi
 from src.ui.screens.ingredient_menu.select_ingredient_to_edit import select_ingredient_to_edit
 
 if typing.TYPE_CHECKING:
+    from src.database.database_executor    import DatabaseExecutor
     from src.database.unencrypted_database import IngredientDatabase
     from src.ui.gui import GUI
 
 
 def manage_ingredients_menu(gui           : 'GUI',
+                            executor      : 'DatabaseExecutor',
                             ingredient_db : 'IngredientDatabase'
                             ) -> None:
     """Render the Manage Ingredient sub menu."""
@@ -51,7 +53,7 @@ def manage_ingredients_menu(gui           : 'GUI',
             continue
 
         if edit_ingredient_bt.pressed:
-            select_ingredient_to_edit(gui, ingredient_db)
+            select_ingredient_to_edit(gui, executor, ingredient_db)
             continue
 
         if return_bt.pressed:
@@ -18,36 +18,58 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import typing
 
-from src.ui.callback_classes     import Button
+from src.database.unencrypted_database import IngredientDatabase
+
+from src.ui.callback_classes     import Button, PageSelector, StringInput
 from src.ui.gui_menu             import GUIMenu
 from src.ui.screens.show_message import show_message
+from src.ui.shared               import add_page_buttons, add_search_input
 
 from src.ui.screens.ingredient_menu.edit_ingredient import edit_ingredient
 
 if typing.TYPE_CHECKING:
-    from src.database.unencrypted_database import IngredientDatabase
+    from src.database.database_executor import DatabaseExecutor
     from src.ui.gui import GUI
 
 
 def select_ingredient_to_edit(gui           : 'GUI',
+                              executor      : 'DatabaseExecutor',
                               ingredient_db : 'IngredientDatabase'
                               ) -> None:
-    """Render the `Select Ingredient to Edit` menu."""
-    title = 'Select Ingredient to Edit'
+    """Render the `Select Ingredient to Edit` menu.
+
+    The ingredients are listed and looked up on the executor's thread.
+    """
+    title       = 'Select Ingredient to Edit'
+    search      = StringInput()
+    pages       = PageSelector()
+    ingredients = executor.proxy(IngredientDatabase)
     while True:
         menu = GUIMenu(gui, title)
 
-        list_of_ingredients = ingredient_db.get_list_of_ingredients()
-
-        if not list_of_ingredients:
+        if not gui.wait_for(ingredients.has_ingredients()):
             show_message(gui, title, 'No ingredients yet in database.')
             return
 
+        if search.value:
+            list_of_ingredients = gui.wait_for(ingredients.search(search.value))
+        else:
+            list_of_ingredients, pages.next_key = gui.wait_for(ingredients.page(pages.after_key))
+
+            # The entries of the last page might have all been deleted
+            if not list_of_ingredients and pages.has_previous:
+                pages.previous_page()
+                continue
+
         buttons   = {i.name: Button(menu, closes_menu=True) for i in list_of_ingredients}
         cancel_bt = Button(menu, closes_menu=True)
 
+        add_search_input(menu, search)
+
         for ingredient in list_of_ingredients:
             menu.menu.add.button(ingredient.name, action=buttons[ingredient.name].set_pressed)
+        if not search.value:
+            add_page_buttons(menu, pages)
         menu.menu.add.button('Cancel', action=cancel_bt.set_pressed)
 
         menu.start()
@@ -57,8 +79,8 @@ def select_ingredient_to_edit(gui           : 'GUI',
 
         for name, button in buttons.items():
             if button.pressed:
-                edit_ingredient(gui, ingredient_db, ingredient_db.get_ingredient(name))
+                edit_ingredient(gui, ingredient_db, gui.wait_for(ingredients.get_ingredient(name)))
 
                 # edit_ingredient might delete the last Ingredient before it returns
-                if not ingredient_db.get_list_of_ingredients():
+                if not gui.wait_for(ingredients.has_ingredients()):
                     return
@@ -22,9 +22,9 @@ from datetime import datetime
 
 from src.common.conversion import convert_input_fields
 from src.common.enums      import Format
-from src.common.exceptions import ReturnToMainMenu
+from src.common.exceptions import RecipeNotFound, ReturnToMainMenu
 
-from src.database.unencrypted_database import IngredientDatabase, RecipeDatabase
+from src.database.unencrypted_database import IngredientDatabase, MealprepDatabase, RecipeDatabase
 
 from src.entities.meal     import Meal
 from src.entities.mealprep import Mealprep
@@ -36,21 +36,26 @@ from src.ui.shared           import add_ingredient_gram_inputs
 from src.ui.screens.show_message import show_message
 
 if typing.TYPE_CHECKING:
-    from src.entities.user import User
-    from src.ui.gui        import GUI
+    from src.database.database_executor import DatabaseExecutor
+    from src.entities.user              import User
+    from src.ui.gui                     import GUI
 
 
-def log_mealprep_meal(gui           : 'GUI',
-                      user          : 'User',
-                      recipe_db     : 'RecipeDatabase',
-                      ingredient_db : IngredientDatabase,
-                      mealprep      : Mealprep
+def log_mealprep_meal(gui         : 'GUI',
+                      executor    : 'DatabaseExecutor',
+                      user        : 'User',
+                      mealprep_db : MealprepDatabase,
+                      mealprep    : Mealprep
                       ) -> None:
-    """Render the `Log Mealprep Meal` menu."""
+    """Render the `Log Mealprep Meal` menu.
+
+    The recipe and the accompaniments are looked up on the executor's
+    thread, and the mealprep is consumed through the GUI thread's database.
+    """
     title         = 'Log Mealprep Meal'
     error_message = ''
 
-    recipe = recipe_db.get_recipe(mealprep.recipe_name)
+    recipe = gui.wait_for(executor.proxy(RecipeDatabase).get_recipe(mealprep.recipe_name))
     keys   = [mealprep.recipe_name] + recipe.accompaniment_names
 
     failed_conversions = {}  # type: dict
@@ -88,10 +93,12 @@ def log_mealprep_meal(gui           : 'GUI',
             main_grams = weight_dict[mealprep.recipe_name]
             meal_nv    = mealprep.get_nv(for_grams=main_grams)
 
-            for ac_name in recipe.accompaniment_names:
-                ingredient = ingredient_db.get_ingredient(ac_name)
-                ac_nv      = ingredient.get_nv(for_grams=weight_dict[ac_name])
-                meal_nv   += ac_nv
+            accompaniments = executor.proxy(IngredientDatabase).get_ingredients(
+                recipe.accompaniment_names)
+
+            for ingredient in gui.wait_for(accompaniments):
+                ac_nv    = ingredient.get_nv(for_grams=weight_dict[ingredient.name])
+                meal_nv += ac_nv
 
             eat_tstamp = datetime.now().strftime(Format.DATETIME_TSTAMP.value)
             weight_dict.pop(mealprep.recipe_name)
@@ -99,6 +106,13 @@ def log_mealprep_meal(gui           : 'GUI',
             meal = Meal(recipe.name, eat_tstamp, main_grams, meal_nv, weight_dict)
 
             user.add_meal(meal)
-
-            show_message(gui, title, 'Meal has been successfully recorded.')
+            try:
+                remaining_grams = mealprep_db.consume(mealprep.recipe_name, main_grams)
+            except RecipeNotFound as exc:
+                show_message(gui, title, f'Meal has been successfully recorded. '
+                                         f'Mealprep {mealprep.recipe_name} has been removed.')
+                raise ReturnToMainMenu('Meal successfully added') from exc
+
+            show_message(gui, title, f'Meal has been successfully recorded. '
+                                     f'{remaining_grams:.0f}g of {mealprep.recipe_name} left.')
             raise ReturnToMainMenu('Meal successfully added')
@@ -36,16 +36,20 @@ from src.ui.shared           import add_ingredient_gram_inputs
 from src.ui.screens.show_message import show_message
 
 if typing.TYPE_CHECKING:
-    from src.entities.user import User
-    from src.ui.gui        import GUI
+    from src.database.database_executor import DatabaseExecutor
+    from src.entities.user              import User
+    from src.ui.gui                     import GUI
 
 
-def log_single_meal(gui           : 'GUI',
-                    user          : 'User',
-                    ingredient_db : IngredientDatabase,
-                    recipe        : Recipe
+def log_single_meal(gui      : 'GUI',
+                    executor : 'DatabaseExecutor',
+                    user     : 'User',
+                    recipe   : Recipe
                     ) -> None:
-    """Render the `Log Single Meal` menu."""
+    """Render the `Log Single Meal` menu.
+
+    The ingredients are looked up on the executor's thread.
+    """
     title = 'Log Single Meal'
     keys  = recipe.ingredient_names
 
@@ -82,11 +86,13 @@ def log_single_meal(gui           : 'GUI',
             meal_nv    = NutritionalValues()
             meal_grams = 0.0
 
-            for in_name in recipe.ingredient_names:
-                ingredient  = ingredient_db.get_ingredient(in_name)
-                in_nv       = ingredient.get_nv(for_grams=weight_dict[in_name])
+            ingredients = executor.proxy(IngredientDatabase).get_ingredients(
+                recipe.ingredient_names)
+
+            for ingredient in gui.wait_for(ingredients):
+                in_nv       = ingredient.get_nv(for_grams=weight_dict[ingredient.name])
                 meal_nv    += in_nv
-                meal_grams += weight_dict[in_name]
+                meal_grams += weight_dict[ingredient.name]
 
             eat_tstamp = datetime.now().strftime(Format.DATETIME_TSTAMP.value)
             meal       = Meal(recipe.name, eat_tstamp, meal_grams, meal_nv, accompaniment_grams={})
@@ -18,40 +18,86 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import typing
 
-from src.common.exceptions import ReturnToMainMenu
+from src.common.exceptions             import ReturnToMainMenu
+from src.database.unencrypted_database import MealprepDatabase, RecipeDatabase
 
-from src.ui.callback_classes import Button
+from src.ui.callback_classes import Button, ListingCache, PageSelector, StringInput
 from src.ui.gui_menu         import GUIMenu
+from src.ui.shared           import add_page_buttons, add_search_input
 
 from src.ui.screens.log_meal.log_mealprep_meal import log_mealprep_meal
 from src.ui.screens.log_meal.log_single_meal   import log_single_meal
 from src.ui.screens.show_message               import show_message
 
 if typing.TYPE_CHECKING:
-    from src.database.unencrypted_database import (MealprepDatabase, IngredientDatabase,
-                                                   RecipeDatabase)
-    from src.entities.user import User
-    from src.ui.gui        import GUI
-
-
-def select_meal_to_log(gui           : 'GUI',
-                       user          : 'User',
-                       mealprep_db   : 'MealprepDatabase',
-                       recipe_db     : 'RecipeDatabase',
-                       ingredient_db : 'IngredientDatabase',
+    from src.database.database_executor import DatabaseExecutor, DatabaseProxy
+    from src.entities.user              import User
+    from src.ui.gui                     import GUI
+
+
+def load_meals(gui       : 'GUI',
+               mealpreps : 'DatabaseProxy',
+               recipes   : 'DatabaseProxy',
+               pages     : PageSelector,
+               search    : StringInput
+               ) -> tuple:
+    """Load the single recipes and mealpreps listed on the `Select Meal` menu.
+
+    The queries run on the executor's thread while the GUI waits for them.
+    Returns the single recipes, the mealpreps, the key of the next page,
+    and whether the page had any meals before they were searched.
+    """
+    list_of_single_recipes, next_key = gui.wait_for(recipes.page(pages.after_key,
+                                                                 is_mealprep=False))
+
+    # The mealpreps are the few batches currently in the fridge, so they
+    # are listed in full, on the first page of the single recipes.
+    list_of_mealpreps = [] if pages.has_previous else [
+        m for m in gui.wait_for(mealpreps.get_list_of_mealpreps()) if m.remaining_grams > 0.0]
+
+    has_meals = bool(list_of_single_recipes or list_of_mealpreps)
+
+    if has_meals and search.value:
+        matches                = gui.wait_for(recipes.search(search.value))
+        list_of_single_recipes = [r for r in matches if not r.is_mealprep]
+        list_of_mealpreps      = [m for m in gui.wait_for(mealpreps.get_list_of_mealpreps())
+                                  if m.remaining_grams > 0.0
+                                  and any(m.recipe_name == r.name for r in matches)]
+
+    return list_of_single_recipes, list_of_mealpreps, next_key, has_meals
+
+
+def select_meal_to_log(gui         : 'GUI',
+                       executor    : 'DatabaseExecutor',
+                       user        : 'User',
+                       mealprep_db : MealprepDatabase,
+                       recipe_db   : RecipeDatabase
                        ) -> None:
-    """Render the `Select Meal` menu."""
-    title = 'Select Meal'
+    """Render the `Select Meal` menu.
+
+    The meals are only reloaded when the recipes or mealpreps changed, or
+    when the page or the search value changed. The meals are loaded and
+    looked up on the executor's thread.
+    """
+    title     = 'Select Meal'
+    search    = StringInput()
+    pages     = PageSelector()
+    listing   = ListingCache(recipe_db, mealprep_db)
+    recipes   = executor.proxy(RecipeDatabase)
+    mealpreps = executor.proxy(MealprepDatabase)
     while True:
         menu = GUIMenu(gui, title)
 
-        list_of_single_recipes = recipe_db.get_list_of_single_recipes()
-        list_of_mealpreps      = mealprep_db.get_list_of_mealpreps()
+        list_of_single_recipes, list_of_mealpreps, pages.next_key, has_meals = listing.get(
+            (pages.after_key, search.value),
+            lambda: load_meals(gui, mealpreps, recipes, pages, search))
 
-        if not list_of_single_recipes and not list_of_mealpreps:
+        if not has_meals:
             show_message(gui, title, 'No creatable meals yet in database.')
             return
 
+        add_search_input(menu, search)
+
         single_recipe_buttons = {f'{single_recipe.name}': Button(menu, closes_menu=True)
                                  for single_recipe in list_of_single_recipes}
 
@@ -65,9 +111,11 @@ def select_meal_to_log(gui           : 'GUI',
                                  action=single_recipe_buttons[single_recipe.name].set_pressed)
 
         for mealprep in list_of_mealpreps:
-            menu.menu.add.button(f'{str(mealprep)}',
+            menu.menu.add.button(f'{str(mealprep)} {mealprep.remaining_grams:.0f}g left',
                                  action=mealprep_buttons[mealprep.recipe_name].set_pressed)
 
+        if not search.value:
+            add_page_buttons(menu, pages)
         menu.menu.add.button('Cancel', action=cancel_bt.set_pressed)
 
         menu.start()
@@ -77,12 +125,12 @@ def select_meal_to_log(gui           : 'GUI',
 
         for single_recipe_name, button in single_recipe_buttons.items():
             if button.pressed:
-                recipe = recipe_db.get_recipe(single_recipe_name)
-                log_single_meal(gui, user, ingredient_db, recipe)
+                recipe = gui.wait_for(recipes.get_recipe(single_recipe_name))
+                log_single_meal(gui, executor, user, recipe)
                 raise ReturnToMainMenu('Meal added')
 
         for mealprep_name, button in mealprep_buttons.items():
             if button.pressed:
-                mealprep = mealprep_db.get_mealprep(mealprep_name)
-                log_mealprep_meal(gui, user, recipe_db, ingredient_db, mealprep)
+                mealprep = gui.wait_for(mealpreps.get_mealprep(mealprep_name))
+                log_mealprep_meal(gui, executor, user, mealprep_db, mealprep)
                 raise ReturnToMainMenu('Meal added')
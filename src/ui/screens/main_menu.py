@@ -39,12 +39,14 @@ from src.ui.screens.statistics.daily_overview              import show_daily_ove
 from src.ui.screens.statistics.progress                    import show_weight_progress
 
 if typing.TYPE_CHECKING:
+    from src.database.database_executor    import DatabaseExecutor
     from src.database.unencrypted_database import (IngredientDatabase, MealprepDatabase,
                                                    RecipeDatabase)
     from src.ui.gui import GUI
 
 
 def main_menu(gui           : 'GUI',
+              executor      : 'DatabaseExecutor',
               ingredient_db : 'IngredientDatabase',
               recipe_db     : 'RecipeDatabase',
               mealprep_db   : 'MealprepDatabase'
@@ -113,7 +115,7 @@ def main_menu(gui           : 'GUI',
             # ---
 
             if log_meal_bt.pressed and user is not None:
-                select_meal_to_log(gui, user, mealprep_db, recipe_db, ingredient_db)
+                select_meal_to_log(gui, executor, user, mealprep_db, recipe_db)
 
             if daily_overview_bt.pressed and user is not None:
                 show_daily_overview(gui, user, recipe_db)
@@ -128,15 +130,15 @@ def main_menu(gui           : 'GUI',
                 continue
 
             if mealprep_menu_bt.pressed:
-                manage_mealpreps_menu(gui, mealprep_db, recipe_db, ingredient_db)
+                manage_mealpreps_menu(gui, executor, mealprep_db, ingredient_db)
                 continue
 
             if recipe_menu_bt.pressed:
-                manage_recipes_menu(gui, user, recipe_db, ingredient_db)
+                manage_recipes_menu(gui, executor, user, recipe_db, ingredient_db)
                 continue
 
             if ingredient_menu_bt.pressed:
-                manage_ingredients_menu(gui, ingredient_db)
+                manage_ingredients_menu(gui, executor, ingredient_db)
                 continue
 
             # ---
@@ -40,7 +40,7 @@ def delete_meal(gui: 'GUI', user: 'User') -> None:
 
     while True:
         menu    = GUIMenu(gui, title)
-        buttons = {f'{meal.name} ({meal.eat_time})': (Button(menu, closes_menu=True), meal)
+        buttons = {meal.meal_id: (Button(menu, closes_menu=True), meal)
                    for meal in list_of_todays_meals}
 
         return_bt = Button(menu, closes_menu=True)
@@ -48,18 +48,16 @@ def delete_meal(gui: 'GUI', user: 'User') -> None:
         menu.menu.add.label('Select meal to delete')
         menu.menu.add.label('\n')
 
-        for name, button_meal_tup in buttons.items():
-            menu.menu.add.button(name, action=button_meal_tup[0].set_pressed)
+        for button, meal in buttons.values():
+            menu.menu.add.button(f'{meal.name} ({meal.eat_time})', action=button.set_pressed)
 
         menu.menu.add.label('\n', font_size=5)
         menu.menu.add.button('Return', action=return_bt.set_pressed)
         menu.start()
 
-        for name, button_meal_tup in buttons.items():
-            button = button_meal_tup[0]
-            meal   = button_meal_tup[1]
+        for button, meal in buttons.values():
             if button.pressed:
-                if get_yes(gui, title, f'Confirm deletion of {name}', 'No'):
+                if get_yes(gui, title, f'Confirm deletion of {meal.name} ({meal.eat_time})', 'No'):
                     user.delete_meal(meal)
                 list_of_todays_meals = user.get_todays_meals()
                 if not list_of_todays_meals:
@@ -84,9 +84,8 @@ def create_mealprep(gui           : 'GUI',
 
             mealprep_nv = NutritionalValues()
 
-            for ingredient_name in recipe.ingredient_names:
-                ingredient   = ingredient_db.get_ingredient(ingredient_name)
-                in_nv        = ingredient.get_nv(for_grams=weight_dict[ingredient_name])
+            for ingredient in ingredient_db.get_ingredients(recipe.ingredient_names):
+                in_nv        = ingredient.get_nv(for_grams=weight_dict[ingredient.name])
                 mealprep_nv += in_nv
 
             cook_date    = datetime.datetime.now().date().strftime(Format.DATETIME_DATE.value)
@@ -20,7 +20,7 @@ import typing
 
 
 from src.common.conversion import convert_input_fields
-from src.common.exceptions import ReturnToMainMenu
+from src.common.exceptions import RecipeNotFound, ReturnToMainMenu
 from src.common.enums      import Color
 
 from src.entities.mealprep           import Mealprep
@@ -97,9 +97,8 @@ def edit_mealprep(gui           : 'GUI',
 
             mealprep_nv = NutritionalValues()
 
-            for ingredient_name in orig_mealprep.ingredient_grams.keys():
-                ingredient   = ingredient_db.get_ingredient(ingredient_name)
-                in_nv        = ingredient.get_nv(for_grams=weight_dict[ingredient_name])
+            for ingredient in ingredient_db.get_ingredients(list(orig_mealprep.ingredient_grams)):
+                in_nv        = ingredient.get_nv(for_grams=weight_dict[ingredient.name])
                 mealprep_nv += in_nv
 
             new_mealprep = Mealprep(orig_mealprep.recipe_name, total_grams,
@@ -108,7 +107,11 @@ def edit_mealprep(gui           : 'GUI',
             recipe_id_changed = new_mealprep != orig_mealprep
 
             if not recipe_id_changed:
-                mealprep_db.replace_mealprep(new_mealprep)
+                try:
+                    mealprep_db.update_mealprep(new_mealprep)
+                except RecipeNotFound:
+                    show_message(gui, title, 'Mealprep has been removed in the meantime.')
+                    return
                 show_message(gui, title, 'Mealprep has been updated.')
                 raise ReturnToMainMenu("Mealprep updated.")
 
@@ -121,6 +124,6 @@ def edit_mealprep(gui           : 'GUI',
             if get_yes(gui, title,
                        f'Another mealprep {str(new_mealprep)} already exists. Overwrite(?)',
                        default_str='No'):
-                mealprep_db.replace_mealprep(new_mealprep)
+                mealprep_db.update_mealprep(new_mealprep)
                 show_message(gui, title, 'Mealprep has been replaced.')
                 raise ReturnToMainMenu("Mealprep replaced.")
@@ -21,18 +21,21 @@ import typing
 from src.ui.callback_classes import Button
 from src.ui.gui_menu         import GUIMenu
 
+from src.ui.screens.get_yes      import get_yes
+from src.ui.screens.show_message import show_message
+
 from src.ui.screens.mealprep_menu.select_mealprep_recipe  import select_mealprep_recipe_to_create
 from src.ui.screens.mealprep_menu.select_mealprep_to_edit import select_mealprep_to_edit
 
 if typing.TYPE_CHECKING:
-    from src.database.unencrypted_database import (IngredientDatabase, MealprepDatabase,
-                                                   RecipeDatabase)
+    from src.database.database_executor    import DatabaseExecutor
+    from src.database.unencrypted_database import IngredientDatabase, MealprepDatabase
     from src.ui.gui import GUI
 
 
 def manage_mealpreps_menu(gui           : 'GUI',
+                          executor      : 'DatabaseExecutor',
                           mealprep_db   : 'MealprepDatabase',
-                          recipe_db     : 'RecipeDatabase',
                           ingredient_db : 'IngredientDatabase',
                           ) -> None:
     """Render the Manage Mealprep sub menu."""
@@ -41,21 +44,44 @@ def manage_mealpreps_menu(gui           : 'GUI',
 
         create_mealprep_bt = Button(menu, closes_menu=True)
         edit_mealprep_bt   = Button(menu, closes_menu=True)
+        prune_mealprep_bt  = Button(menu, closes_menu=True)
         return_bt          = Button(menu, closes_menu=True)
 
         menu.menu.add.button('Create Mealprep', action=create_mealprep_bt.set_pressed)
         menu.menu.add.button('Edit Mealprep',   action=edit_mealprep_bt.set_pressed)
+        menu.menu.add.button('Remove Expired',  action=prune_mealprep_bt.set_pressed)
         menu.menu.add.button('Return',          action=return_bt.set_pressed)
 
         menu.start()
 
         if create_mealprep_bt.pressed:
-            select_mealprep_recipe_to_create(gui, mealprep_db, recipe_db, ingredient_db)
+            select_mealprep_recipe_to_create(gui, executor, mealprep_db, ingredient_db)
             continue
 
         if edit_mealprep_bt.pressed:
-            select_mealprep_to_edit(gui, mealprep_db, ingredient_db)
+            select_mealprep_to_edit(gui, executor, mealprep_db, ingredient_db)
+            continue
+
+        if prune_mealprep_bt.pressed:
+            remove_expired_mealpreps(gui, mealprep_db)
             continue
 
         if return_bt.pressed:
             return
+
+
+def remove_expired_mealpreps(gui         : 'GUI',
+                             mealprep_db : 'MealprepDatabase'
+                             ) -> None:
+    """Remove the mealpreps that are too old to eat, or that have been eaten."""
+    title   = 'Remove Expired Mealpreps'
+    expired = mealprep_db.get_expired_mealpreps()
+
+    if not expired:
+        show_message(gui, title, 'No expired or eaten mealpreps.')
+        return
+
+    names = ', '.join(str(mealprep) for mealprep in expired)
+    if get_yes(gui, title, f'Remove {names}?', default_str='No'):
+        removed = mealprep_db.prune_mealpreps()
+        show_message(gui, title, f'Removed {removed} mealprep(s).')
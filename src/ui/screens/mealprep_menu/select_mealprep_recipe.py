@@ -18,44 +18,84 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import typing
 
-from src.common.exceptions import ReturnToMainMenu
+from src.common.exceptions             import ReturnToMainMenu
+from src.database.unencrypted_database import RecipeDatabase
 
-from src.ui.callback_classes import Button
+from src.ui.callback_classes import Button, PageSelector, StringInput
 from src.ui.gui_menu         import GUIMenu
+from src.ui.shared           import add_page_buttons, add_search_input
 
 from src.ui.screens.mealprep_menu.create_mealprep import create_mealprep
 from src.ui.screens.show_message                  import show_message
 
 if typing.TYPE_CHECKING:
-    from src.database.unencrypted_database import (IngredientDatabase, MealprepDatabase,
-                                                   RecipeDatabase)
+    from src.database.database_executor    import DatabaseExecutor, DatabaseProxy
+    from src.database.unencrypted_database import IngredientDatabase, MealprepDatabase
     from src.ui.gui import GUI
 
 
+def load_mealprep_recipes(gui     : 'GUI',
+                          recipes : 'DatabaseProxy',
+                          pages   : PageSelector,
+                          search  : StringInput
+                          ) -> tuple:
+    """Load the mealprep recipes listed on the `Select Mealprep Recipe` menu.
+
+    The queries run on the executor's thread while the GUI waits for them.
+    Returns the recipes, the key of the next page, and whether the page
+    had any recipes before they were searched.
+    """
+    list_of_recipes, next_key = gui.wait_for(recipes.page(pages.after_key, is_mealprep=True))
+    has_recipes               = bool(list_of_recipes)
+
+    if has_recipes and search.value:
+        list_of_recipes = [r for r in gui.wait_for(recipes.search(search.value))
+                           if r.is_mealprep]
+
+    return list_of_recipes, next_key, has_recipes
+
+
+def add_recipe_buttons(menu: GUIMenu, list_of_recipes: list) -> dict:
+    """Add a button for each recipe, and return the buttons by recipe name."""
+    buttons = {recipe.name: Button(menu, closes_menu=True) for recipe in list_of_recipes}
+
+    for recipe in list_of_recipes:
+        author = f' ({recipe.author})' if recipe.author else ''
+        menu.menu.add.button(f'{recipe.name}{author}', action=buttons[recipe.name].set_pressed)
+
+    return buttons
+
+
 def select_mealprep_recipe_to_create(gui           : 'GUI',
+                                     executor      : 'DatabaseExecutor',
                                      mealprep_db   : 'MealprepDatabase',
-                                     recipe_db     : 'RecipeDatabase',
                                      ingredient_db : 'IngredientDatabase'
                                      ) -> None:
-    """Render the `Select Mealprep Recipe` menu."""
-    title = 'Select Mealprep Recipe'
+    """Render the `Select Mealprep Recipe` menu.
+
+    The recipes are listed a page or a search at a time, and looked up on
+    the executor's thread.
+    """
+    title   = 'Select Mealprep Recipe'
+    search  = StringInput()
+    pages   = PageSelector()
+    recipes = executor.proxy(RecipeDatabase)
     while True:
         menu = GUIMenu(gui, title)
 
-        list_of_recipes = recipe_db.get_list_of_mealprep_recipes()
-
-        if not list_of_recipes:
+        list_of_recipes, pages.next_key, has_recipes = load_mealprep_recipes(gui, recipes,
+                                                                             pages, search)
+        if not has_recipes:
             show_message(gui, title, 'No recipes yet in database.')
             return
 
-        buttons   = {recipe.name: Button(menu, closes_menu=True) for recipe in list_of_recipes}
-        cancel_bt = Button(menu, closes_menu=True)
+        add_search_input(menu, search)
 
-        for recipe in list_of_recipes:
-            author = f' ({recipe.author})' if recipe.author else ''
-            menu.menu.add.button(f'{recipe.name}{author}',
-                                 action=buttons[recipe.name].set_pressed)
+        buttons   = add_recipe_buttons(menu, list_of_recipes)
+        cancel_bt = Button(menu, closes_menu=True)
 
+        if not search.value:
+            add_page_buttons(menu, pages)
         menu.menu.add.button('Cancel', action=cancel_bt.set_pressed)
 
         menu.start()
@@ -65,5 +105,6 @@ def select_mealprep_recipe_to_create(gui           : 'GUI',
 
         for name, button in buttons.items():
             if button.pressed:
-                create_mealprep(gui, ingredient_db, mealprep_db, recipe_db.get_recipe(name))
+                create_mealprep(gui, ingredient_db, mealprep_db,
+                                gui.wait_for(recipes.get_recipe(name)))
                 raise ReturnToMainMenu('Mealprep created.')
@@ -18,33 +18,48 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import typing
 
-from src.ui.callback_classes import Button
+from src.database.unencrypted_database import MealprepDatabase
+
+from src.ui.callback_classes import Button, PageSelector
 from src.ui.gui_menu         import GUIMenu
+from src.ui.shared           import add_page_buttons
 
 from src.ui.screens.mealprep_menu.edit_mealprep import edit_mealprep
 from src.ui.screens.show_message                import show_message
 
 if typing.TYPE_CHECKING:
-    from src.database.unencrypted_database import MealprepDatabase, IngredientDatabase
+    from src.database.database_executor    import DatabaseExecutor
+    from src.database.unencrypted_database import IngredientDatabase
     from src.ui.gui import GUI
 
 
 def select_mealprep_to_edit(gui           : 'GUI',
-                            mealprep_db   : 'MealprepDatabase',
+                            executor      : 'DatabaseExecutor',
+                            mealprep_db   : MealprepDatabase,
                             ingredient_db : 'IngredientDatabase'
                             ) -> None:
-    """Render the `Select Mealprep to Edit` menu."""
-    title = 'Select Mealprep to Edit'
+    """Render the `Select Mealprep to Edit` menu.
+
+    The mealpreps are listed and looked up on the executor's thread.
+    """
+    title     = 'Select Mealprep to Edit'
+    pages     = PageSelector()
+    mealpreps = executor.proxy(MealprepDatabase)
 
     while True:
         menu = GUIMenu(gui, title)
 
-        list_of_mealpreps = mealprep_db.get_list_of_mealpreps()
-
-        if not list_of_mealpreps:
+        if not gui.wait_for(mealpreps.has_mealpreps()):
             show_message(gui, title, 'No mealpreps yet in database.')
             return
 
+        list_of_mealpreps, pages.next_key = gui.wait_for(mealpreps.page(pages.after_key))
+
+        # The entries of the last page might have all been deleted
+        if not list_of_mealpreps and pages.has_previous:
+            pages.previous_page()
+            continue
+
         buttons = {mealprep.recipe_name: Button(menu, closes_menu=True)
                    for mealprep in list_of_mealpreps}
 
@@ -54,6 +69,7 @@ def select_mealprep_to_edit(gui           : 'GUI',
             menu.menu.add.button(f'{str(mealprep)}',
                                  action=buttons[mealprep.recipe_name].set_pressed)
 
+        add_page_buttons(menu, pages)
         menu.menu.add.button('Cancel', action=cancel_bt.set_pressed)
 
         menu.start()
@@ -63,8 +79,9 @@ def select_mealprep_to_edit(gui           : 'GUI',
 
         for name, button in buttons.items():
             if button.pressed:
-                edit_mealprep(gui, mealprep_db, ingredient_db, mealprep_db.get_mealprep(name))
+                edit_mealprep(gui, mealprep_db, ingredient_db,
+                              gui.wait_for(mealpreps.get_mealprep(name)))
 
                 # If edit_mealprep deletes the last mealprep edit menu is no longer needed.
-                if not mealprep_db.get_list_of_mealpreps():
+                if not gui.wait_for(mealpreps.has_mealpreps()):
                     return
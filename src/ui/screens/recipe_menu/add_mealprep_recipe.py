@@ -20,7 +20,7 @@ import typing
 
 from typing import Optional
 
-from src.common.enums      import ColorScheme, FontSize
+from src.common.enums      import ColorScheme
 from src.common.exceptions import ReturnToMainMenu
 from src.common.validation import strings
 
@@ -29,6 +29,7 @@ from src.entities.user   import User
 
 from src.ui.callback_classes import Button, MultiSelection, StringInput
 from src.ui.gui_menu         import GUIMenu
+from src.ui.shared           import add_ingredient_selection, add_search_input
 
 from src.ui.screens.get_yes      import get_yes
 from src.ui.screens.show_message import show_message
@@ -47,11 +48,9 @@ def add_mealprep_recipe(gui           : 'GUI',
     title         = 'Add Mealprep Recipe'
     error_message = ''
 
-    available_ingredients = [(ingredient.name, ingredient)
-                             for ingredient in ingredient_db.get_list_of_ingredients()]
-
     name   = StringInput()
     author = StringInput()
+    search = StringInput()
 
     selected_ingredients    = MultiSelection()
     selected_accompaniments = MultiSelection()
@@ -62,24 +61,8 @@ def add_mealprep_recipe(gui           : 'GUI',
     if user is not None:
         author.set_value(user.name)
 
-    font_size = FontSize.FONT_SIZE_XSMALL.value
-
     while True:
         try:
-            # Find indexes of previously selected ingredients
-            selected_ingredient_indexes = []
-            for i, tuple_ in enumerate(available_ingredients):
-                _, ingredient = tuple_
-                if ingredient in selected_ingredients.sel_list:
-                    selected_ingredient_indexes.append(i)
-
-            # Find indexes of previously selected accompaniments
-            selected_accompaniment_indexes = []
-            for i, tuple_ in enumerate(available_ingredients):
-                _, ingredient = tuple_
-                if ingredient in selected_accompaniments.sel_list:
-                    selected_accompaniment_indexes.append(i)
-
             menu = GUIMenu(gui, title)
 
             done_bt   = Button(menu, closes_menu=True)
@@ -99,25 +82,13 @@ def add_mealprep_recipe(gui           : 'GUI',
                                      maxchar=19,
                                      font_color=ColorScheme.FONT_COLOR.value)
 
-            menu.menu.add.dropselect_multiple('Select ingredients: ',
-                                              onchange=selected_ingredients.set_value,
-                                              onreturn=selected_ingredients.set_value,
-                                              items=available_ingredients,  # type: ignore
-                                              default=selected_ingredient_indexes,
-                                              selection_box_height=len(available_ingredients),
-                                              selection_option_font_size=font_size,
-                                              **gui.drop_multi_selection_theme
-                                              )
-
-            menu.menu.add.dropselect_multiple('Select accompaniments: ',
-                                              onchange=selected_accompaniments.set_value,
-                                              onreturn=selected_accompaniments.set_value,
-                                              items=available_ingredients,  # type: ignore
-                                              default=selected_accompaniment_indexes,
-                                              selection_box_height=len(available_ingredients),
-                                              selection_option_font_size=font_size,
-                                              **gui.drop_multi_selection_theme
-                                              )
+            add_search_input(menu, search)
+
+            add_ingredient_selection(menu, gui, 'Select ingredients: ',
+                                     ingredient_db, search, selected_ingredients)
+
+            add_ingredient_selection(menu, gui, 'Select accompaniments: ',
+                                     ingredient_db, search, selected_accompaniments)
 
             menu.menu.add.label('\n', font_size=5)
             menu.menu.add.button('Done',   action=done_bt.set_pressed)
@@ -18,13 +18,14 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import typing
 
-from src.common.enums      import Color, ColorScheme, FontSize
+from src.common.enums      import Color, ColorScheme
 from src.common.validation import strings
 
 from src.entities.recipe import Recipe
 
 from src.ui.gui_menu         import GUIMenu
 from src.ui.callback_classes import Button, MultiSelection, StringInput
+from src.ui.shared           import add_ingredient_selection, add_search_input
 
 from src.ui.screens.get_yes      import get_yes
 from src.ui.screens.show_message import show_message
@@ -43,45 +44,20 @@ def edit_recipe(gui           : 'GUI',
     title         = 'Edit Recipe'
     error_message = ''
 
-    available_ingredients = [(ingredient.name, ingredient)
-                             for ingredient in ingredient_db.get_list_of_ingredients()]
-
     name = StringInput()
     name.set_value(orig_recipe.name)
 
     author = StringInput()
     author.set_value(orig_recipe.author)
 
+    search = StringInput()
+
     selected_ingredients    = MultiSelection()
     selected_accompaniments = MultiSelection()
 
     selected_ingredients.sel_list    = orig_recipe.ingredient_names
     selected_accompaniments.sel_list = orig_recipe.accompaniment_names
 
-    # Find indexes of previously selected ingredients
-    if not orig_recipe.ingredient_names:
-        selected_ingredient_indexes = None
-    else:
-        selected_ingredient_indexes = []
-
-        for i, tuple_ in enumerate(available_ingredients):
-            ing_name, ingredient = tuple_
-            if ing_name in selected_ingredients.sel_list:
-                selected_ingredient_indexes.append(i)
-
-    # Find indexes of previously selected accompaniments
-    if not orig_recipe.accompaniment_names:
-        selected_accompaniment_indexes = None
-    else:
-        selected_accompaniment_indexes = []
-
-        for i, tuple_ in enumerate(available_ingredients):
-            ing_name, ingredient = tuple_
-            if ing_name in selected_accompaniments.sel_list:
-                selected_accompaniment_indexes.append(i)
-
-    font_size = FontSize.FONT_SIZE_XSMALL.value
-
     while True:
         try:
             menu = GUIMenu(gui, title)
@@ -104,26 +80,14 @@ def edit_recipe(gui           : 'GUI',
                                      maxchar=19,
                                      font_color=ColorScheme.FONT_COLOR.value)
 
-            menu.menu.add.dropselect_multiple('Select ingredients: ',
-                                              onchange=selected_ingredients.set_value,
-                                              onreturn=selected_ingredients.set_value,
-                                              items=available_ingredients,  # type: ignore
-                                              default=selected_ingredient_indexes,
-                                              selection_box_height=len(available_ingredients),
-                                              selection_option_font_size=font_size,
-                                              **gui.drop_multi_selection_theme
-                                              )
+            add_search_input(menu, search)
+
+            add_ingredient_selection(menu, gui, 'Select ingredients: ',
+                                     ingredient_db, search, selected_ingredients)
 
             if orig_recipe.is_mealprep:
-                menu.menu.add.dropselect_multiple('Select accompaniments: ',
-                                                  onchange=selected_accompaniments.set_value,
-                                                  onreturn=selected_accompaniments.set_value,
-                                                  items=available_ingredients,  # type: ignore
-                                                  default=selected_accompaniment_indexes,
-                                                  selection_box_height=len(available_ingredients),
-                                                  selection_option_font_size=font_size,
-                                                  **gui.drop_multi_selection_theme
-                                                  )
+                add_ingredient_selection(menu, gui, 'Select accompaniments: ',
+                                         ingredient_db, search, selected_accompaniments)
 
             menu.menu.add.label('\n', font_size=5)
             menu.menu.add.button('Done', action=done_bt.set_pressed)
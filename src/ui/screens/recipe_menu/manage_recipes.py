@@ -29,12 +29,14 @@ from src.ui.screens.recipe_menu.select_recipe_to_edit import select_recipe_to_ed
 from src.ui.screens.show_message                      import show_message
 
 if typing.TYPE_CHECKING:
+    from src.database.database_executor    import DatabaseExecutor
     from src.database.unencrypted_database import IngredientDatabase, RecipeDatabase
     from src.entities.user import User
     from src.ui.gui        import GUI
 
 
 def manage_recipes_menu(gui           : 'GUI',
+                        executor      : 'DatabaseExecutor',
                         user          : Optional['User'],
                         recipe_db     : 'RecipeDatabase',
                         ingredient_db : 'IngredientDatabase'
@@ -68,7 +70,7 @@ def manage_recipes_menu(gui           : 'GUI',
             continue
 
         if edit_recipe_bt.pressed:
-            select_recipe_to_edit(gui, recipe_db, ingredient_db)
+            select_recipe_to_edit(gui, executor, recipe_db, ingredient_db)
             continue
 
         if return_bt.pressed:
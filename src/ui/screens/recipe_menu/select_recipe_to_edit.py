@@ -18,40 +18,63 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import typing
 
+from src.database.unencrypted_database import RecipeDatabase
+
 from src.ui.gui_menu             import GUIMenu
 from src.ui.screens.show_message import show_message
-from src.ui.callback_classes     import Button
+from src.ui.callback_classes     import Button, PageSelector, StringInput
+from src.ui.shared               import add_page_buttons, add_search_input
 
 from src.ui.screens.recipe_menu.edit_recipe import edit_recipe
 
 if typing.TYPE_CHECKING:
-    from src.database.unencrypted_database import IngredientDatabase, RecipeDatabase
+    from src.database.database_executor    import DatabaseExecutor
+    from src.database.unencrypted_database import IngredientDatabase
     from src.ui.gui import GUI
 
 
 def select_recipe_to_edit(gui           : 'GUI',
-                          recipe_db     : 'RecipeDatabase',
+                          executor      : 'DatabaseExecutor',
+                          recipe_db     : RecipeDatabase,
                           ingredient_db : 'IngredientDatabase'
                           ) -> None:
-    """Render the `Select Recipe to Edit` menu."""
-    title = 'Select Recipe to Edit'
+    """Render the `Select Recipe to Edit` menu.
+
+    The recipes are listed and looked up on the executor's thread.
+    """
+    title   = 'Select Recipe to Edit'
+    search  = StringInput()
+    pages   = PageSelector()
+    recipes = executor.proxy(RecipeDatabase)
     while True:
         menu = GUIMenu(gui, title)
 
-        list_of_recipes = recipe_db.get_list_of_recipes()
-
-        if not list_of_recipes:
+        if not gui.wait_for(recipes.has_recipes()):
             show_message(gui, title, 'No recipes yet in database.')
             return
 
+        if search.value:
+            list_of_recipes = gui.wait_for(recipes.search(search.value))
+        else:
+            list_of_recipes, pages.next_key = gui.wait_for(recipes.page(pages.after_key))
+
+            # The entries of the last page might have all been deleted
+            if not list_of_recipes and pages.has_previous:
+                pages.previous_page()
+                continue
+
         buttons   = {i.name: Button(menu, closes_menu=True) for i in list_of_recipes}
         cancel_bt = Button(menu, closes_menu=True)
 
+        add_search_input(menu, search)
+
         for recipe in list_of_recipes:
             author = f' ({recipe.author})' if recipe.author else ''
             menu.menu.add.button(f'{recipe.name}{author}',
                                  action=buttons[recipe.name].set_pressed)
 
+        if not search.value:
+            add_page_buttons(menu, pages)
         menu.menu.add.button('Cancel', action=cancel_bt.set_pressed)
 
         menu.start()
@@ -61,8 +84,8 @@ def select_recipe_to_edit(gui           : 'GUI',
 
         for name, button in buttons.items():
             if button.pressed:
-                edit_recipe(gui, recipe_db.get_recipe(name), recipe_db, ingredient_db)
+                edit_recipe(gui, gui.wait_for(recipes.get_recipe(name)), recipe_db, ingredient_db)
 
                 # edit_recipe might delete the last Recipe before it returns
-                if not recipe_db.get_list_of_recipes():
+                if not gui.wait_for(recipes.has_recipes()):
                     return
@@ -16,10 +16,19 @@ details. You should have received a copy of the GNU General Public License
 along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import typing
+
+from typing import Callable, Optional
+
 from src.common.enums      import Color, ColorScheme, FontSize
 from src.common.validation import floats, strings
 
-from src.ui.gui_menu import GUIMenu
+from src.ui.callback_classes import MultiSelection, PageSelector, StringInput
+from src.ui.gui_menu         import GUIMenu
+
+if typing.TYPE_CHECKING:
+    from src.database.unencrypted_database import IngredientDatabase
+    from src.ui.gui                        import GUI
 
 
 def add_ingredient_gram_inputs(menu               : GUIMenu,
@@ -69,3 +78,71 @@ def add_ingredient_attributes(menu               : GUIMenu,
                                  font_color=font_color,
                                  font_size=FontSize.FONT_SIZE_SMALL.value)
     failed_conversions.clear()
+
+
+def add_search_input(menu   : GUIMenu,
+                     search : StringInput
+                     ) -> None:
+    """Add search input that re-renders the menu with the matches when Enter is pressed."""
+    menu.menu.add.text_input('Search: ',
+                             onchange=search.set_value,
+                             onreturn=lambda _: menu.menu.disable(),
+                             default=search.value,
+                             valid_chars=strings,
+                             maxchar=19,
+                             font_color=ColorScheme.FONT_COLOR.value)
+
+
+def add_page_buttons(menu  : GUIMenu,
+                     pages : PageSelector
+                     ) -> None:
+    """Add buttons that re-render the menu with the previous or the next page."""
+    def change_page(change_method: Callable[[], None]) -> Callable[[], None]:
+        def callback() -> None:
+            change_method()
+            menu.menu.disable()
+        return callback
+
+    if pages.has_previous:
+        menu.menu.add.button('Previous page', action=change_page(pages.previous_page))
+    if pages.next_key is not None:
+        menu.menu.add.button('Next page', action=change_page(pages.next_page))
+
+
+def get_ingredient_choices(ingredient_db : 'IngredientDatabase',
+                           search        : StringInput,
+                           selected      : list
+                           ) -> tuple:
+    """Get the items of an ingredient selection, and the indexes of the selected items.
+
+    Only the ingredients that match the search are loaded, instead of the
+    whole table. The selected ingredients, given as names or Ingredients,
+    are listed first, so they stay selected when the search changes.
+    """
+    selected_names = [value if isinstance(value, str) else value.name for value in selected]
+    matches        = [ingredient.name for ingredient in ingredient_db.search(search.value)
+                      if ingredient.name not in selected_names]
+
+    items   = [(name, name) for name in selected_names + matches]
+    indexes = list(range(len(selected_names))) or None  # type: Optional[list]
+    return items, indexes
+
+
+def add_ingredient_selection(menu          : GUIMenu,
+                             gui           : 'GUI',
+                             title         : str,
+                             ingredient_db : 'IngredientDatabase',
+                             search        : StringInput,
+                             selection     : MultiSelection
+                             ) -> None:
+    """Add a selection of the ingredients that match the search."""
+    items, indexes = get_ingredient_choices(ingredient_db, search, selection.values)
+
+    menu.menu.add.dropselect_multiple(title,
+                                      onchange=selection.set_value,
+                                      onreturn=selection.set_value,
+                                      items=items,  # type: ignore
+                                      default=indexes,
+                                      selection_box_height=len(items),
+                                      selection_option_font_size=FontSize.FONT_SIZE_XSMALL.value,
+                                      **gui.drop_multi_selection_theme)
@@ -51,6 +51,17 @@ def coverage_report(ctx):
             "--cov-report=html", pty=True)
 
 
+@task
+def benchmark(ctx):
+    ctx.run("python3 benchmarks/benchmark_lookups.py", pty=True)
+    ctx.run("python3 benchmarks/benchmark_serialization.py", pty=True)
+
+
+@task
+def build_defaults(ctx):
+    ctx.run("python3 -m src.database.default_ingredient_database", pty=True)
+
+
 @task
 def mypy(ctx):
     ctx.run("python3 -m mypy src", pty=True)
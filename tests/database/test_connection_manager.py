@@ -0,0 +1,74 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+from src.common.exceptions import CriticalError
+
+from src.database.connection_manager   import ConnectionManager
+from src.database.unencrypted_database import (IngredientDatabase, MealprepDatabase,
+                                               RecipeDatabase)
+
+from tests.utils import cd_unit_test, cleanup
+
+
+class TestConnectionManager(unittest.TestCase):
+
+    def setUp(self) :
+        self.unit_test_dir = cd_unit_test()
+        self.manager       = ConnectionManager('test.sqlite3')
+
+    def tearDown(self) :
+        self.manager.close()
+        cleanup(self.unit_test_dir)
+
+    def test_connection_uses_wal_journal(self):
+        self.assertEqual(self.manager.get_pragma('journal_mode'), 'wal')
+        self.assertIsNone(self.manager.connection.isolation_level)
+
+    def test_configure(self):
+        self.manager.configure(synchronous='full', cache_size_kib=1024, mmap_size=0)
+
+        self.assertEqual(self.manager.get_pragma('synchronous'), 2)
+        self.assertEqual(self.manager.get_pragma('cache_size'), -1024)
+        self.assertEqual(self.manager.get_pragma('mmap_size'), 0)
+
+        with self.assertRaises(CriticalError):
+            self.manager.configure(synchronous='sometimes')
+
+    def test_get_manager_returns_shared_manager(self):
+        manager = ConnectionManager.get_manager('shared.sqlite3')
+        self.assertIs(ConnectionManager.get_manager('./shared.sqlite3'), manager)
+
+        manager.close()
+        self.assertIsNot(ConnectionManager.get_manager('shared.sqlite3'), manager)
+        ConnectionManager.get_manager('shared.sqlite3').close()
+
+    def test_databases_share_connection(self):
+        ingredient_db = IngredientDatabase()
+        recipe_db     = RecipeDatabase()
+        mealprep_db   = MealprepDatabase()
+
+        self.assertIs(ingredient_db.connection, recipe_db.connection)
+        self.assertIs(ingredient_db.connection, mealprep_db.connection)
+
+        ingredient_db.connection_manager.close()
+
+    def test_databases_use_provided_manager(self):
+        ingredient_db = IngredientDatabase(connection_manager=self.manager)
+        self.assertIs(ingredient_db.connection, self.manager.connection)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import unittest
+
+from src.common.exceptions             import CriticalError, IngredientNotFound
+from src.database.database_executor    import DatabaseExecutor
+from src.database.unencrypted_database import IngredientDatabase, RecipeDatabase
+from src.entities.ingredient           import Ingredient
+from src.entities.nutritional_values   import NutritionalValues
+
+from tests.utils import cd_unit_test, cleanup
+
+
+class TestDatabaseExecutor(unittest.TestCase):
+
+    def setUp(self) :
+        self.unit_test_dir = cd_unit_test()
+        self.database      = IngredientDatabase()
+        self.executor      = DatabaseExecutor((IngredientDatabase,))
+        self.ingredient_db = self.executor.proxy(IngredientDatabase)
+        self.ingredients   = [Ingredient(f'Food {i}', NutritionalValues(kcal=i)) for i in range(3)]
+
+    def tearDown(self) :
+        self.executor.shutdown()
+        cleanup(self.unit_test_dir)
+
+    def test_calls_run_on_the_executor_thread(self):
+        thread_name = self.executor.submit(IngredientDatabase,
+                                           lambda _: threading.current_thread().name).result()
+        self.assertNotEqual(thread_name, threading.current_thread().name)
+        self.assertTrue(thread_name.startswith('DatabaseExecutor'))
+
+    def test_calls_are_executed_in_order(self):
+        inserted = self.ingredient_db.insert_many(self.ingredients)
+        names    = self.ingredient_db.get_list_of_ingredient_names()
+
+        self.assertEqual(inserted.result(), 3)
+        self.assertEqual(names.result(), ['Food 0', 'Food 1', 'Food 2'])
+
+    def test_changes_are_visible_to_other_connections(self):
+        self.ingredient_db.insert_many(self.ingredients).result()
+
+        self.assertEqual(self.database.poll_version(), 1)
+        self.assertEqual(self.database.get_ingredient('Food 2').nv_per_g.kcal, 2)
+
+    def test_generators_are_collected_into_lists(self):
+        self.ingredient_db.insert_many(self.ingredients).result()
+
+        ingredients = self.ingredient_db.iter_ingredients().result()
+        self.assertEqual([i.name for i in ingredients], ['Food 0', 'Food 1', 'Food 2'])
+
+    def test_exceptions_are_raised_from_the_future(self):
+        with self.assertRaises(IngredientNotFound):
+            self.ingredient_db.get_ingredient('Missing').result()
+
+        with self.assertRaises(AttributeError):
+            _ = self.ingredient_db.does_not_exist
+
+        with self.assertRaises(CriticalError):
+            self.executor.proxy(RecipeDatabase).has_recipes()
+
+    def test_shutdown_runs_queued_calls(self):
+        future = self.ingredient_db.insert_many(self.ingredients)
+        self.executor.shutdown()
+
+        self.assertEqual(future.result(), 3)
+        self.assertIsNone(self.executor.connection_manager)
+        with self.assertRaises(RuntimeError):
+            self.ingredient_db.has_ingredients()
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -16,29 +16,53 @@ details. You should have received a copy of the GNU General Public License
 along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
+
+import sqlite3
 import unittest
 
-from src.database.default_ingredient_database import default_ingredients
+from src.common.enums                         import AssetFiles
+from src.database.default_ingredient_database import (build_default_ingredient_database,
+                                                      get_default_ingredients)
 from src.database.unencrypted_database        import IngredientDatabase
 
-from tests.utils import cd_unit_test, create_mock_user, cleanup
+from tests.utils import cd_unit_test, cleanup
 
 
 class TestDefaultIngredientDatabase(unittest.TestCase):
 
     def setUp(self) :
         self.unit_test_dir = cd_unit_test()
-        self.user          = create_mock_user()
+        self.path_to_db    = f'../{AssetFiles.DEFAULT_INGREDIENTS.value}'
 
     def tearDown(self) :
         cleanup(self.unit_test_dir)
 
-    def test_default_ingredients_can_be_imported(self):
+    def test_default_ingredients_can_be_copied(self):
+        ingredient_db = IngredientDatabase()
+
+        self.assertEqual(ingredient_db.copy_entries_from(self.path_to_db),
+                         len(get_default_ingredients()))
+        self.assertEqual(ingredient_db.copy_entries_from(self.path_to_db), 0)
+
+        self.assertEqual(ingredient_db.get_list_of_ingredient_names(),
+                         sorted(i.name for i in get_default_ingredients()))
+        self.assertEqual([i.name for i in ingredient_db.search('Blueb')], ['Blueberry'])
+
+    def test_prebuilt_database_is_up_to_date(self):
+        build_default_ingredient_database('DefaultIngredients.sqlite3')
+
+        select = f'SELECT * FROM {IngredientDatabase().table_name} ORDER BY rowid'
+        with sqlite3.connect('DefaultIngredients.sqlite3') as rebuilt, \
+             sqlite3.connect(self.path_to_db)          as shipped:
+            self.assertEqual(rebuilt.execute(select).fetchall(),
+                             shipped.execute(select).fetchall())
+
+    def test_values_are_normalized_per_gram(self):
         ingredient_db = IngredientDatabase()
+        ingredient_db.copy_entries_from(self.path_to_db)
+
+        self.assertEqual(ingredient_db.get_ingredient('Butter').nv_per_g.kcal, 7.2)
 
-        if not ingredient_db.get_list_of_ingredients():
-            for ingredient in default_ingredients:
-                ingredient_db.insert(ingredient)
 
-        self.assertEqual(len(default_ingredients),
-                         len(ingredient_db.get_list_of_ingredient_names()))
+if __name__ == '__main__':
+    unittest.main(exit=False)
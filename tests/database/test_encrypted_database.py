@@ -21,8 +21,9 @@ import unittest
 
 from unittest import mock
 
-from src.common.crypto import derive_database_key
-from src.common.enums  import Directories, DatabaseFileName
+from src.common.crypto     import derive_database_key
+from src.common.enums      import Directories, DatabaseFileName
+from src.common.exceptions import CriticalError, SecurityException
 
 from src.database.encrypted_database import EncryptedDatabase
 from src.entities.user_credentials   import UserCredentials
@@ -61,3 +62,109 @@ class TestEncryptedDatabase(unittest.TestCase):
 
         purp_data = database.load_db()
         self.assertEqual(purp_data, test_data)
+
+    def test_journal_records_are_loaded_in_order(self):
+        database = EncryptedDatabase(self.user_credentials)
+        with self.assertRaises(CriticalError):
+            database.append(b'record')
+
+        database.store_db(b'snapshot')
+        for record in [b'first', b'second']:
+            database.append(record)
+
+        new_database = EncryptedDatabase(self.user_credentials)
+        self.assertEqual(new_database.load_db(), b'snapshot')
+        self.assertEqual(new_database.load_journal(), [b'first', b'second'])
+
+        new_database.append(b'third')
+        database = EncryptedDatabase(self.user_credentials)
+        database.load_db()
+        self.assertEqual(database.load_journal(), [b'first', b'second', b'third'])
+
+    def test_storing_snapshot_empties_journal(self):
+        database = EncryptedDatabase(self.user_credentials)
+        database.store_db(b'snapshot')
+        database.append(b'first')
+        database.store_db(b'new snapshot')
+
+        database.load_db()
+        self.assertEqual(database.load_journal(), [])
+
+    def test_journal_of_old_snapshot_is_discarded(self):
+        database = EncryptedDatabase(self.user_credentials)
+        database.store_db(b'snapshot')
+        database.append(b'first')
+
+        with open(database.path_to_journal, 'rb') as f_ptr:
+            old_journal = f_ptr.read()
+        database.store_db(b'new snapshot')
+        with open(database.path_to_journal, 'wb') as f_ptr:
+            f_ptr.write(old_journal)
+
+        database.load_db()
+        self.assertEqual(database.load_journal(), [])
+        database.append(b'second')
+        database.load_db()
+        self.assertEqual(database.load_journal(), [b'second'])
+
+    def test_partial_record_is_ignored(self):
+        database = EncryptedDatabase(self.user_credentials)
+        database.store_db(b'snapshot')
+        database.append(b'first')
+        database.append(b'second')
+
+        with open(database.path_to_journal, 'r+b') as f_ptr:
+            f_ptr.truncate(os.path.getsize(database.path_to_journal) - 5)
+
+        database.load_db()
+        self.assertEqual(database.load_journal(), [b'first'])
+        database.append(b'third')
+        database.load_db()
+        self.assertEqual(database.load_journal(), [b'first', b'third'])
+
+    def test_shorter_record_replaces_partial_record(self):
+        database = EncryptedDatabase(self.user_credentials)
+        database.store_db(b'snapshot')
+        database.append(b'first')
+        database.append(1000 * b'long')
+
+        with open(database.path_to_journal, 'r+b') as f_ptr:
+            f_ptr.truncate(os.path.getsize(database.path_to_journal) - 5)
+
+        database.load_db()
+        database.load_journal()
+        database.append(b'short')
+        self.assertEqual(os.path.getsize(database.path_to_journal), database.journal_length)
+
+        database.load_db()
+        self.assertEqual(database.load_journal(), [b'first', b'short'])
+
+    def test_reordered_records_fail_authentication(self):
+        database = EncryptedDatabase(self.user_credentials)
+        database.store_db(b'snapshot')
+        database.append(b'first')
+        header_and_first = database.journal_length
+        database.append(b'second')
+
+        with open(database.path_to_journal, 'rb') as f_ptr:
+            journal = f_ptr.read()
+        with open(database.path_to_journal, 'wb') as f_ptr:
+            f_ptr.write(journal[:32] + journal[header_and_first:] + journal[32:header_and_first])
+
+        database.load_db()
+        with self.assertRaises(SecurityException):
+            database.load_journal()
+
+    def test_partitions(self):
+        database = EncryptedDatabase(self.user_credentials)
+        database.store_db(b'snapshot')
+        database.store_partition('2023-05', b'may')
+        database.store_partition('2023-04', b'april')
+
+        self.assertEqual(database.list_partitions(), ['2023-04', '2023-05'])
+        self.assertEqual(database.load_partition('2023-05'), b'may')
+        self.assertIsNone(database.load_partition('2023-06'))
+
+        os.replace(database.get_partition_path('2023-04'), database.get_partition_path('2023-06'))
+        with self.assertRaises(SecurityException):
+            database.load_partition('2023-06')
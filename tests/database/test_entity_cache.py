@@ -0,0 +1,54 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+from src.database.entity_cache import EntityCache
+
+
+class TestEntityCache(unittest.TestCase):
+
+    def setUp(self) :
+        self.cache = EntityCache(max_entries=2)
+
+    def test_get_counts_hits_and_misses(self):
+        self.assertIsNone(self.cache.get(('a',)))
+        self.cache.put(('a',), 1)
+        self.assertEqual(self.cache.get(('a',)), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_least_recently_used_entity_is_evicted(self):
+        self.cache.put(('a',), 1)
+        self.cache.put(('b',), 2)
+        self.cache.get(('a',))
+        self.cache.put(('c',), 3)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(('b',)))
+        self.assertEqual(self.cache.get(('a',)), 1)
+
+    def test_invalidate_and_clear(self):
+        self.cache.put(('a',), 1)
+        self.cache.put(('b',), 2)
+
+        self.cache.invalidate(('a',))
+        self.cache.invalidate(('does_not_exist',))
+        self.assertIsNone(self.cache.get(('a',)))
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import unittest
+
+from unittest import mock
+
+from src.common.exceptions             import ConversionError, CriticalError
+from src.database.ingredient_importer  import IngredientImporter
+from src.database.unencrypted_database import IngredientDatabase
+
+from tests.utils import cd_unit_test, cleanup
+
+
+class TestIngredientImporter(unittest.TestCase):
+
+    def setUp(self) :
+        self.unit_test_dir = cd_unit_test()
+        self.database = IngredientDatabase()
+        self.importer = IngredientImporter('FOODNAME', {'ENERC': ('kcal',         'kJ'),
+                                                        'PROT':  ('protein_g',    'g'),
+                                                        'VITC':  ('vitamin_c_mg', 'mg'),
+                                                        'VITD':  ('vitamin_d_ug', 'ug')})
+
+    def tearDown(self) :
+        cleanup(self.unit_test_dir)
+
+    def test_invalid_column_map_raises_critical_error(self):
+        for column_map in [{'PROT': ('does_not_exist', 'g')},
+                           {'PROT': ('protein_g',      'kJ')},
+                           {'ENERC': ('kcal',          'g')}]:
+            with self.assertRaises(CriticalError):
+                IngredientImporter('FOODNAME', column_map)
+
+        with self.assertRaises(CriticalError):
+            IngredientImporter('FOODNAME', {}, per_grams=0.0)
+
+    def test_values_are_converted_to_nv_units_per_gram(self):
+        ingredient = self.importer.to_ingredient({'FOODNAME': ' Orange ',
+                                                  'ENERC':    '418.4',
+                                                  'PROT':     '1.0',
+                                                  'VITC':     '50',
+                                                  'VITD':     ''})
+        self.assertEqual(ingredient.name, 'Orange')
+        self.assertAlmostEqual(ingredient.nv_per_g.kcal,         1.0)
+        self.assertAlmostEqual(ingredient.nv_per_g.protein_g,    0.01)
+        self.assertAlmostEqual(ingredient.nv_per_g.vitamin_c_mg, 0.5)
+        self.assertEqual(ingredient.nv_per_g.vitamin_d_ug, 0.0)
+
+    def test_units_are_scaled_by_their_multiplier(self):
+        importer   = IngredientImporter('name', {'vit_c': ('vitamin_c_mg', 'g'),
+                                                 'vit_d': ('vitamin_d_ug', 'mg')}, per_grams=1.0)
+        ingredient = importer.to_ingredient({'name': 'Pill', 'vit_c': 0.5, 'vit_d': 0.02})
+        self.assertAlmostEqual(ingredient.nv_per_g.vitamin_c_mg, 500.0)
+        self.assertAlmostEqual(ingredient.nv_per_g.vitamin_d_ug, 20.0)
+
+    def test_decimal_comma(self):
+        importer = IngredientImporter('FOODNAME', {'PROT': ('protein_g', 'g')}, decimal_comma=True)
+        self.assertAlmostEqual(
+            importer.to_ingredient({'FOODNAME': 'Egg', 'PROT': '12,5'}).nv_per_g.protein_g, 0.125)
+
+    def test_invalid_records_are_skipped(self):
+        on_skip = mock.MagicMock()
+        records = [{'FOODNAME': 'Valid',  'PROT': '1'},
+                   {'FOODNAME': '',       'PROT': '1'},
+                   {'FOODNAME': 'Minus',  'PROT': '-1'},
+                   {'FOODNAME': 'Text',   'PROT': 'abc'},
+                   {'FOODNAME': 'NaN',    'PROT': 'nan'},
+                   {'PROT': '1'}]
+
+        ingredients = list(self.importer.ingredients(records, on_skip))
+
+        self.assertEqual([i.name for i in ingredients], ['Valid'])
+        self.assertEqual(self.importer.skipped, 5)
+        self.assertEqual([c.args[0] for c in on_skip.call_args_list], [2, 3, 4, 5, 6])
+
+    def test_import_csv(self):
+        with open('foods.csv', 'w', encoding='utf-8') as f:
+            f.write('FOODNAME;ENERC;PROT\n')
+            for i in range(2500):
+                f.write(f'Food {i};{i};1.5\n')
+            f.write('Broken;x;1\n')
+
+        progress = mock.MagicMock()
+        imported = self.importer.import_file('foods.csv', self.database,
+                                             delimiter=';', progress=progress)
+
+        self.assertEqual(imported, 2500)
+        self.assertEqual(self.importer.skipped, 1)
+        self.assertEqual([c.args[0] for c in progress.call_args_list], [1000, 2000, 2500])
+        self.assertEqual(len(self.database.get_list_of_ingredient_names()), 2500)
+        self.assertAlmostEqual(self.database.get_ingredient('Food 10').nv_per_g.protein_g, 0.015)
+        self.assertEqual([i.name for i in self.database.search('Food 2499')], ['Food 2499'])
+
+    def test_import_json_replaces_existing_ingredients(self):
+        records = [{'FOODNAME': f'Food {i}', 'PROT': 2.0, 'notes': '[{"}]'} for i in range(300)]
+        with open('foods.json', 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=2)
+
+        self.importer.import_file('foods.json', self.database)
+        records[0]['PROT'] = 4.0
+        with open('foods.json', 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+
+        with mock.patch('src.database.ingredient_importer.JSON_CHUNK_SIZE', 7):
+            self.assertEqual(self.importer.import_file('foods.json', self.database), 300)
+
+        self.assertEqual(len(self.database.get_list_of_ingredient_names()), 300)
+        self.assertAlmostEqual(self.database.get_ingredient('Food 0').nv_per_g.protein_g, 0.04)
+
+    def test_invalid_json_raises_conversion_error(self):
+        for content in ['{"FOODNAME": "Food"}', '[{"FOODNAME": "Food"']:
+            with open('foods.json', 'w', encoding='utf-8') as f:
+                f.write(content)
+            with self.assertRaises(ConversionError):
+                list(IngredientImporter.read_json('foods.json'))
+
+    def test_invalid_json_object_raises_before_end_of_file(self):
+        with open('foods.json', 'w', encoding='utf-8') as f:
+            f.write('[{"FOODNAME": "Food"}, {"FOODNAME": Food}' + 1000 * ', {"FOODNAME": "Food"}')
+
+        records = []
+        with mock.patch('src.database.ingredient_importer.JSON_CHUNK_SIZE', 7):
+            with self.assertRaisesRegex(ConversionError, 'Invalid JSON object'):
+                for record in IngredientImporter.read_json('foods.json'):
+                    records.append(record)
+        self.assertEqual(records, [{'FOODNAME': 'Food'}])
+
+    def test_json_record_size_is_limited(self):
+        with open('foods.json', 'w', encoding='utf-8') as f:
+            f.write('[{"FOODNAME": "Food"}, {"FOODNAME": "' + 100 * 'a' + '"}]')
+
+        with mock.patch('src.database.ingredient_importer.JSON_CHUNK_SIZE',      7), \
+             mock.patch('src.database.ingredient_importer.JSON_MAX_RECORD_SIZE', 50):
+            with self.assertRaises(ConversionError):
+                list(IngredientImporter.read_json('foods.json'))
+
+    def test_failed_import_is_rolled_back(self):
+        with open('foods.json', 'w', encoding='utf-8') as f:
+            f.write('[{"FOODNAME": "Food", "PROT": 1}, {"FOODNAME": "Broken"')
+
+        with self.assertRaises(ConversionError):
+            self.importer.import_file('foods.json', self.database)
+
+        self.assertFalse(self.database.has_ingredients())
+        self.database.insert(self.importer.to_ingredient({'FOODNAME': 'Food'}))
+        self.assertEqual([i.name for i in self.database.search('Food')], ['Food'])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
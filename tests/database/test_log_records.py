@@ -0,0 +1,113 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import json
+import unittest
+
+from src.common.enums         import DBKeys
+from src.common.exceptions    import CriticalError
+from src.database.log_records import (decode_change, decode_partition, encode_change,
+                                      encode_partition, find_legacy_meal_id, index_meals,
+                                      is_legacy_record)
+
+from src.entities.meal               import Meal
+from src.entities.nutritional_values import NutritionalValues
+
+
+class TestLogRecords(unittest.TestCase):
+
+    def setUp(self) :
+        self.meal = Meal('test', '01/02/2023-15:30:45', 250.0,
+                         NutritionalValues(kcal=300.0), {'Water': 250.0})
+
+    def test_change_round_trip(self):
+        for change in [['set_weight',  '01/02/2023', 79.5],
+                       ['add_meal',    '01/02/2023', self.meal.to_bytes()],
+                       ['edit_meal',   '01/02/2023', self.meal.to_bytes()],
+                       ['delete_meal', '01/02/2023', self.meal.meal_id]]:
+            record = encode_change(change)
+            self.assertFalse(is_legacy_record(record))
+            self.assertEqual(decode_change(record), change)
+
+    def test_legacy_change_is_converted(self):
+        record = json.dumps(['add_meal', '01/02/2023', self.meal.serialize()]).encode()
+        self.assertTrue(is_legacy_record(record))
+        self.assertEqual(decode_change(record),
+                         ['add_meal', '01/02/2023', self.meal.to_bytes(version=1)])
+
+        legacy = self.meal.to_bytes(version=1)
+        record = b'\x01' + encode_change(['add_meal', '01/02/2023', legacy])[1:]
+        self.assertEqual(decode_change(record), ['add_meal', '01/02/2023', legacy])
+
+        record = b'\x01\x03' + encode_change(['add_meal', '01/02/2023', legacy])[2:]
+        self.assertEqual(decode_change(record), ['delete_meal', '01/02/2023', legacy])
+
+        record = json.dumps(['set_weight', '01/02/2023', 79.5]).encode()
+        self.assertEqual(decode_change(record), ['set_weight', '01/02/2023', 79.5])
+
+    def test_partition_round_trip(self):
+        other     = Meal('other', '01/02/2023-18:00:00', 100.0, NutritionalValues(), {})
+        meals     = {self.meal.meal_id: self.meal.to_bytes(), other.meal_id: other.to_bytes()}
+        partition = {DBKeys.WEIGHT_LOG.value: {'01/02/2023': 79.5, '02/02/2023': 79.4},
+                     DBKeys.MEAL_LOG.value:   {'01/02/2023': meals, '02/02/2023': {}}}
+
+        record = encode_partition(partition, bytes(32), 7)
+        self.assertEqual(decode_partition(record), (partition, bytes(32), 7))
+
+    def test_legacy_partition_is_converted(self):
+        partition = {DBKeys.WEIGHT_LOG.value: {'01/02/2023': 79.5},
+                     DBKeys.MEAL_LOG.value:   {'01/02/2023': [self.meal.serialize()]},
+                     DBKeys.JOURNAL.value:    ['ab' * 32, 3]}
+
+        converted, journal, included = decode_partition(json.dumps(partition).encode())
+        self.assertEqual(converted[DBKeys.WEIGHT_LOG.value], {'01/02/2023': 79.5})
+        self.assertEqual((journal, included), (bytes.fromhex('ab' * 32), 3))
+
+        meals = converted[DBKeys.MEAL_LOG.value]['01/02/2023']
+        self.assertEqual([Meal.from_bytes(record).meal_nv.kcal for record in meals.values()],
+                         [300.0])
+
+        # The IDs are derived from the content, so they are the same on every conversion
+        self.assertEqual(decode_partition(json.dumps(partition).encode())[0], converted)
+
+    def test_identical_legacy_meals_get_distinct_ids(self):
+        legacy = self.meal.to_bytes(version=1)
+        meals  = index_meals([legacy, legacy, self.meal.to_bytes()])
+
+        self.assertEqual(len(meals), 3)
+        self.assertIn(self.meal.meal_id, meals)
+        self.assertEqual({Meal.from_bytes(record).name for record in meals.values()}, {'test'})
+
+        legacy_id = find_legacy_meal_id(legacy, meals)
+        del meals[legacy_id]
+        self.assertNotEqual(find_legacy_meal_id(legacy, meals), legacy_id)
+
+        with self.assertRaises(CriticalError):
+            find_legacy_meal_id(Meal('x', '', 0.0, NutritionalValues(), {}).to_bytes(version=1),
+                                meals)
+
+    def test_unknown_version_raises_critical_error(self):
+        for record in [b'\x03' + encode_change(['set_weight', '01/02/2023', 79.5])[1:],
+                       b'\x01\x09' + encode_change(['set_weight', '01/02/2023', 79.5])[2:]]:
+            with self.assertRaises(CriticalError):
+                decode_change(record)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
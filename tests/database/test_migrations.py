@@ -0,0 +1,196 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import unittest
+
+from unittest import mock
+
+from src.common.exceptions           import CriticalError
+from src.database.connection_manager import ConnectionManager
+from src.database.migrations         import (add_missing_columns, gate_search_insert_triggers,
+                                             migrate, shared_database_migrations)
+from src.database.unencrypted_database import (IngredientDatabase, MealprepDatabase,
+                                               RecipeDatabase)
+from src.entities.ingredient           import Ingredient
+from src.entities.nutritional_values   import NutritionalValues
+
+from tests.utils import cd_unit_test, cleanup
+
+
+class TestMigrate(unittest.TestCase):
+
+    def setUp(self) :
+        self.unit_test_dir = cd_unit_test()
+        self.manager       = ConnectionManager('test.sqlite3')
+        self.cursor        = self.manager.connection.cursor()
+
+    def tearDown(self) :
+        self.manager.close()
+        cleanup(self.unit_test_dir)
+
+    def get_version(self) -> int:
+        return self.cursor.execute('PRAGMA user_version').fetchone()[0]
+
+    def test_new_database_is_stamped_with_latest_version(self):
+        migrations = [mock.MagicMock(), mock.MagicMock()]
+
+        self.assertEqual(migrate(self.manager, migrations), 0)
+        self.assertEqual(self.get_version(), 2)
+        for migration in migrations:
+            migration.assert_not_called()
+
+    def test_pending_migrations_are_applied_in_order(self):
+        self.cursor.execute('CREATE TABLE Test (a TEXT)')
+        self.cursor.execute('PRAGMA user_version = 1')
+        migrations = [mock.MagicMock(), mock.MagicMock(), mock.MagicMock()]
+
+        self.assertEqual(migrate(self.manager, migrations), 2)
+        self.assertEqual(self.get_version(), 3)
+        migrations[0].assert_not_called()
+        migrations[1].assert_called_once()
+        migrations[2].assert_called_once()
+
+    def test_current_database_is_skipped(self):
+        self.cursor.execute('CREATE TABLE Test (a TEXT)')
+        migrations = [mock.MagicMock()]
+
+        self.assertEqual(migrate(self.manager, migrations), 1)
+        self.manager.is_migrated = False
+        self.assertEqual(migrate(self.manager, migrations), 0)
+        migrations[0].assert_called_once()
+
+    def test_failed_migration_is_rolled_back(self):
+        self.cursor.execute('CREATE TABLE Test (a TEXT)')
+
+        def failing_migration(cursor):
+            cursor.execute('DROP TABLE Test')
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            migrate(self.manager, [failing_migration])
+
+        self.assertEqual(self.get_version(), 0)
+        self.assertFalse(self.manager.is_migrated)
+        self.assertEqual(self.cursor.execute('SELECT COUNT(*) FROM Test').fetchone()[0], 0)
+
+    def test_newer_database_raises_critical_error(self):
+        self.cursor.execute('CREATE TABLE Test (a TEXT)')
+        self.cursor.execute('PRAGMA user_version = 5')
+
+        with self.assertRaises(CriticalError):
+            migrate(self.manager, [mock.MagicMock()])
+
+    def test_old_ingredients_table_gains_nutrient_columns(self):
+        self.cursor.execute('CREATE TABLE Ingredients '
+                            '(name TEXT, grams_per_unit REAL, fixed_portion_g REAL, kcal REAL)')
+        self.cursor.execute("INSERT INTO Ingredients VALUES ('Oats', 100.0, 0.0, 3.7)")
+
+        self.assertEqual(migrate(self.manager), len(shared_database_migrations))
+
+        ingredient = IngredientDatabase(self.manager).get_ingredient('Oats')
+        self.assertEqual(ingredient.nv_per_g.kcal, 3.7)
+        self.assertEqual(ingredient.nv_per_g.creatine_g, 0.0)
+
+    def test_old_ingredients_table_is_deduped_and_indexed_for_search(self):
+        self.cursor.execute('CREATE TABLE Ingredients '
+                            '(name TEXT, grams_per_unit REAL, fixed_portion_g REAL, kcal REAL)')
+        self.cursor.executemany('INSERT INTO Ingredients VALUES (?, 100.0, 0.0, ?)',
+                                [('Oats', 3.7), ('Oat milk', 0.4), ('Oats', 3.8)])
+
+        migrate(self.manager)
+
+        database = IngredientDatabase(self.manager)
+        self.assertEqual(database.get_list_of_ingredient_names(), ['Oat milk', 'Oats'])
+        self.assertEqual(database.get_ingredient('Oats').nv_per_g.kcal, 3.8)
+        self.assertEqual([i.name for i in database.search('oat m')], ['Oat milk'])
+
+    def test_old_recipes_table_gains_ingredient_links(self):
+        self.cursor.execute('CREATE TABLE Recipes (name TEXT, author TEXT, ingredient_names TEXT,'
+                            ' accompaniment_names TEXT, is_mealprep TEXT)')
+        self.cursor.executemany('INSERT INTO Recipes VALUES (?, ?, ?, ?, ?)',
+                                [('Porridge', 'Alice', 'Oats\x1fWater', 'Butter', 'False'),
+                                 ('Tea',      'Alice', 'Water',          'None',   'False')])
+
+        migrate(self.manager)
+
+        database = RecipeDatabase(self.manager)
+        self.assertEqual([r.name for r in database.get_recipes_using(
+            Ingredient('Water', NutritionalValues()))], ['Porridge', 'Tea'])
+        self.assertEqual([r.name for r in database.get_recipes_using(
+            Ingredient('Butter', NutritionalValues()))], ['Porridge'])
+        self.assertEqual([r.name for r in database.search('porr')], ['Porridge'])
+
+    def test_old_mealpreps_table_gains_remaining_grams(self):
+        self.cursor.execute('CREATE TABLE Mealpreps (recipe_name TEXT, total_grams REAL,'
+                            ' cook_date TEXT, ingredient_grams TEXT, mealprep_nv TEXT)')
+        self.cursor.execute("INSERT INTO Mealpreps VALUES"
+                            " ('Soup', 1500.0, '01/05/2023', '{}', ?)",
+                            (NutritionalValues().serialize(),))
+
+        migrate(self.manager)
+
+        mealprep = MealprepDatabase(self.manager).get_mealprep('Soup')
+        self.assertEqual(mealprep.remaining_grams, 1500.0)
+
+    def test_sync_triggers_are_gated(self):
+        IngredientDatabase(self.manager)
+        for trigger in ('IngredientsSearch_insert', 'Ingredients_version_insert'):
+            self.cursor.execute(f'DROP TRIGGER {trigger}')
+            self.cursor.execute(f'CREATE TRIGGER {trigger} AFTER INSERT ON Ingredients'
+                                ' BEGIN SELECT 1; END')
+        self.cursor.execute('PRAGMA user_version = '
+                            f'{shared_database_migrations.index(gate_search_insert_triggers)}')
+        self.manager.is_migrated = False
+
+        IngredientDatabase(self.manager)
+
+        for trigger in ('IngredientsSearch_insert', 'Ingredients_version_insert'):
+            sql = self.cursor.execute('SELECT sql FROM sqlite_master WHERE name == ?',
+                                      (trigger,)).fetchone()[0]
+            self.assertIn('WHEN NOT EXISTS', sql)
+
+
+class TestMigrationHelpers(unittest.TestCase):
+
+    def setUp(self) :
+        self.unit_test_dir = cd_unit_test()
+        self.manager       = ConnectionManager('test.sqlite3')
+        self.cursor        = self.manager.connection.cursor()
+        self.cursor.execute('CREATE TABLE Test (name TEXT, grams REAL)')
+        self.cursor.executemany('INSERT INTO Test VALUES (?, ?)',
+                                [(f'Name {i}', float(i)) for i in range(10)])
+        self.cursor.execute("DELETE FROM Test WHERE name == 'Name 4'")
+
+    def tearDown(self) :
+        self.manager.close()
+        cleanup(self.unit_test_dir)
+
+    def test_add_missing_columns(self):
+        add_missing_columns(self.cursor, 'Test', {'name':  ('Name',  str),
+                                                  'grams': ('Grams', float),
+                                                  'kcal':  ('KCal',  float),
+                                                  'note':  ('Note',  str)})
+        add_missing_columns(self.cursor, 'DoesNotExist', {'kcal': ('KCal', float)})
+
+        self.assertEqual(self.cursor.execute('SELECT * FROM Test').fetchone(),
+                         ('Name 0', 0.0, 0.0, ''))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3.10
+# -*- coding: utf-8 -*-
+
+"""
+Calorinator - Diet tracker
+Copyright (C) 2023 Markus Ottela
+
+This file is part of Calorinator.
+Calorinator is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version. Calorinator is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License
+along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import unittest
+
+from src.database.nutrient_index import NutrientIndex
+
+
+class TestNutrientIndex(unittest.TestCase):
+
+    def setUp(self) :
+        self.index = NutrientIndex.from_rows([('a', 1.0, 100.0),
+                                              ('b', 2.0, 100.0),
+                                              ('c', 9.0, 900.0)], dimensions=2)
+
+    def test_nearest(self):
+        self.assertEqual(self.index.nearest((1.0, 100.0), k=2), ['a', 'b'])
+        self.assertEqual(self.index.nearest((8.0, 800.0), k=1), ['c'])
+        self.assertEqual(self.index.nearest((1.0, 100.0), k=5, exclude=['a']), ['b', 'c'])
+        self.assertEqual(self.index.nearest((1.0, 100.0), k=0), [])
+
+    def test_nutrients_are_standardized(self):
+        index = NutrientIndex.from_rows([('a', 0.0, 0.0),
+                                         ('b', 1.0, 0.0),
+                                         ('c', 0.0, 100.0)], dimensions=2)
+
+        # Without standardization, 'b' would be nearer as the kcal scale dominates
+        self.assertEqual(index.nearest((0.5, 60.0), k=1), ['c'])
+
+    def test_add_replace_and_remove(self):
+        self.index.add('d', (8.5, 850.0))
+        self.assertEqual(self.index.nearest((8.5, 850.0), k=1), ['d'])
+
+        self.index.add('d', (1.0, 100.0))
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.nearest((1.0, 100.0), k=2, exclude=['b']), ['a', 'd'])
+
+        self.index.remove('a')
+        self.index.remove('does_not_exist')
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.nearest((1.0, 100.0), k=3), ['d', 'b', 'c'])
+
+    def test_index_grows(self):
+        index = NutrientIndex(dimensions=1, capacity=1)
+        for i in range(10):
+            index.add(str(i), (float(i),))
+        self.assertEqual(index.nearest((6.9,), k=2), ['7', '6'])
+
+    def test_empty_index(self):
+        index = NutrientIndex.from_rows([], dimensions=2)
+        self.assertEqual(index.nearest((1.0, 1.0), k=3), [])
+        index.add('a', (1.0, 1.0))
+        self.assertEqual(index.nearest((1.0, 1.0), k=3), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -16,12 +16,14 @@ details. You should have received a copy of the GNU General Public License
 along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import datetime
+import sqlite3
 import unittest
 
-
 from src.common.enums      import DatabaseTableName
 from src.common.exceptions import CriticalError, IngredientNotFound, RecipeNotFound
 
+from src.database.connection_manager   import ConnectionManager
 from src.database.unencrypted_database import (UnencryptedDatabase, IngredientDatabase,
                                                RecipeDatabase, MealprepDatabase)
 
@@ -59,11 +61,21 @@ class TestUnencryptedDatabase(unittest.TestCase):
             'SELECT test_string1, test_string2 FROM Recipes').fetchall()[0]
         self.assertEqual(res, ('test_data1', 'test_data2'))
 
+    def test_transaction_takes_the_write_lock_when_it_begins(self) :
+        path_to_db = self.database.connection.execute('PRAGMA database_list').fetchone()[2]
+        other      = sqlite3.connect(path_to_db, timeout=0, isolation_level=None)
+        with self.database.transaction():
+            with self.assertRaises(sqlite3.OperationalError):
+                other.execute('BEGIN IMMEDIATE')
+        other.execute('BEGIN IMMEDIATE')
+        other.execute('ROLLBACK')
+        other.close()
+
     def test_get_list_of_entries(self) :
         self.assertEqual(self.database.get_list_of_entries(), [('test_data1', 'test_data2')])
 
 
-class TestIngredientDatabase(unittest.TestCase):
+class IngredientDatabaseTestCase(unittest.TestCase):
 
     def setUp(self) :
         self.unit_test_dir = cd_unit_test()
@@ -76,6 +88,9 @@ class TestIngredientDatabase(unittest.TestCase):
     def tearDown(self) :
         cleanup(self.unit_test_dir)
 
+
+class TestIngredientDatabase(IngredientDatabaseTestCase):
+
     def test_get_list_of_ingredients_returns_list_of_ingredients(self) :
         self.assertIsInstance(self.database.get_list_of_ingredients(), list)
         self.assertEqual(len(self.database.get_list_of_ingredients()), 0)
@@ -83,6 +98,39 @@ class TestIngredientDatabase(unittest.TestCase):
         self.database.insert(self.mock_ingredient1)
         self.assertEqual(len(self.database.get_list_of_ingredients()), 1)
 
+    def test_iter_ingredients_builds_full_ingredients(self):
+        self.assertEqual(list(self.database.iter_ingredients()), [])
+
+        self.database.insert(Ingredient('test_ingredient_2',
+                                        NutritionalValues(kcal=2, creatine_g=3),
+                                        grams_per_unit=50.0,
+                                        fixed_portion_g=25.0))
+        self.database.insert(self.mock_ingredient1)
+
+        ingredients = list(self.database.iter_ingredients())
+        self.assertEqual(ingredients, [Ingredient('test_ingredient_2', NutritionalValues()),
+                                       self.mock_ingredient1])
+        self.assertEqual(ingredients[0].nv_per_g, NutritionalValues(kcal=2, creatine_g=3))
+        self.assertEqual(ingredients[0].grams_per_unit,  50.0)
+        self.assertEqual(ingredients[0].fixed_portion_g, 25.0)
+
+    def test_insert_many_ingredients(self):
+        progress    = []
+        ingredients = (Ingredient(f'ingredient_{i}', NutritionalValues(kcal=i)) for i in range(5))
+
+        self.assertEqual(self.database.insert_many(ingredients, batch_size=2,
+                                                   progress=progress.append), 5)
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(self.database.get_ingredient('ingredient_4').nv_per_g.kcal, 4)
+
+    def test_insert_many_rolls_back_on_error(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.database.insert_many([self.mock_ingredient3,
+                                       self.mock_ingredient1,
+                                       self.mock_ingredient1_2], batch_size=1)
+
+        self.assertFalse(self.database.has_ingredients())
+
     def test_get_ingredient(self):
         self.database.insert(self.mock_ingredient1)
         ingredient = self.database.get_ingredient('test_ingredient_1')
@@ -92,6 +140,30 @@ class TestIngredientDatabase(unittest.TestCase):
         with self.assertRaises(IngredientNotFound):
             self.database.get_ingredient('does_not_exist')
 
+    def test_ingredient_name_with_quotes(self):
+        ingredient = Ingredient("Grandma's \"secret\" sauce", NutritionalValues(kcal=2))
+        self.database.insert(ingredient)
+
+        self.assertTrue(self.database.has_ingredient(ingredient))
+        self.assertEqual(self.database.get_ingredient(ingredient.name).nv_per_g.kcal, 2)
+
+        self.database.remove_ingredient(ingredient)
+        self.assertFalse(self.database.has_ingredient(ingredient))
+
+    def test_get_ingredients(self):
+        self.database.insert_many([self.mock_ingredient1, self.mock_ingredient3])
+
+        self.assertEqual(self.database.get_ingredients([]), [])
+        self.assertEqual(self.database.get_ingredients(['test_ingredient_3',
+                                                        'test_ingredient_1',
+                                                        'test_ingredient_3']),
+                         [self.mock_ingredient3, self.mock_ingredient1, self.mock_ingredient3])
+
+        with self.assertRaises(IngredientNotFound) as context:
+            self.database.get_ingredients(['missing_1', 'test_ingredient_1', 'missing_2'])
+        self.assertEqual(context.exception.args[0],
+                         "Could not find ingredients 'missing_1', 'missing_2'.")
+
     def test_remove_ingredient(self) :
         self.database.insert(self.mock_ingredient1)
 
@@ -122,6 +194,20 @@ class TestIngredientDatabase(unittest.TestCase):
         ingredient = self.database.get_ingredient('test_ingredient_1')
         self.assertEqual(ingredient.nv_per_g.kcal, 1)
 
+    def test_replace_ingredient_updates_entry_in_place(self):
+        self.database.insert(self.mock_ingredient1)
+        self.database.insert(self.mock_ingredient3)
+
+        self.database.replace_ingredient(self.mock_ingredient1_2)
+
+        self.assertEqual(self.database.get_list_of_ingredient_names(),
+                         ['test_ingredient_1', 'test_ingredient_3'])
+        self.assertEqual(self.database.get_ingredient('test_ingredient_1').nv_per_g.kcal, 1)
+
+    def test_replace_ingredient_inserts_missing_ingredient(self):
+        self.database.replace_ingredient(self.mock_ingredient3)
+        self.assertTrue(self.database.has_ingredient(self.mock_ingredient3))
+
     def test_has_ingredient(self):
         self.database.insert(self.mock_ingredient1)
 
@@ -132,12 +218,267 @@ class TestIngredientDatabase(unittest.TestCase):
         self.assertTrue(self.database.has_ingredient(self.mock_ingredient1))
         self.assertFalse(self.database.has_ingredient(self.mock_ingredient3))
 
+    def test_ingredient_name_is_unique_key(self):
+        self.database.insert(self.mock_ingredient1)
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.database.insert(self.mock_ingredient1_2)
+
+        plan = self.database.cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM Ingredients WHERE name == 'a'").fetchall()
+        self.assertIn('Ingredients_key', plan[0][-1])
+
     def test_has_ingredients(self) :
         self.assertFalse(self.database.has_ingredients())
         self.database.insert(self.mock_ingredient1)
         self.assertTrue(self.database.has_ingredients())
 
 
+class TestIngredientCache(IngredientDatabaseTestCase):
+
+    def test_get_ingredients_uses_cache(self):
+        self.database.enable_cache()
+        self.database.insert(self.mock_ingredient1)
+        self.database.cache.clear()
+
+        ingredients = self.database.get_ingredients(['test_ingredient_1'])
+        self.assertIs(self.database.get_ingredients(['test_ingredient_1'])[0], ingredients[0])
+
+    def test_ingredient_cache(self):
+        self.database.enable_cache(max_entries=1)
+        self.database.insert(self.mock_ingredient1)
+
+        ingredient = self.database.get_ingredient('test_ingredient_1')
+        self.assertIs(self.database.get_ingredient('test_ingredient_1'), ingredient)
+        self.assertIsNot(ingredient, self.mock_ingredient1)
+        self.assertEqual((self.database.cache.hits, self.database.cache.misses), (2, 0))
+
+        self.database.replace_ingredient(self.mock_ingredient1_2)
+        self.assertEqual(self.database.get_ingredient('test_ingredient_1').nv_per_g.kcal, 1)
+
+        self.database.insert(self.mock_ingredient3)
+        self.assertEqual(len(self.database.cache), 1)
+
+        self.database.remove_ingredient(self.mock_ingredient3)
+        with self.assertRaises(IngredientNotFound):
+            self.database.get_ingredient('test_ingredient_3')
+
+    def test_cache_is_cleared_on_rollback(self):
+        self.database.enable_cache()
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.database.insert_many([self.mock_ingredient3, self.mock_ingredient3])
+
+        with self.assertRaises(IngredientNotFound):
+            self.database.get_ingredient('test_ingredient_3')
+
+
+class TestIngredientVersions(IngredientDatabaseTestCase):
+
+    def test_version_is_bumped_by_changes(self):
+        version = self.database.get_version()
+
+        self.database.insert(self.mock_ingredient1)
+        self.database.replace_ingredient(self.mock_ingredient1_2)
+        self.database.remove_ingredient(self.mock_ingredient1_2)
+        self.assertEqual(self.database.get_version(), version + 3)
+
+        self.database.insert_many([self.mock_ingredient1, self.mock_ingredient3])
+        self.assertEqual(self.database.get_version(), version + 4)
+
+        # The triggers are resumed after the bulk insert
+        self.database.insert(Ingredient('test_ingredient_4', NutritionalValues()))
+        self.assertEqual(self.database.get_version(), version + 5)
+
+    def test_bulk_insert_keeps_the_schema(self):
+        schema_version = self.database.cursor.execute('PRAGMA schema_version').fetchone()[0]
+
+        self.database.insert_many([self.mock_ingredient1, self.mock_ingredient3])
+
+        self.assertEqual(self.database.cursor.execute('PRAGMA schema_version').fetchone()[0],
+                         schema_version)
+
+    def test_subscribers_are_notified_of_changes(self):
+        changes = []
+        self.database.subscribe(lambda *args: changes.append(args))
+
+        self.assertEqual(self.database.poll_version(), 0)
+        self.database.insert(self.mock_ingredient1)
+        self.database.insert(self.mock_ingredient3)
+        self.assertEqual(self.database.poll_version(), 2)
+        self.database.poll_version()
+
+        self.assertEqual(changes, [('Ingredients', 2)])
+
+    def test_changes_of_other_connections_clear_cache(self):
+        self.database.enable_cache()
+        self.database.insert(self.mock_ingredient1)
+        self.database.get_ingredient('test_ingredient_1')
+
+        changes = []
+        self.database.subscribe(lambda *args: changes.append(args))
+        self.database.poll_version()
+
+        other = ConnectionManager(self.database.connection_manager.path_to_db)
+        try:
+            IngredientDatabase(other).replace_ingredient(self.mock_ingredient1_2)
+        finally:
+            other.close()
+
+        self.assertEqual(self.database.get_ingredient('test_ingredient_1').nv_per_g.kcal, 1)
+        self.assertEqual(changes, [('Ingredients', 1), ('Ingredients', 2)])
+
+    def test_changes_of_other_tables_keep_cache(self):
+        self.database.enable_cache()
+        self.database.insert(self.mock_ingredient1)
+        self.database.get_ingredient('test_ingredient_1')
+        self.database.poll_version()
+
+        other = ConnectionManager(self.database.connection_manager.path_to_db)
+        try:
+            MealprepDatabase(other).insert(Mealprep('Soup', 1500.0, '01/05/2023', {},
+                                                    NutritionalValues()))
+        finally:
+            other.close()
+
+        self.database.get_ingredient('test_ingredient_1')
+        self.assertEqual(self.database.cache.hits, 2)
+
+
+class TestIngredientSearch(IngredientDatabaseTestCase):
+
+    def test_search_ingredients(self):
+        self.database.insert_many([Ingredient('Minced pork/cow (23%)', NutritionalValues()),
+                                   Ingredient('Pork chop',             NutritionalValues()),
+                                   Ingredient('Butter',                NutritionalValues())])
+
+        self.assertEqual([i.name for i in self.database.search('min po')],
+                         ['Minced pork/cow (23%)'])
+        self.assertCountEqual([i.name for i in self.database.search('po')],
+                              ['Minced pork/cow (23%)', 'Pork chop'])
+        self.assertEqual(self.database.search('"quoted'), [])
+        self.assertEqual(len(self.database.search('', limit=2)), 2)
+        self.assertEqual(len(self.database.search('p', limit=1)), 1)
+
+    def test_search_index_is_kept_in_sync(self):
+        self.database.insert(self.mock_ingredient1)
+        self.database.replace_ingredient(self.mock_ingredient1_2)
+        self.assertEqual(self.database.search('test'), [self.mock_ingredient1])
+
+        self.database.remove_ingredient(self.mock_ingredient1)
+        self.assertEqual(self.database.search('test'), [])
+
+    def test_bulk_insert_suspends_search_sync_without_dropping_trigger(self):
+        triggers = "SELECT sql FROM sqlite_master WHERE name == 'IngredientsSearch_insert'"
+        trigger  = self.database.cursor.execute(triggers).fetchone()
+
+        self.database.insert_many([self.mock_ingredient1, self.mock_ingredient3])
+        self.database.insert(Ingredient('test_ingredient_4', NutritionalValues()))
+
+        self.assertEqual(self.database.cursor.execute(triggers).fetchone(), trigger)
+        self.assertEqual(len(self.database.search('test_ing')), 3)
+        self.assertEqual(self.database.cursor.execute(
+            'SELECT COUNT(*) FROM SuspendedSyncs').fetchone()[0], 0)
+
+class TestIngredientPagination(IngredientDatabaseTestCase):
+
+    def test_page(self):
+        ingredients = [Ingredient(f'ingredient_{i}', NutritionalValues(kcal=float(5 - i)))
+                       for i in range(5)]
+        self.database.insert_many(reversed(ingredients))
+
+        page, next_key = self.database.page(limit=2)
+        self.assertEqual(page, ingredients[:2])
+        self.assertEqual(next_key, ('ingredient_1',))
+
+        page, next_key = self.database.page(next_key, limit=2)
+        self.assertEqual(page, ingredients[2:4])
+
+        page, next_key = self.database.page(next_key, limit=2)
+        self.assertEqual(page, ingredients[4:])
+        self.assertIsNone(next_key)
+
+    def test_page_order_by(self):
+        ingredients = [Ingredient(f'ingredient_{i}', NutritionalValues(kcal=float(i // 2)))
+                       for i in range(4)]
+        self.database.insert_many(ingredients)
+
+        page, next_key = self.database.page(limit=3, order_by=('kcal',))
+        self.assertEqual(page, ingredients[:3])
+        self.assertEqual(next_key, (1.0, 'ingredient_2'))
+        self.assertEqual(self.database.page(next_key, order_by=('kcal',)), (ingredients[3:], None))
+
+    def test_page_with_unknown_column_raises_critical_error(self):
+        with self.assertRaises(CriticalError):
+            self.database.page(order_by=('kcal; DROP TABLE Ingredients',))
+        with self.assertRaises(CriticalError):
+            self.database.page(where={'does_not_exist': 1})
+
+
+class TestIngredientQueries(IngredientDatabaseTestCase):
+
+    def test_query(self):
+        lentils = Ingredient('Lentils', NutritionalValues(kcal=3.5, protein_g=0.25, sugar_g=0.02))
+        cheese  = Ingredient('Cheese',  NutritionalValues(kcal=3.5, protein_g=0.30, sugar_g=0.00))
+        candy   = Ingredient('Candy',   NutritionalValues(kcal=4.0, protein_g=0.00, sugar_g=0.80))
+        tuna    = Ingredient('Tuna',    NutritionalValues(kcal=1.2, protein_g=0.26, sugar_g=0.00))
+        water   = Ingredient('Water',   NutritionalValues())
+        self.database.insert_many([lentils, cheese, candy, tuna, water])
+
+        self.assertEqual(self.database.query(protein_g__gte=0.2, sugar_g__lte=0.05),
+                         [cheese, lentils, tuna])
+        self.assertEqual(self.database.query(order_by='-protein_g/kcal', limit=2), [tuna, cheese])
+        self.assertEqual(self.database.query(order_by='sugar_g/kcal', protein_g__lt=0.26),
+                         [lentils, candy])
+        self.assertEqual(self.database.query(order_by='-kcal', kcal__ne=3.5), [candy, tuna, water])
+        self.assertEqual(self.database.query(kcal__eq=4.0), [candy])
+
+    def test_query_uses_expression_index(self):
+        self.database.create_expression_index('fiber_g/carbohydrates_g')
+        plan = self.database.cursor.execute(
+            'EXPLAIN QUERY PLAN ' + self.database.queries.select_matching(
+                (), self.database.to_expression('fiber_g/carbohydrates_g'), True), (1,)).fetchall()
+        self.assertIn('Ingredients_fiber_g_per_carbohydrates_g', str(plan))
+
+    def test_invalid_query_raises_critical_error(self):
+        for kwargs in [{'order_by': 'kcal/protein_g/fat_g'},
+                       {'order_by': 'name/kcal'},
+                       {'order_by': 'kcal; DROP TABLE Ingredients'},
+                       {'kcal__between': 1.0},
+                       {'kcal': 1.0},
+                       {'does_not_exist__lt': 1.0}]:
+            with self.assertRaises(CriticalError):
+                self.database.query(**kwargs)
+
+    def test_similar(self):
+        butter    = Ingredient('Butter',    NutritionalValues(kcal=7.2, fat_g=0.80))
+        margarine = Ingredient('Margarine', NutritionalValues(kcal=5.2, fat_g=0.57))
+        cucumber  = Ingredient('Cucumber',  NutritionalValues(kcal=0.1, fat_g=0.00))
+        self.database.insert_many([butter, margarine, cucumber])
+
+        self.assertEqual(self.database.similar(butter, k=1), [margarine])
+
+        # The index follows the writes of the database
+        oil = Ingredient('Oil', NutritionalValues(kcal=7.0, fat_g=0.78))
+        self.database.insert(oil)
+        self.assertEqual(self.database.similar(butter, k=2), [oil, margarine])
+
+        self.database.remove_ingredient(oil)
+        self.database.replace_ingredient(Ingredient('Cucumber', NutritionalValues(kcal=7.1,
+                                                                                  fat_g=0.79)))
+        self.assertEqual([i.name for i in self.database.similar(butter, k=2)],
+                         ['Cucumber', 'Margarine'])
+
+        # The index is rebuilt after the writes of other connections
+        other = ConnectionManager(self.database.connection_manager.path_to_db)
+        try:
+            IngredientDatabase(other).insert(oil)
+        finally:
+            other.close()
+        self.assertEqual([i.name for i in self.database.similar(butter, k=2)],
+                         ['Cucumber', 'Oil'])
+
+
 class TestRecipeDatabase(unittest.TestCase):
 
     def setUp(self) :
@@ -169,6 +510,19 @@ class TestRecipeDatabase(unittest.TestCase):
         self.assertEqual(self.recipe_database.get_list_of_recipes(),
                          [self.mock_recipe1, self.mock_recipe3])
 
+    def test_page(self):
+        for recipe in [self.mock_mp_recipe, self.mock_recipe3, self.mock_recipe1]:
+            self.recipe_database.insert_recipe(recipe)
+
+        page, next_key = self.recipe_database.page(limit=2)
+        self.assertEqual(page, [self.mock_recipe1, self.mock_recipe3])
+        self.assertEqual(next_key, ('test_recipe_3', 'tester'))
+        self.assertEqual(self.recipe_database.page(next_key), ([self.mock_mp_recipe], None))
+
+        self.assertEqual(self.recipe_database.page(is_mealprep=True), ([self.mock_mp_recipe], None))
+        self.assertEqual(self.recipe_database.page(('test_recipe_1', 'tester'), is_mealprep=False),
+                         ([self.mock_recipe3], None))
+
     def test_get_list_of_single_recipes(self):
         self.assertEqual(self.recipe_database.get_list_of_single_recipes(), [])
 
@@ -191,6 +545,15 @@ class TestRecipeDatabase(unittest.TestCase):
         self.assertEqual(self.recipe_database.get_list_of_mealprep_recipes(),
                          [self.mock_mp_recipe])
 
+    def test_filtered_recipe_listing_uses_index(self):
+        plan = self.recipe_database.cursor.execute(
+            'EXPLAIN QUERY PLAN ' + self.recipe_database.select_by_mealprep, ('True',)).fetchall()
+        self.assertIn('Recipes_is_mealprep', plan[0][-1])
+
+    def test_search_recipes(self):
+        self.recipe_database.insert_many([self.mock_recipe1, self.mock_mp_recipe])
+        self.assertEqual(self.recipe_database.search('test_recipe_m'), [self.mock_mp_recipe])
+
     def test_get_recipe(self):
         self.recipe_database.insert_recipe(self.mock_recipe1)
         recipe1 = self.recipe_database.get_recipe('test_recipe_1')
@@ -200,6 +563,48 @@ class TestRecipeDatabase(unittest.TestCase):
         with self.assertRaises(RecipeNotFound):
             self.recipe_database.get_recipe('test_recipe_1', author='does_not_exist')
 
+    def test_get_recipes_using(self):
+        butter = Ingredient('Butter', NutritionalValues())
+        salt   = Ingredient('Salt',   NutritionalValues())
+
+        # Test invalid parameter raises CriticalError
+        with self.assertRaises(CriticalError):
+            self.recipe_database.get_recipes_using('Salt')
+
+        self.recipe_database.insert_many([self.mock_recipe1, self.mock_mp_recipe])
+        self.recipe_database.insert_recipe(self.mock_recipe3)
+
+        self.assertEqual(self.recipe_database.get_recipes_using(butter), [])
+        self.assertCountEqual(self.recipe_database.get_recipes_using(salt),
+                              [self.mock_recipe1, self.mock_recipe3, self.mock_mp_recipe])
+
+        self.recipe_database.replace_recipe(self.mock_recipe1_2)
+        self.recipe_database.remove_recipe(self.mock_recipe3)
+        self.assertEqual(self.recipe_database.get_recipes_using(salt), [self.mock_mp_recipe])
+
+        plan = self.recipe_database.cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT recipe_name FROM RecipeIngredients "
+            "WHERE ingredient_name == 'Salt'").fetchall()
+        self.assertIn('RecipeIngredients_ingredient', plan[0][-1])
+
+    def test_recipe_cache(self):
+        self.recipe_database.enable_cache()
+        self.recipe_database.insert_recipe(self.mock_recipe1)
+
+        recipe = self.recipe_database.get_recipe('test_recipe_1')
+        self.assertIs(self.recipe_database.get_recipe('test_recipe_1'), recipe)
+        self.assertEqual(recipe.ingredient_names, ['Water', 'Salt'])
+
+        self.recipe_database.replace_recipe(self.mock_recipe1_2)
+        self.assertEqual(self.recipe_database.get_recipe('test_recipe_1').ingredient_names,
+                         ['Water'])
+        recipe = self.recipe_database.get_recipe('test_recipe_1', 'tester')
+        self.assertEqual(recipe.ingredient_names, ['Water'])
+
+        self.recipe_database.remove_recipe(self.mock_recipe1_2)
+        with self.assertRaises(RecipeNotFound):
+            self.recipe_database.get_recipe('test_recipe_1')
+
     def test_insert_recipe(self):
 
         # Test invalid parameter raises CriticalError
@@ -212,6 +617,12 @@ class TestRecipeDatabase(unittest.TestCase):
 
         self.assertEqual(res, ('test_recipe_1', 'tester', 'Water\x1fSalt', 'None', 'False'))
 
+    def test_insert_many_recipes(self):
+        self.assertEqual(self.recipe_database.insert_many([self.mock_recipe1,
+                                                           self.mock_mp_recipe]), 2)
+        self.assertEqual(self.recipe_database.get_list_of_recipes(),
+                         [self.mock_recipe1, self.mock_mp_recipe])
+
     def test_has_recipe(self):
         self.recipe_database.insert_recipe(self.mock_recipe1)
 
@@ -222,6 +633,22 @@ class TestRecipeDatabase(unittest.TestCase):
         self.assertTrue(self.recipe_database.has_recipe(self.mock_recipe1))
         self.assertFalse(self.recipe_database.has_recipe(self.mock_recipe3))
 
+    def test_has_recipe_matches_name_and_author(self):
+        self.recipe_database.insert_recipe(self.mock_recipe1)
+        other_author = Recipe('test_recipe_1', 'other', [], [], False)
+
+        self.assertFalse(self.recipe_database.has_recipe(other_author))
+        self.recipe_database.insert_recipe(other_author)
+        self.assertTrue(self.recipe_database.has_recipe(other_author))
+
+        self.recipe_database.remove_recipe(other_author)
+        self.assertEqual(self.recipe_database.get_list_of_recipes(), [self.mock_recipe1])
+
+    def test_has_recipes(self):
+        self.assertFalse(self.recipe_database.has_recipes())
+        self.recipe_database.insert_recipe(self.mock_recipe1)
+        self.assertTrue(self.recipe_database.has_recipes())
+
     def test_remove_recipe(self) :
         self.recipe_database.insert_recipe(self.mock_recipe1)
 
@@ -300,6 +727,29 @@ class TestMealprepDatabase(unittest.TestCase):
 
         self.assertIsInstance(self.mealprep_database.get_mealprep('test_mealprep_1'), Mealprep)
 
+    def test_get_mealprep_keeps_nutritional_values(self):
+        mealprep = Mealprep('test_mealprep_2',
+                            total_grams=200.0,
+                            cook_date='14/05/2023',
+                            ingredient_grams={'Water': 200},
+                            mealprep_nv=NutritionalValues(kcal=400))
+        self.mealprep_database.insert_mealprep(mealprep)
+
+        self.assertAlmostEqual(self.mealprep_database.get_mealprep('test_mealprep_2')
+                               .get_nv(for_grams=100).kcal, 200)
+
+    def test_mealprep_cache(self):
+        self.mealprep_database.enable_cache()
+        self.mealprep_database.insert_mealprep(self.mock_mealprep1)
+
+        mealprep = self.mealprep_database.get_mealprep('test_mealprep_1')
+        self.assertIs(self.mealprep_database.get_mealprep('test_mealprep_1'), mealprep)
+        self.assertEqual(self.mealprep_database.cache.misses, 0)
+
+        self.mealprep_database.remove_mealprep(self.mock_mealprep1)
+        with self.assertRaises(RecipeNotFound):
+            self.mealprep_database.get_mealprep('test_mealprep_1')
+
     def test_insert_mealprep(self):
 
         # Test invalid parameter raises CriticalError
@@ -323,7 +773,14 @@ class TestMealprepDatabase(unittest.TestCase):
                                "'vitamin_b12_ug': 0.0, 'vitamin_c_mg': 0.0, 'calcium_mg': 0.0, "
                                "'chromium_ug': 0.0, 'iodine_ug': 0.0, 'potassium_mg': 0.0,"
                                " 'iron_mg': 0.0, 'magnesium_mg': 0.0, 'zinc_mg': 0.0,"
-                               " 'caffeine_mg': 0.0, 'creatine_g': 0.0}"))
+                               " 'caffeine_mg': 0.0, 'creatine_g': 0.0}",
+                               150.0))
+
+    def test_insert_many_mealpreps(self):
+        self.assertEqual(self.mealprep_database.insert_many(iter([self.mock_mealprep1,
+                                                                  self.mock_mealprep3])), 2)
+        self.assertEqual(self.mealprep_database.get_list_of_mealprep_names(),
+                         ['test_mealprep_1', 'test_mealprep_3'])
 
     def test_has_mealprep(self):
         self.mealprep_database.insert_mealprep(self.mock_mealprep1)
@@ -363,3 +820,93 @@ class TestMealprepDatabase(unittest.TestCase):
 
         mealprep = self.mealprep_database.get_mealprep('test_mealprep_1')
         self.assertEqual(list(mealprep.ingredient_grams.keys()), ['Water'])
+
+    def test_page(self):
+        self.mealprep_database.insert_mealprep(self.mock_mealprep3)
+        self.mealprep_database.insert_mealprep(self.mock_mealprep1)
+
+        page, next_key = self.mealprep_database.page(limit=1)
+        self.assertEqual([m.recipe_name for m in page], ['test_mealprep_1'])
+        page, next_key = self.mealprep_database.page(next_key, limit=1)
+        self.assertEqual([m.recipe_name for m in page], ['test_mealprep_3'])
+        self.assertIsNone(next_key)
+        self.assertTrue(self.mealprep_database.has_mealpreps())
+
+    def test_consume(self):
+        self.mealprep_database.enable_cache()
+        self.mealprep_database.insert_mealprep(self.mock_mealprep1)
+
+        self.assertEqual(self.mealprep_database.consume('test_mealprep_1', 100.0), 50.0)
+        self.assertEqual(
+            self.mealprep_database.get_mealprep('test_mealprep_1').remaining_grams, 50.0)
+        self.assertEqual(self.mealprep_database.consume('test_mealprep_1', 80.0), 0.0)
+
+        with self.assertRaises(RecipeNotFound):
+            self.mealprep_database.consume('test_mealprep_3', 10.0)
+        with self.assertRaises(CriticalError):
+            self.mealprep_database.consume('test_mealprep_1', -1.0)
+
+    def test_consume_from_two_connections(self):
+        self.mealprep_database.insert_mealprep(self.mock_mealprep1)
+
+        other = ConnectionManager(self.mealprep_database.connection_manager.path_to_db)
+        try:
+            other_database = MealprepDatabase(other)
+            for _ in range(10):
+                self.mealprep_database.consume('test_mealprep_1', 5.0)
+                other_database.consume('test_mealprep_1', 5.0)
+        finally:
+            other.close()
+
+        self.assertEqual(
+            self.mealprep_database.get_mealprep('test_mealprep_1').remaining_grams, 50.0)
+
+    def test_update_mealprep_keeps_concurrently_eaten_grams(self):
+        self.mealprep_database.enable_cache()
+        self.mealprep_database.insert_mealprep(self.mock_mealprep1)
+        self.mealprep_database.get_mealprep('test_mealprep_1')
+
+        # Another instance eats while the mealprep is being edited
+        other = ConnectionManager(self.mealprep_database.connection_manager.path_to_db)
+        try:
+            MealprepDatabase(other).consume('test_mealprep_1', 100.0)
+        finally:
+            other.close()
+
+        edited = Mealprep('test_mealprep_1', 300.0, '01/01/2024', {}, NutritionalValues())
+        self.mealprep_database.update_mealprep(edited)
+
+        mealprep = self.mealprep_database.get_mealprep('test_mealprep_1')
+        self.assertEqual((mealprep.total_grams, mealprep.remaining_grams), (300.0, 200.0))
+
+        self.mealprep_database.update_mealprep(
+            Mealprep('test_mealprep_1', 50.0, '01/01/2024', {}, NutritionalValues()))
+        self.assertEqual(
+            self.mealprep_database.get_mealprep('test_mealprep_1').remaining_grams, 0.0)
+
+        with self.assertRaises(RecipeNotFound):
+            self.mealprep_database.update_mealprep(self.mock_mealprep3)
+        with self.assertRaises(CriticalError):
+            self.mealprep_database.update_mealprep(1)
+
+    def test_expired_mealpreps(self):
+        fresh = Mealprep('fresh', 100.0, '30/12/2023', {}, NutritionalValues())
+        old   = Mealprep('old',   100.0, '01/12/2023', {}, NutritionalValues())
+        for mealprep in [fresh, old, self.mock_mealprep3]:
+            self.mealprep_database.insert_mealprep(mealprep)
+        self.mealprep_database.consume('test_mealprep_3', 150.0)
+
+        today   = datetime.date(2024, 1, 2)
+        expired = self.mealprep_database.get_expired_mealpreps(max_age_days=4, today=today)
+        self.assertEqual(sorted(m.recipe_name for m in expired), ['old', 'test_mealprep_3'])
+
+        self.assertEqual(self.mealprep_database.prune_mealpreps(max_age_days=4, today=today), 2)
+        self.assertEqual(self.mealprep_database.get_list_of_mealprep_names(), ['fresh'])
+
+    def test_expired_mealpreps_are_selected_with_indexes(self):
+        plan = self.mealprep_database.cursor.execute(
+            f'EXPLAIN QUERY PLAN {self.mealprep_database.select_expired}', ('20240101',))
+        details = ' '.join(row[-1] for row in plan)
+
+        self.assertIn('Mealpreps_cook_day', details)
+        self.assertIn('Mealpreps_remaining_grams', details)
@@ -18,6 +18,7 @@ along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 
 import unittest
 
+from src.common.exceptions           import CriticalError
 from src.entities.meal               import Meal
 from src.entities.nutritional_values import NutritionalValues
 
@@ -119,3 +120,46 @@ class TestMeal(unittest.TestCase):
         for k in self.meal.accompaniment_grams.keys():
             self.assertEqual(self.meal.accompaniment_grams[k],
                              new_meal.accompaniment_grams[k])
+
+    def test_to_bytes(self):
+        meal   = Meal('Curry', '01/02/23-15:30:45', 250.0,
+                      NutritionalValues(kcal=400.5, protein_g=30.0, creatine_g=2.5),
+                      {'Rice': 150.0, 'Yogurt': 50.0})
+        record = meal.to_bytes()
+
+        # Only the three nutrients that are not zero are stored
+        self.assertEqual(len(record), 1 + 8 + 7 + 19 + 10 + (6 + 8) + (8 + 8) + 8 + 3 * 8)
+        self.assertLess(len(record), len(meal.serialize()) // 5)
+
+        new_meal = Meal.from_bytes(record)
+        self.assertEqual(new_meal.meal_id,             meal.meal_id)
+        self.assertEqual(new_meal.name,                meal.name)
+        self.assertEqual(new_meal.eat_tstamp,          meal.eat_tstamp)
+        self.assertEqual(new_meal.main_grams,          meal.main_grams)
+        self.assertEqual(new_meal.meal_nv,             meal.meal_nv)
+        self.assertEqual(new_meal.accompaniment_grams, meal.accompaniment_grams)
+        self.assertEqual(new_meal.to_bytes(),          record)
+
+    def test_from_bytes_with_unknown_version_raises_critical_error(self):
+        with self.assertRaises(CriticalError):
+            Meal.from_bytes(b'\x03' + self.meal.to_bytes()[1:])
+
+    def test_legacy_record_has_no_id(self):
+        new_meal = Meal.from_bytes(self.meal.to_bytes(version=1))
+        self.assertEqual(new_meal.meal_id, '')
+        self.assertEqual(new_meal.accompaniment_grams, {'Water': 100.0})
+
+    def test_copy(self):
+        meal_copy = self.meal.copy()
+        self.assertEqual(meal_copy, self.meal)
+        self.assertEqual(meal_copy.meal_id, self.meal.meal_id)
+
+        meal_copy.meal_nv.kcal = 100.0
+        meal_copy.accompaniment_grams['Salt'] = 1.0
+        self.assertEqual(self.meal.meal_nv, NutritionalValues())
+        self.assertEqual(self.meal.accompaniment_grams, {'Water': 100.0})
+
+    def test_meals_get_unique_ids(self):
+        self.assertEqual(len(self.meal.meal_id), 16)
+        self.assertNotEqual(self.meal.meal_id, self.same_meal.meal_id)
+        self.assertEqual(Meal.get_id(self.meal.to_bytes()), self.meal.meal_id)
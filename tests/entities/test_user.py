@@ -16,14 +16,18 @@ details. You should have received a copy of the GNU General Public License
 along with Calorinator. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import json
 import unittest
 
-from src.common.enums import PhysicalActivityLevel, DietType, Gender
+from unittest import mock
+
+from src.common.enums import DBKeys, PhysicalActivityLevel, DietType, Gender
 from src.common.utils import get_today_str
+from src.database.log_records import is_legacy_record
 from src.entities.meal import Meal
 from src.entities.nutritional_values import NutritionalValues
 
-from src.entities.user             import User
+from src.entities.user             import User, to_month
 from src.entities.user_credentials import UserCredentials
 
 from tests.utils import cd_unit_test, cleanup
@@ -101,8 +105,7 @@ class TestUser(unittest.TestCase):
 
         expected_string = (b'{"name": "test_user", "birthday": "01/01/1990", "gender": "Male", '
                            b'"height_cm": 180, "init_weight_kg": 79.0, "pal": "Moderately Active", '
-                           b'"diet_type": "Diet", "weight_log": "{\\"14/05/2023\\": 79.9}", '
-                           b'"meal_log": "{}"}')
+                           b'"diet_type": "Diet"}')
 
         self.assertEqual(self.user.serialize(), expected_string)
 
@@ -112,6 +115,162 @@ class TestUser(unittest.TestCase):
 
         self.assertEqual(self.user, new_user)
 
+    def test_changes_are_journaled(self):
+        meal1 = Meal('test1', get_today_str(), 250.0, NutritionalValues(), {'Water': 250.0})
+        meal2 = Meal('test2', get_today_str(), 100.0, NutritionalValues(), {'Salt': 100.0})
+
+        self.user.set_morning_weight(79.5)
+        with mock.patch.object(self.user.database, 'store_db') as store_db:
+            self.user.add_meal(meal1)
+            self.user.add_meal(meal2)
+            self.user.delete_meal(meal1)
+            store_db.assert_not_called()
+
+        self.assertEqual(self.user.database.journal_records, 3)
+
+        new_user = User.from_database(self.user_credentials1)
+        self.assertEqual(new_user.get_todays_weight(), 79.5)
+        self.assertEqual(new_user.get_todays_meals(), [meal2])
+        self.assertEqual(new_user.database.journal_records, 3)
+
+        new_user.set_morning_weight(80.0)
+        self.assertEqual(User.from_database(self.user_credentials1).get_todays_weight(), 80.0)
+
+    def test_full_journal_is_folded_into_snapshot(self):
+        self.user.set_morning_weight(79.5)
+
+        with mock.patch('src.entities.user.DatabaseSettings') as settings:
+            settings.JOURNAL_MAX_RECORDS.value = 2
+            for weight in [79.6, 79.7, 79.8]:
+                self.user.set_morning_weight(weight)
+
+        self.assertEqual(self.user.database.journal_records, 0)
+        self.assertEqual(User.from_database(self.user_credentials1).get_todays_weight(), 79.8)
+
+    def test_partitions_are_loaded_on_first_access(self):
+        meal = Meal('test', get_today_str(), 250.0, NutritionalValues(), {'Water': 250.0})
+        self.user.set_morning_weight(79.5)
+        self.user.add_meal(meal)
+        self.user.apply_change(['set_weight', '01/01/2020', 85.0])
+        self.user.store_db()
+
+        self.assertEqual(len(self.user.database.list_partitions()), 2)
+
+        new_user = User.from_database(self.user_credentials1)
+        self.assertEqual(new_user.partitions, {})
+        self.assertEqual(new_user.get_todays_meals(), [meal])
+        self.assertEqual(len(new_user.partitions), 1)
+
+        self.assertEqual(new_user.get_weight_log(), {'01/01/2020': 85.0, get_today_str(): 79.5})
+
+    def test_interrupted_store_does_not_apply_journal_twice(self):
+        meal = Meal('test', get_today_str(), 250.0, NutritionalValues(), {'Water': 250.0})
+        self.user.set_morning_weight(79.5)
+        self.user.add_meal(meal)
+
+        with mock.patch.object(self.user.database, 'store_db', side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.user.store_db()
+
+        new_user = User.from_database(self.user_credentials1)
+        self.assertEqual(new_user.get_todays_meals(), [meal])
+
+        new_user.add_meal(meal)
+        self.assertEqual(User.from_database(self.user_credentials1).get_todays_meals(),
+                         [meal, meal])
+
+    def test_unpartitioned_database_is_partitioned(self):
+        meal     = Meal('test', '01/01/2020', 250.0, NutritionalValues(), {'Water': 250.0})
+        meal_log = {'01/01/2020': [meal.serialize()]}
+        profile  = json.loads(self.user.serialize())
+        profile.update({DBKeys.WEIGHT_LOG.value: json.dumps({'01/02/2020': 80.0}),
+                        DBKeys.MEAL_LOG.value:   json.dumps(meal_log)})
+        self.user.database.store_db(json.dumps(profile).encode())
+
+        User.from_database(self.user_credentials1)
+        self.assertEqual(self.user.database.list_partitions(), ['2020-01', '2020-02'])
+
+        new_user = User.from_database(self.user_credentials1)
+        self.assertEqual(new_user.get_weight_log(), {'01/02/2020': 80.0})
+        self.assertEqual(list(new_user.get_meals('01/01/2020').values()), [meal])
+        self.assertEqual(list(User.from_database(self.user_credentials1).get_meals('01/01/2020')),
+                         list(new_user.get_meals('01/01/2020')))
+
+    def test_parsed_meals_are_kept_in_sync(self):
+        meal1 = Meal('test1', get_today_str(), 250.0, NutritionalValues(), {'Water': 250.0})
+        meal2 = Meal('test2', get_today_str(), 100.0, NutritionalValues(), {'Salt': 100.0})
+        self.user.set_morning_weight(79.5)
+        self.user.add_meal(meal1)
+
+        new_user = User.from_database(self.user_credentials1)
+        with mock.patch.object(Meal, 'from_bytes', wraps=Meal.from_bytes) as from_bytes:
+            for _ in range(3):
+                self.assertEqual(new_user.get_todays_meals(), [meal1])
+            self.assertEqual(from_bytes.call_count, 1)
+
+            new_user.add_meal(meal2)
+            new_user.delete_meal(meal1)
+            self.assertEqual(new_user.get_todays_meals(), [meal2])
+            self.assertEqual(from_bytes.call_count, 2)
+
+        new_user.get_todays_meals().clear()
+        self.assertEqual(new_user.get_todays_meals(), [meal2])
+        self.assertEqual(User.from_database(self.user_credentials1).get_todays_meals(), [meal2])
+
+    def test_meals_are_deleted_and_edited_by_id(self):
+        meal1 = Meal('test', get_today_str(), 250.0, NutritionalValues(), {'Water': 250.0})
+        meal2 = Meal('test', get_today_str(), 100.0, NutritionalValues(), {'Water': 250.0})
+        self.user.set_morning_weight(79.5)
+        self.user.add_meal(meal1)
+        self.user.add_meal(meal2)
+        self.user.add_meal(meal2)
+        self.assertEqual(len({m.meal_id for m in self.user.get_todays_meals()}), 3)
+
+        self.user.delete_meal(meal1)
+        meal2.main_grams = 150.0
+        self.user.edit_meal(meal2)
+
+        new_user = User.from_database(self.user_credentials1)
+        self.assertEqual(sorted(m.main_grams for m in new_user.get_todays_meals()), [100.0, 150.0])
+        self.assertEqual(new_user.get_meal(get_today_str(), meal2.meal_id).main_grams, 150.0)
+        self.assertNotIn(meal1.meal_id, new_user.get_meals(get_today_str()))
+
+    def test_legacy_journaled_delete_is_applied(self):
+        meal = Meal('test', get_today_str(), 250.0, NutritionalValues(), {'Water': 250.0})
+        self.user.set_morning_weight(79.5)
+        for change_type in ['add_meal', 'add_meal', 'delete_meal']:
+            self.user.database.append(json.dumps([change_type, get_today_str(),
+                                                  meal.serialize()]).encode())
+
+        new_user = User.from_database(self.user_credentials1)
+        self.assertEqual(len(new_user.get_todays_meals()), 1)
+
+        new_user.delete_meal(new_user.get_todays_meals()[0])
+        self.assertEqual(User.from_database(self.user_credentials1).get_todays_meals(), [])
+
+    def test_json_partitions_and_journal_are_converted(self):
+        meal = Meal('test', get_today_str(), 250.0, NutritionalValues(kcal=300.0), {'Water': 250.0})
+        self.user.set_morning_weight(79.5)
+
+        month     = to_month(get_today_str())
+        partition = {DBKeys.WEIGHT_LOG.value: {get_today_str(): 79.5},
+                     DBKeys.MEAL_LOG.value:   {get_today_str(): [meal.serialize()]},
+                     DBKeys.JOURNAL.value:    [self.user.database.journal_header.hex(), 0]}
+        self.user.database.store_partition(month, json.dumps(partition).encode())
+        self.user.database.append(json.dumps(['add_meal', get_today_str(),
+                                              meal.serialize()]).encode())
+
+        new_user = User.from_database(self.user_credentials1)
+        self.assertEqual(new_user.get_todays_weight(), 79.5)
+        self.assertEqual(new_user.get_todays_meals(), [meal, meal])
+        self.assertEqual(new_user.get_todays_meals()[0].meal_nv.kcal, 300.0)
+        self.assertEqual(new_user.dirty, {month})
+
+        new_user.store_db()
+        self.assertFalse(is_legacy_record(self.user.database.load_partition(month)))
+        self.assertEqual(User.from_database(self.user_credentials1).get_todays_meals(),
+                         [meal, meal])
+
     def test_morning_weight(self):
         self.user.set_morning_weight(79.5)
         self.assertEqual(self.user.get_todays_weight(), 79.5)
@@ -123,6 +282,13 @@ class TestUser(unittest.TestCase):
         stored_meal = self.user.get_todays_meals()[0]
         self.assertEqual(stored_meal, meal)
 
+        # The returned meals are copies, so modifying them does not change the meal log
+        stored_meal.meal_nv.kcal = 100.0
+        stored_meal.accompaniment_grams.clear()
+        self.assertEqual(self.user.get_todays_meals()[0].meal_nv.kcal, 0.0)
+        self.assertEqual(self.user.get_meal(get_today_str(), meal.meal_id).accompaniment_grams,
+                         {'Water': 250.0})
+
     def test_delete_meal(self):
         meal = Meal('test',  get_today_str(), 250.0, NutritionalValues(), {'Water': 250.0})
 